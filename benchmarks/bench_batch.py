@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la detección por lotes de archivos pequeños: detect_problems
+archivo por archivo contra NewlineFixer.detect_problems_batch sobre los
+mismos contenidos, agrupados como con --batch-small, en un corpus sintético
+(ver corpus.py) de archivos de pocos KB.
+
+Uso:
+    python3 benchmarks/bench_batch.py [--files 2000] [--size-kb 2] [--newline 0.01]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from corpus import generate_corpus
+from fix_newlines_improved import NewlineFixer
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la detección por lotes")
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--size-kb', type=float, default=2)
+    parser.add_argument('--newline', type=float, default=0.01, help="Fracción de líneas con \\n literal")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        info = generate_corpus(Path(tmp), args.files, args.size_kb, args.newline)
+        fixer = NewlineFixer(tmp)
+        files = [Path(tmp) / path for path in info['paths']]
+        batches = [[files[index] for index in batch] for batch in fixer.small_batches(files)]
+        # Lo que process_batch le pasa a detect_problems_batch: contenidos leídos, por codificación
+        groups = []
+        for batch in batches:
+            by_encoding = {}
+            for file_path in batch:
+                content, encoding = fixer.read_content(file_path)
+                key = encoding if isinstance(content, bytes) else None
+                by_encoding.setdefault(key, []).append((file_path, content))
+            groups.extend((items, encoding) for encoding, items in by_encoding.items())
+    megabytes = info['bytes'] / (1024 * 1024)
+    print(f"📄 {info['files']} archivos, {megabytes:.1f} MB, {len(batches)} lotes")
+
+    def per_file():
+        return [[fixer.detect_problems(content, file_path, encoding) for file_path, content in items]
+                for items, encoding in groups]
+
+    def batched():
+        return [fixer.detect_problems_batch(items, encoding) for items, encoding in groups]
+
+    # Las omisiones del prefiltro se cuentan por archivo: tienen que coincidir también
+    fixer.rule_skips = {}
+    single_output, single_skips = per_file(), fixer.rule_skips
+    fixer.rule_skips = {}
+    assert batched() == single_output, "la detección por lotes cambió algún resultado"
+    assert fixer.rule_skips == single_skips, "la detección por lotes cambió las omisiones del prefiltro"
+    problems = sum(len(file_problems) for group in batched() for file_problems in group)
+    single = best_of(per_file, args.repeat)
+    batch = best_of(batched, args.repeat)
+
+    print(f"🔎 {problems} problemas detectados (iguales en ambos modos)")
+    print(f"\n{'':<18}{'segundos':>10}{'archivos/s':>12}{'MB/s':>10}")
+    for name, seconds in (('por archivo', single), ('por lotes', batch)):
+        print(f"{name:<18}{seconds:>10.3f}{info['files'] / seconds:>12.0f}{megabytes / seconds:>10.1f}")
+    print(f"\n⚡ Aceleración: {single / batch:.1f}x")
+
+if __name__ == "__main__":
+    main()
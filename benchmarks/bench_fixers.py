@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los correctores y de cada una de sus reglas sobre un corpus
+sintético (ver corpus.py): archivos/s, MB/s y memoria máxima (RSS).
+
+Cada medición corre en un proceso propio sobre una copia fresca del corpus,
+así el RSS máximo es el de esa medición y los archivos corregidos por una no
+afectan a la siguiente. Los resultados se guardan en JSON para comparar
+versiones con --compare.
+
+Uso:
+    python3 benchmarks/bench_fixers.py [--files 500] [--size-kb 8] [--output bench_fixers.json]
+    python3 benchmarks/bench_fixers.py --compare bench_fixers_anterior.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import fix_newlines
+from corpus import generate_corpus
+from fix_newlines_improved import NewlineFixer
+from fix_pipeline import FixPipeline
+from fix_stage_rules import OBJECTID_PATTERNS, TSX_PATTERNS
+
+FIXERS = ['NewlineFixer', 'FixPipeline[escapes]', 'FixPipeline[objectid]', 'fix_newline_content']
+
+JS_EXTENSIONS = ('.js', '.ts', '.tsx', '.jsx')
+
+def rule_lists() -> Dict[str, Tuple[List, int, Tuple[str, ...]]]:
+    """Listas de reglas: (reglas, flags, extensiones a las que se aplican)."""
+    fixer = NewlineFixer('.')
+    return {
+        'NewlineFixer.js_patterns': (fixer.js_patterns, re.MULTILINE, JS_EXTENSIONS),
+        'NewlineFixer.general_patterns': (fixer.general_patterns, re.MULTILINE, JS_EXTENSIONS + ('.md',)),
+        'NewlineFixer.json_patterns': (fixer.json_patterns, re.MULTILINE, ('.json',)),
+        'TSX_PATTERNS': (TSX_PATTERNS, re.MULTILINE, ('.tsx',)),
+        'OBJECTID_PATTERNS': (OBJECTID_PATTERNS, 0, JS_EXTENSIONS),
+        'fix_newlines.JS_PATTERNS': (fix_newlines.JS_PATTERNS, re.MULTILINE, JS_EXTENSIONS),
+        'fix_newlines.TEXT_PATTERNS': (fix_newlines.TEXT_PATTERNS, re.MULTILINE, ('.md',)),
+        'fix_newlines.JSON_PATTERNS': (fix_newlines.JSON_PATTERNS, re.MULTILINE, ('.json',)),
+    }
+
+def peak_rss_mb() -> float:
+    """Memoria residente máxima del proceso actual, en MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def corpus_files(root: Path, extensions: Tuple[str, ...]) -> List[Path]:
+    return sorted(path for path in root.rglob('*') if path.suffix in extensions)
+
+def run_fixer(name: str, root: Path) -> Tuple[int, int]:
+    """Ejecuta un corrector sobre el corpus; devuelve (archivos, bytes)."""
+    if name == 'NewlineFixer':
+        fixer = NewlineFixer(str(root))
+        files = fixer.find_files()
+        size = sum(path.stat().st_size for path in files)
+        for file_path in files:
+            fixer.process_file(file_path)
+        fixer.backups.commit()
+        fixer.transaction.commit()
+
+    elif name.startswith('FixPipeline['):
+        # Lo que ejecutan fix_tsx_escapes.py y fix_objectid_keys.py: el pipeline con una sola etapa
+        stage = name[len('FixPipeline['):-1]
+        pipeline = FixPipeline(str(root), stages=[stage], tool='bench')
+        if stage == 'escapes':
+            # El corpus no tiene los archivos de PROBLEM_FILES: la etapa se aplica a todos los .tsx
+            pipeline.escape_files = {path.relative_to(root).as_posix() for path in corpus_files(root, ('.tsx',))}
+        files = pipeline.find_files()
+        size = sum(path.stat().st_size for path, _ in files)
+        pipeline.run([path for path, _ in files])
+
+    else:
+        files = fix_newlines.find_files_to_process(root)
+        size = sum(path.stat().st_size for path in files)
+        for file_path in files:
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                fix_newlines.fix_newline_content(f.read(), file_path)
+
+    return len(files), size
+
+def run_rule(name: str, root: Path) -> Tuple[int, int, int, float]:
+    """Aplica una sola regla a los archivos del corpus.
+
+    Devuelve (archivos, bytes, coincidencias, segundos); solo se mide la
+    aplicación de la regla, no la lectura del corpus.
+    """
+    list_name, index = name.rsplit('[', 1)
+    rules, flags, extensions = rule_lists()[list_name]
+    pattern, replacement, _ = rules[int(index.rstrip(']'))]
+    compiled = re.compile(pattern, flags)
+
+    contents = [path.read_text(encoding='utf-8') for path in corpus_files(root, extensions)]
+    size = sum(len(content.encode('utf-8')) for content in contents)
+    matches = 0
+    start = time.perf_counter()
+    for content in contents:
+        matches += compiled.subn(replacement, content)[1]
+    return len(contents), size, matches, time.perf_counter() - start
+
+def worker(kind: str, name: str, root: Path):
+    """Proceso de medición: imprime una línea JSON con el resultado."""
+    measurement = {'kind': kind, 'name': name}
+    start = time.perf_counter()
+    # Los correctores imprimen cada archivo; no medir la consola
+    with contextlib.redirect_stdout(io.StringIO()):
+        if kind == 'fixer':
+            files, size = run_fixer(name, root)
+            elapsed = time.perf_counter() - start
+        else:
+            files, size, measurement['matches'], elapsed = run_rule(name, root)
+    megabytes = size / (1024 * 1024)
+    measurement.update({
+        'files': files,
+        'bytes': size,
+        'seconds': round(elapsed, 6),
+        'files_per_s': round(files / elapsed, 1) if elapsed else None,
+        'mb_per_s': round(megabytes / elapsed, 2) if elapsed else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    })
+    print(json.dumps(measurement))
+
+def measure(kind: str, name: str, corpus: Path, workdir: Path, repeat: int) -> Dict:
+    """Mide en procesos separados y se queda con la repetición más rápida."""
+    best = None
+    for attempt in range(repeat):
+        copy = workdir / f'{kind}-{attempt}'
+        shutil.copytree(corpus, copy)
+        output = subprocess.run([sys.executable, __file__, '--worker', kind, name, str(copy)],
+                                check=True, capture_output=True, text=True).stdout
+        shutil.rmtree(copy)
+        measurement = json.loads(output.strip().splitlines()[-1])
+        if best is None or measurement['seconds'] < best['seconds']:
+            best = measurement
+    return best
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current: Dict, previous_path: str):
+    """Imprime la variación de MB/s respecto de resultados anteriores."""
+    with open(previous_path) as f:
+        previous = json.load(f)
+    before = {(m['kind'], m['name']): m for m in previous['fixers'] + previous['rules']}
+    print(f"\n📈 Comparación con {previous_path} ({previous.get('revision')})")
+    for measurement in current['fixers'] + current['rules']:
+        old = before.get((measurement['kind'], measurement['name']))
+        if old and old['mb_per_s'] and measurement['mb_per_s']:
+            ratio = measurement['mb_per_s'] / old['mb_per_s']
+            flag = '⚠️ ' if ratio < 0.9 else '  '
+            print(f"{flag}{measurement['name']:<40}{old['mb_per_s']:>10.1f}{measurement['mb_per_s']:>10.1f}{ratio:>8.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de correctores y reglas")
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--size-kb', type=float, default=8)
+    parser.add_argument('--newline', type=float, default=0.01)
+    parser.add_argument('--classname', type=float, default=0.005)
+    parser.add_argument('--objectid', type=float, default=0.005)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-rules', action='store_true', help="Medir solo los correctores")
+    parser.add_argument('--output', default='bench_fixers.json')
+    parser.add_argument('--compare', help="Resultados anteriores con los que comparar")
+    parser.add_argument('--worker', nargs=3, metavar=('KIND', 'NAME', 'ROOT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        kind, name, root = args.worker
+        worker(kind, name, Path(root))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        corpus = workdir / 'corpus'
+        info = generate_corpus(corpus, args.files, args.size_kb, args.newline,
+                               args.classname, args.objectid, args.seed)
+        info.pop('paths')
+        print(f"📄 Corpus: {info['files']} archivos, {info['bytes'] / (1024 * 1024):.1f} MB {info['counts']}")
+
+        results = {
+            'timestamp': __import__('datetime').datetime.now().isoformat(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'corpus': info,
+            'fixers': [],
+            'rules': [],
+        }
+
+        print(f"\n{'corrector':<40}{'arch/s':>10}{'MB/s':>10}{'RSS MB':>10}")
+        for name in FIXERS:
+            measurement = measure('fixer', name, corpus, workdir, args.repeat)
+            results['fixers'].append(measurement)
+            print(f"{name:<40}{measurement['files_per_s']:>10.1f}{measurement['mb_per_s']:>10.1f}{measurement['peak_rss_mb']:>10.1f}")
+
+        if not args.no_rules:
+            print(f"\n{'regla':<40}{'MB/s':>10}{'coinc.':>10}{'RSS MB':>10}")
+            for list_name, (rules, _, _) in rule_lists().items():
+                for index in range(len(rules)):
+                    name = f'{list_name}[{index}]'
+                    measurement = measure('rule', name, corpus, workdir, args.repeat)
+                    measurement['description'] = rules[index][2]
+                    results['rules'].append(measurement)
+                    print(f"{name:<40}{measurement['mb_per_s']:>10.1f}{measurement['matches']:>10}{measurement['peak_rss_mb']:>10.1f}")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n📄 Resultados guardados en: {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
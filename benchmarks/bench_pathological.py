@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Benchmark de entradas patológicas: busca líneas largas (tipo código minificado)
+que hacen retroceder a las reglas, mide cómo crece su costo con el tamaño, y
+verifica que con el presupuesto por archivo el peor caso de una ejecución queda
+acotado.
+
+Uso:
+    python3 benchmarks/bench_pathological.py [--timeout 2] [--fuzz 200]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fix_newlines
+from corpus import generate_corpus
+from fix_newlines_improved import NewlineFixer
+from fix_stage_rules import OBJECTID_PATTERNS, TSX_PATTERNS
+
+# Familias de líneas largas, modeladas en código minificado
+FAMILIES: Dict[str, Callable[[int], str]] = {
+    'identificador': lambda n: 'a' * n,
+    'comilla_abierta': lambda n: "'" + 'x' * n,
+    'console_abierto': lambda n: "console.log('" + 'x' * n,
+    'template_abierto': lambda n: '`' + 'x' * n,
+    'comentario_espacios': lambda n: '//' + ' ' * n + 'x',
+    'atributos_escapados': lambda n: 'a=\\"' * (n // 4),
+    'ids': lambda n: 'a._id ' * (n // 6),
+}
+
+# Caracteres que usan los patrones, para las entradas aleatorias
+FUZZ_ALPHABET = 'ax_=. \'"`\\n{}()$/:'
+
+SIZES = [1000, 2000, 4000, 8000]
+
+def rule_lists() -> Dict[str, List]:
+    fixer = NewlineFixer('.')
+    return {
+        'NewlineFixer.js_patterns': fixer.js_patterns,
+        'NewlineFixer.general_patterns': fixer.general_patterns,
+        'NewlineFixer.json_patterns': fixer.json_patterns,
+        'TSX_PATTERNS': TSX_PATTERNS,
+        'OBJECTID_PATTERNS': OBJECTID_PATTERNS,
+        'fix_newlines.JS_PATTERNS': fix_newlines.JS_PATTERNS,
+    }
+
+def time_sub(compiled, replacement: str, text: str) -> float:
+    start = time.perf_counter()
+    compiled.sub(replacement, text)
+    return time.perf_counter() - start
+
+def growth(compiled, replacement: str, family: Callable[[int], str], limit: float) -> List[Tuple[int, float]]:
+    """Tiempos por tamaño; se detiene al superar limit segundos."""
+    timings = []
+    for size in SIZES:
+        seconds = time_sub(compiled, replacement, family(size))
+        timings.append((size, seconds))
+        if seconds > limit:
+            break
+    return timings
+
+def exponent(timings: List[Tuple[int, float]]) -> float:
+    """Exponente de crecimiento entre las dos últimas mediciones (1 = lineal, 2 = cuadrático)."""
+    (small, t_small), (large, t_large) = timings[-2], timings[-1]
+    if t_small <= 0 or t_large <= 0:
+        return 0.0
+    return math.log(t_large / t_small) / math.log(large / small)
+
+def fuzz(compiled, replacement: str, rounds: int, rng: random.Random) -> Tuple[float, str]:
+    """Peor tiempo sobre líneas aleatorias de 4000 caracteres del alfabeto de los patrones."""
+    worst, worst_text = 0.0, ''
+    for _ in range(rounds):
+        text = ''.join(rng.choice(FUZZ_ALPHABET) for _ in range(4000))
+        seconds = time_sub(compiled, replacement, text)
+        if seconds > worst:
+            worst, worst_text = seconds, text
+    return worst, worst_text
+
+def scan_rules(rounds: int) -> List[Dict]:
+    """Mide cada regla contra cada familia y contra entradas aleatorias."""
+    rng = random.Random(0)
+    findings = []
+    for list_name, rules in rule_lists().items():
+        for index, (pattern, replacement, description) in enumerate(rules):
+            compiled = re.compile(pattern, re.MULTILINE)
+            worst = {'family': None, 'exponent': 0.0, 'seconds_at_8000': 0.0}
+            for family_name, family in FAMILIES.items():
+                timings = growth(compiled, replacement, family, limit=1.0)
+                rate = exponent(timings)
+                if rate > worst['exponent'] and timings[-1][1] > 0.005:
+                    worst = {'family': family_name, 'exponent': round(rate, 2),
+                             'seconds_at_8000': round(timings[-1][1] * (8000 / timings[-1][0]) ** rate, 4)}
+            fuzz_seconds, _ = fuzz(compiled, replacement, rounds, rng)
+            findings.append({'rule': f'{list_name}[{index}]', 'description': description,
+                             'worst_family': worst['family'], 'exponent': worst['exponent'],
+                             'seconds_at_8000': worst['seconds_at_8000'],
+                             'fuzz_worst_seconds': round(fuzz_seconds, 4)})
+    return findings
+
+def bounded_run(timeout: float, line_length: int, jobs: int) -> Dict:
+    """Ejecuta NewlineFixer sobre un corpus con un archivo patológico."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        generate_corpus(root, files=100, size_kb=4)
+        # Una línea minificada con un comentario que hace retroceder a js_patterns
+        pathological = root / 'src/components/ui/Minified.js'
+        pathological.write_text('//' + ' ' * line_length + "x\nconsole.log('a\\\\nb')\n")
+
+        fixer = NewlineFixer(str(root), timeout=timeout)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = fixer.run(jobs=jobs)
+        elapsed = time.perf_counter() - start
+
+    statuses = {r['file']: r['status'] for r in result['results']}
+    return {
+        'timeout': timeout,
+        'jobs': jobs,
+        'line_length': line_length,
+        'files': len(statuses),
+        'timeouts': fixer.stats['timeouts'],
+        'pathological_status': statuses.get('src/components/ui/Minified.js'),
+        'seconds': round(elapsed, 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de entradas patológicas")
+    parser.add_argument('--timeout', type=float, default=2, help="Presupuesto por archivo")
+    parser.add_argument('--line-length', type=int, default=100000,
+                        help="Largo de la línea patológica de la ejecución acotada")
+    parser.add_argument('--jobs', type=int, default=2)
+    parser.add_argument('--fuzz', type=int, default=50, help="Entradas aleatorias por regla")
+    parser.add_argument('--output', help="Guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    print("🔬 Crecimiento del costo por regla (exponente 1 = lineal, 2 = cuadrático)")
+    print(f"{'regla':<36}{'peor familia':<22}{'exp.':>6}{'s @8000':>10}{'fuzz s':>10}")
+    findings = scan_rules(args.fuzz)
+    for finding in findings:
+        print(f"{finding['rule']:<36}{str(finding['worst_family']):<22}{finding['exponent']:>6.2f}"
+              f"{finding['seconds_at_8000']:>10.4f}{finding['fuzz_worst_seconds']:>10.4f}")
+
+    # Costo estimado sin presupuesto de la línea patológica, según el exponente medido
+    comment_rule = next(f for f in findings if f['rule'] == 'NewlineFixer.js_patterns[4]')
+    estimate = comment_rule['seconds_at_8000'] * (args.line_length / 8000) ** max(comment_rule['exponent'], 1)
+
+    print(f"\n⏱️  Ejecución con un archivo patológico ({args.line_length} caracteres en una línea)")
+    print(f"   Sin presupuesto (estimado): {estimate:.1f} s solo para ese archivo")
+    run = bounded_run(args.timeout, args.line_length, args.jobs)
+    print(f"   Con presupuesto de {args.timeout:g}s: {run['seconds']:.2f} s en total, "
+          f"{run['files']} archivos, estado del archivo patológico: {run['pathological_status']}")
+    bound = args.timeout + 5
+    print(f"   {'✅' if run['seconds'] <= bound else '❌'} Peor caso acotado (≤ {bound:g} s)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'rules': findings, 'bounded_run': run, 'unbounded_estimate_seconds': round(estimate, 1)},
+                      f, indent=2)
+        print(f"\n📄 Resultados guardados en: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark del prefiltro de literales (fix_rules.LiteralIndex) sobre un corpus
+sintético (ver corpus.py): cada lista de reglas con todas sus reglas aplicadas
+a cada archivo, contra solo las reglas cuyos literales requeridos están en el
+archivo, buscados una vez con un índice común a todas las listas. Muestra
+además la tasa de omisión de cada regla.
+
+Uso:
+    python3 benchmarks/bench_prefilter.py [--files 500] [--size-kb 8] [--newline 0.01]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from bench_fixers import rule_lists
+from corpus import generate_corpus
+from fix_rules import RuleSet, literal_index, skip_report
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del prefiltro de literales")
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--size-kb', type=float, default=8)
+    parser.add_argument('--newline', type=float, default=0.01, help="Fracción de líneas con \\n literal")
+    parser.add_argument('--classname', type=float, default=0.005)
+    parser.add_argument('--objectid', type=float, default=0.005)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        info = generate_corpus(Path(tmp), args.files, args.size_kb, args.newline,
+                               args.classname, args.objectid)
+        contents = [(Path(path).suffix, (Path(tmp) / path).read_text(encoding='utf-8'))
+                    for path in info['paths']]
+    megabytes = info['bytes'] / (1024 * 1024)
+    print(f"📄 {info['files']} archivos, {megabytes:.1f} MB")
+
+    lists = {name: (RuleSet(rules, flags), extensions) for name, (rules, flags, extensions) in rule_lists().items()}
+    # Un solo índice para todas las listas: cada archivo se recorre una vez por literal distinto
+    index = literal_index(tuple(required for rule_set, _ in lists.values() for required in rule_set.required))
+    everything = frozenset(index.atoms)
+    print(f"🔎 {len(index.atoms)} literales distintos: {', '.join(repr(atom) for atom in index.atoms)}")
+
+    def run_all(prefilter: bool, skips=None):
+        outputs = []
+        for kind, content in contents:
+            present = index.scan(content) if prefilter else everything
+            for rule_set, extensions in lists.values():
+                if kind in extensions:
+                    outputs.append(rule_set.apply(content, present=present, skips=skips))
+        return outputs
+
+    skips = {}
+    assert run_all(True, skips) == run_all(False), "el prefiltro cambió algún resultado"
+    scan = best_of(lambda: [index.scan(content) for _, content in contents], args.repeat)
+    without = best_of(lambda: run_all(False), args.repeat)
+    with_prefilter = best_of(lambda: run_all(True), args.repeat)
+
+    print(f"\n{'':<18}{'segundos':>10}{'MB/s':>10}")
+    print(f"{'sin prefiltro':<18}{without:>10.3f}{megabytes / without:>10.1f}")
+    print(f"{'con prefiltro':<18}{with_prefilter:>10.3f}{megabytes / with_prefilter:>10.1f}"
+          f"   ({without / with_prefilter:.1f}x, búsqueda de literales {scan:.3f}s)")
+
+    print(f"\n{'omitida':>9}  regla")
+    for entry in skip_report(skips):
+        print(f"{entry['skip_rate']:>9.1%}  {entry['rule']} ({entry['skipped']}/{entry['files']})")
+
+if __name__ == "__main__":
+    main()
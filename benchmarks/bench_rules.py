@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark del motor de reglas: bucle re.sub por regla (enfoque anterior) contra
+fix_rules.RuleSet, en MB/s, para cada lista de patrones de los correctores.
+
+Uso:
+    python3 benchmarks/bench_rules.py [--size-mb 4] [--hit-rate 0.001]
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fix_newlines
+from fix_newlines_improved import NewlineFixer
+from fix_rules import RuleSet
+from fix_stage_rules import OBJECTID_PATTERNS, TSX_PATTERNS
+
+CLEAN_LINES = [
+    "import React, { useState } from 'react'",
+    "export default function ProductCard({ product }: Props) {",
+    "  const [open, setOpen] = useState(false)",
+    "  return <div className=\"rounded-lg shadow-md p-4\">{product.name}</div>",
+    "  // Ajustar el estado cuando cambia el producto",
+    "}",
+]
+
+HIT_LINES = [
+    "  console.log('Cargando productos:\\\\nInicio')",
+    "  throw new Error('MONGODB_URI no definida\\\\nen .env.local')",
+    "  const msg = `Linea uno\\\\nLinea dos`",
+    "  <div className=\\\"flex gap-2\\\">",
+    "  {items.map(item => <Card key={item._id} />)}",
+    "  router.push(`/admin/products/${product._id}`)",
+    "  if (a._id === b._id) return",
+    "  texto con \\n y \\t sueltos",
+]
+
+def build_content(size_mb: float, hit_rate: float, seed: int = 0) -> str:
+    """Genera contenido tipo TSX con una fracción de líneas problemáticas."""
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    while size < size_mb * 1024 * 1024:
+        line = rng.choice(HIT_LINES) if rng.random() < hit_rate else rng.choice(CLEAN_LINES)
+        lines.append(line)
+        size += len(line) + 1
+    return '\n'.join(lines)
+
+def legacy_apply(rules, content, flags):
+    """Bucle anterior: un re.sub completo por regla."""
+    changes = []
+    for pattern, replacement, description in rules:
+        old_content = content
+        content = re.sub(pattern, replacement, content, flags=flags)
+        if content != old_content:
+            changes.append(description)
+    return content, changes
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del motor de reglas")
+    parser.add_argument('--size-mb', type=float, default=4)
+    parser.add_argument('--hit-rate', type=float, default=0.001,
+                        help="Fracción de líneas con problemas (0 = archivo limpio)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    fixer = NewlineFixer('.')
+    rule_lists = [
+        ('js_patterns', fixer.js_patterns, re.MULTILINE, False),
+        ('general_patterns', fixer.general_patterns, re.MULTILINE, True),
+        ('TSX_PATTERNS', TSX_PATTERNS, re.MULTILINE, False),
+        ('OBJECTID_PATTERNS', OBJECTID_PATTERNS, 0, False),
+        ('fix_newlines.TEXT_PATTERNS', fix_newlines.TEXT_PATTERNS, re.MULTILINE, True),
+    ]
+
+    for hit_rate in sorted({0.0, args.hit_rate}):
+        content = build_content(args.size_mb, hit_rate)
+        megabytes = len(content.encode('utf-8')) / (1024 * 1024)
+        print(f"\n📄 {megabytes:.1f} MB, tasa de líneas con problemas: {hit_rate}")
+        print(f"{'reglas':<28}{'bucle MB/s':>12}{'motor MB/s':>12}{'aceleración':>13}")
+
+        for name, rules, flags, merge in rule_lists:
+            rule_set = RuleSet(rules, flags, merge)
+            assert rule_set.apply(content) == legacy_apply(rules, content, flags), name
+
+            old = best_of(lambda: legacy_apply(rules, content, flags), args.repeat)
+            new = best_of(lambda: rule_set.apply(content), args.repeat)
+            print(f"{name:<28}{megabytes / old:>12.1f}{megabytes / new:>12.1f}{old / new:>12.1f}x")
+
+if __name__ == "__main__":
+    main()
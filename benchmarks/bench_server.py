@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latencia del servidor de corrección (fix_server.py) para un
+pedido de un solo archivo, contra las ejecuciones en frío en un proceso nuevo:
+
+    cold_full     fix_newlines_improved.py sobre todo el proyecto (lo que hacen hoy los hooks)
+    cold_single   fix_server.py por stdin/stdout con un único fix_paths
+    warm_paths    fix_paths de un archivo a un servidor ya iniciado (socket Unix)
+    warm_text     fix_text del mismo contenido, sin acceder al disco
+
+Uso:
+    python3 benchmarks/bench_server.py [--files 500] [--repeat 20] [--output bench_server.json]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+from corpus import generate_corpus
+from fix_server import FixClient
+
+TARGET = 'src/lib/Target.js'
+TARGET_CONTENT = "const saludo = 'hola';\\nconsole.log(saludo);\\nexport default saludo;\n"
+
+def summarize(samples: List[float]) -> Dict:
+    samples = sorted(samples)
+    return {
+        'runs': len(samples),
+        'median_ms': round(statistics.median(samples) * 1000, 2),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 2),
+        'min_ms': round(samples[0] * 1000, 2),
+    }
+
+def timed(action: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    action()
+    return time.perf_counter() - start
+
+def measure(action: Callable[[], None], target: Path, repeat: int) -> Dict:
+    """Tiempo de action con el archivo objetivo restaurado (sin corregir) antes de cada medición."""
+    samples = []
+    for _ in range(repeat):
+        target.write_text(TARGET_CONTENT)
+        start = time.perf_counter()
+        action()
+        samples.append(time.perf_counter() - start)
+        if target.read_text() == TARGET_CONTENT:
+            raise RuntimeError('El archivo objetivo no se corrigió')
+    return summarize(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia del servidor de corrección")
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--size-kb', type=float, default=8)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--cold-repeat', type=int, default=5, help="Repeticiones de las ejecuciones en frío")
+    parser.add_argument('--output', help="Guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / 'proyecto'
+        generate_corpus(root, files=args.files, size_kb=args.size_kb)
+        target = root / TARGET
+        target.parent.mkdir(parents=True, exist_ok=True)
+        quiet = {'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL, 'check': True}
+
+        def cold_full():
+            subprocess.run([sys.executable, str(REPO / 'fix_newlines_improved.py'), '--root', str(root)], **quiet)
+
+        request = json.dumps({'jsonrpc': '2.0', 'id': 1, 'method': 'fix_paths', 'params': {'paths': [TARGET]}})
+
+        def cold_single():
+            subprocess.run([sys.executable, str(REPO / 'fix_server.py'), '--root', str(root)],
+                           input=request + '\n', text=True, **quiet)
+
+        # Una ejecución previa llena la caché de escaneo, como en el uso normal
+        cold_full()
+        results = {'files': args.files}
+        print(f"⏱️  Pedido de un archivo, proyecto de {args.files} archivos")
+        results['cold_full'] = measure(cold_full, target, args.cold_repeat)
+        results['cold_single'] = measure(cold_single, target, args.cold_repeat)
+
+        socket_path = str(Path(tmp) / 'fix.sock')
+        server = subprocess.Popen([sys.executable, str(REPO / 'fix_server.py'), '--root', str(root),
+                                   '--socket', socket_path], stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + 10
+            while not Path(socket_path).exists():
+                if time.monotonic() > deadline:
+                    raise RuntimeError('El servidor no inició')
+                time.sleep(0.01)
+            client = FixClient(socket_path)
+            results['warm_paths'] = measure(lambda: client.call('fix_paths', paths=[TARGET]), target, args.repeat)
+            results['warm_text'] = summarize([
+                timed(lambda: client.call('fix_text', text=TARGET_CONTENT, path=TARGET))
+                for _ in range(args.repeat)
+            ])
+            client.call('shutdown')
+            client.close()
+            server.wait(timeout=10)
+        finally:
+            if server.poll() is None:
+                server.kill()
+            server.wait()
+
+    print(f"{'modo':<14}{'mediana ms':>12}{'p95 ms':>10}{'mín ms':>10}")
+    for mode in ('cold_full', 'cold_single', 'warm_paths', 'warm_text'):
+        entry = results[mode]
+        print(f"{mode:<14}{entry['median_ms']:>12.2f}{entry['p95_ms']:>10.2f}{entry['min_ms']:>10.2f}")
+    speedup = results['cold_full']['median_ms'] / results['warm_paths']['median_ms']
+    print(f"\n⚡ warm_paths es {speedup:.0f}x más rápido que cold_full")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"📄 Resultados guardados en: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark del recorrido de directorios: rglob + should_skip_file (enfoque anterior)
+contra el recorrido con poda de fix_walker.
+
+Uso:
+    python3 benchmarks/bench_walker.py                 # árbol sintético
+    python3 benchmarks/bench_walker.py --root /ruta    # árbol real
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fix_newlines_improved import NewlineFixer
+
+def rglob_find_files(fixer: NewlineFixer) -> List[Path]:
+    """Versión anterior de NewlineFixer.find_files, basada en rglob."""
+    files = []
+    for file_path in fixer.project_root.rglob('*'):
+        if (file_path.is_file() and
+            not fixer.should_skip_file(file_path) and
+            (file_path.suffix in fixer.target_extensions or file_path.name.startswith('.env'))):
+            files.append(file_path)
+    return sorted(files)
+
+def build_tree(root: Path, source_files: int, vendored_files: int):
+    """Crea un árbol con código fuente y un node_modules/.git voluminosos."""
+    for i in range(source_files):
+        folder = root / 'src' / f'mod{i % 20}'
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f'Component{i}.tsx').write_text('export default function C() { return null }\n')
+    for i in range(vendored_files):
+        for skipped in ('node_modules', '.git', '.next'):
+            folder = root / skipped / f'pkg{i % 100}'
+            folder.mkdir(parents=True, exist_ok=True)
+            (folder / f'index{i}.js').write_text('module.exports = {}\n')
+
+def best_of(func, repeat: int) -> float:
+    """Devuelve el mejor tiempo de varias ejecuciones."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del recorrido de directorios")
+    parser.add_argument('--root', help="Árbol a recorrer (por defecto uno sintético)")
+    parser.add_argument('--source-files', type=int, default=500)
+    parser.add_argument('--vendored-files', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(args.root) if args.root else Path(tmp)
+        if not args.root:
+            build_tree(root, args.source_files, args.vendored_files)
+
+        fixer = NewlineFixer(str(root))
+        assert rglob_find_files(fixer) == fixer.find_files(), "Los recorridos difieren"
+
+        old = best_of(lambda: rglob_find_files(fixer), args.repeat)
+        new = best_of(fixer.find_files, args.repeat)
+
+        print(f"📁 Árbol: {root} ({len(fixer.find_files())} archivos candidatos)")
+        print(f"rglob + should_skip_file: {old * 1000:8.1f} ms")
+        print(f"fix_walker (scandir):     {new * 1000:8.1f} ms")
+        print(f"Aceleración: {old / new:.1f}x")
+
+if __name__ == "__main__":
+    main()
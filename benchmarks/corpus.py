@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Generador de un corpus sintético para los benchmarks de los correctores.
+Escribe N archivos .tsx/.ts/.json/.md con el estilo de src/components, con
+densidades ajustables de \\n literal, className=\\"...\\" y key={x._id}.
+
+Uso:
+    python3 benchmarks/corpus.py /tmp/corpus [--files 500] [--size-kb 8]
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Dict, List
+
+# Proporción de cada tipo de archivo en el corpus
+KIND_WEIGHTS = {'.tsx': 0.5, '.ts': 0.25, '.json': 0.15, '.md': 0.1}
+
+# Directorios donde se reparten los archivos, como en el proyecto
+DIRECTORIES = {
+    '.tsx': ['src/components/admin', 'src/components/carousel', 'src/components/sections',
+             'src/components/ui', 'src/app/admin/products'],
+    '.ts': ['src/lib', 'src/models', 'src/app/api/products', 'src/app/api/categories'],
+    '.json': ['src/data', 'public/locales'],
+    '.md': ['docs'],
+}
+
+CLEAN_LINES = {
+    '.tsx': [
+        "import React, { useState, useEffect } from 'react'",
+        "import Image from 'next/image'",
+        "export default function ProductCard({ product }: ProductCardProps) {",
+        "  const [isOpen, setIsOpen] = useState(false)",
+        "  useEffect(() => { setLoading(false) }, [products])",
+        "  return (",
+        "    <div className=\"rounded-lg shadow-md p-4 hover:shadow-lg transition\">",
+        "      <h3 className=\"text-lg font-semibold text-gray-800\">{product.name}</h3>",
+        "      <p className=\"text-sm text-gray-500\">{product.description}</p>",
+        "      <button onClick={() => setIsOpen(!isOpen)}>Ver más</button>",
+        "    </div>",
+        "  )",
+        "}",
+        "  // Actualizar la lista cuando cambia la categoría",
+    ],
+    '.ts': [
+        "import { NextResponse } from 'next/server'",
+        "import dbConnect from '@/lib/mongodb'",
+        "import Product from '@/models/Product'",
+        "export async function GET(request: Request) {",
+        "  await dbConnect()",
+        "  const products = await Product.find({ active: true }).sort({ order: 1 })",
+        "  return NextResponse.json({ success: true, data: products })",
+        "}",
+        "const ProductSchema = new mongoose.Schema({ name: String, price: Number })",
+    ],
+    '.json': [
+        '  "name": "Seguro Automotriz",',
+        '  "slug": "seguro-automotriz",',
+        '  "active": true,',
+        '  "order": 3,',
+        '  "category": "vehiculos",',
+    ],
+    '.md': [
+        "# Corredora de seguros",
+        "Los productos se administran desde el panel de administración.",
+        "- Ejecutar `npm run dev` para iniciar el servidor de desarrollo",
+        "",
+        "Las imágenes se guardan en `public/uploads`.",
+    ],
+}
+
+# Líneas con cada tipo de problema, por tipo de archivo
+NEWLINE_LINES = {
+    '.tsx': ["  console.log('Cargando productos:\\\\nInicio')",
+             "  const mensaje = `Linea uno\\\\nLinea dos`",
+             "  setError('No se pudo guardar\\\\nIntente nuevamente')"],
+    '.ts': ["  throw new Error('MONGODB_URI no definida\\\\nen .env.local')",
+            "  console.error('Error en la API:\\\\n', error)"],
+    '.json': ['  "description": "Cobertura total\\\\nAsistencia 24/7",'],
+    '.md': ["Pasos de instalación:\\n1. Clonar\\n2. Instalar"],
+}
+CLASSNAME_LINES = {
+    '.tsx': ["      <div className=\\\"flex items-center gap-2\\\">",
+             "      <img alt=\\\"producto\\\" src={product.image} />"],
+}
+OBJECTID_LINES = {
+    '.tsx': ["      {products.map(item => <ProductCard key={item._id} product={item} />)}",
+             "  router.push(`/admin/products/${product._id}/edit`)"],
+    '.ts': ["  const res = await fetch(`/api/products/${product._id}`)",
+            "  if (item._id === selected._id) return item"],
+}
+
+def build_file(kind: str, size: int, densities: Dict[str, float], rng: random.Random) -> str:
+    """Genera el contenido de un archivo de aproximadamente size bytes."""
+    injected = [(densities['newline'], NEWLINE_LINES.get(kind)),
+                (densities['classname'], CLASSNAME_LINES.get(kind)),
+                (densities['objectid'], OBJECTID_LINES.get(kind))]
+    lines = ['{'] if kind == '.json' else []
+    total = 0
+    while total < size:
+        line = None
+        for density, choices in injected:
+            if choices and rng.random() < density:
+                line = rng.choice(choices)
+                break
+        if line is None:
+            line = rng.choice(CLEAN_LINES[kind])
+        lines.append(line)
+        total += len(line.encode('utf-8')) + 1
+    if kind == '.json':
+        lines.append('  "version": 1')
+        lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+def generate_corpus(root: Path, files: int = 500, size_kb: float = 8,
+                    newline: float = 0.01, classname: float = 0.005,
+                    objectid: float = 0.005, seed: int = 0) -> Dict:
+    """Escribe el corpus en root y devuelve su descripción."""
+    rng = random.Random(seed)
+    root = Path(root)
+    densities = {'newline': newline, 'classname': classname, 'objectid': objectid}
+    kinds = list(KIND_WEIGHTS)
+    weights = [KIND_WEIGHTS[kind] for kind in kinds]
+    counts = dict.fromkeys(kinds, 0)
+    total_bytes = 0
+    paths: List[str] = []
+
+    for index in range(files):
+        kind = rng.choices(kinds, weights)[0]
+        # Tamaños variados alrededor de la media, como los componentes reales
+        size = int(size_kb * 1024 * rng.uniform(0.25, 1.75))
+        directory = root / rng.choice(DIRECTORIES[kind])
+        directory.mkdir(parents=True, exist_ok=True)
+        file_path = directory / f'Synthetic{index:05d}{kind}'
+        content = build_file(kind, size, densities, rng)
+        file_path.write_text(content, encoding='utf-8')
+        counts[kind] += 1
+        total_bytes += len(content.encode('utf-8'))
+        paths.append(file_path.relative_to(root).as_posix())
+
+    return {
+        'files': files,
+        'size_kb': size_kb,
+        'densities': densities,
+        'seed': seed,
+        'counts': counts,
+        'bytes': total_bytes,
+        'paths': paths,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un corpus sintético")
+    parser.add_argument('root', help="Directorio de destino")
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--size-kb', type=float, default=8, help="Tamaño medio por archivo")
+    parser.add_argument('--newline', type=float, default=0.01, help="Fracción de líneas con \\n literal")
+    parser.add_argument('--classname', type=float, default=0.005, help='Fracción de líneas con className=\\"...\\"')
+    parser.add_argument('--objectid', type=float, default=0.005, help="Fracción de líneas con key={x._id}")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    info = generate_corpus(Path(args.root), args.files, args.size_kb,
+                           args.newline, args.classname, args.objectid, args.seed)
+    print(json.dumps({key: value for key, value in info.items() if key != 'paths'}, indent=2))
+
+if __name__ == "__main__":
+    main()
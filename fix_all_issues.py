@@ -1,46 +1,41 @@
 #!/usr/bin/env python3
 """
 Script maestro para corregir TODOS los problemas de compilación del proyecto ayamas.
-Ejecuta todos los correctores en secuencia.
+Ejecuta todos los correctores en un único pipeline (ver fix_pipeline.py).
 """
 
+import argparse
 import os
 import subprocess
 import sys
 from pathlib import Path
+from typing import List
 
-def run_script(script_name: str, description: str) -> bool:
-    """Ejecuta un script de corrección."""
-    print(f"\n🔧 {description}")
+from fix_git import GitError, changed_paths
+from fix_pipeline import FixPipeline
+
+# Presupuesto de tiempo por archivo: un archivo patológico no detiene el resto
+FILE_TIMEOUT = 30
+
+def run_fixes(project_path: Path, paths: List[Path] = None) -> bool:
+    """Ejecuta todas las correcciones en un solo pipeline en proceso.
+
+    Con paths solo se corrigen esos archivos (ver --changed-since/--staged).
+    """
+    print(f"\n🔧 Corrigiendo escapes TSX, ObjectId y saltos de línea")
     print("=" * 60)
     
-    script_path = Path(f"/Users/rafaelramos/Desktop/ayamas/{script_name}")
-    
-    if not script_path.exists():
-        print(f"❌ Script no encontrado: {script_name}")
-        return False
-    
     try:
-        result = subprocess.run([
-            sys.executable, str(script_path)
-        ], cwd="/Users/rafaelramos/Desktop/ayamas", 
-           capture_output=True, text=True)
-        
-        print(result.stdout)
-        
-        if result.stderr:
-            print("⚠️  Stderr:")
-            print(result.stderr)
-        
-        if result.returncode == 0:
-            print(f"✅ {description} completado")
-            return True
-        else:
-            print(f"❌ {description} falló (código: {result.returncode})")
-            return False
-            
+        result = FixPipeline(str(project_path), use_cache=True, timeout=FILE_TIMEOUT).run(paths)
     except Exception as e:
-        print(f"❌ Error ejecutando {script_name}: {e}")
+        print(f"❌ Error ejecutando correcciones: {e}")
+        return False
+    
+    if result['success']:
+        print(f"✅ Correcciones completadas")
+        return True
+    else:
+        print(f"❌ Correcciones fallaron: {result.get('error', 'Error desconocido')}")
         return False
 
 def test_build() -> bool:
@@ -73,8 +68,41 @@ def test_build() -> bool:
         print(f"❌ Error ejecutando build: {e}")
         return False
 
+def parse_args() -> argparse.Namespace:
+    """Lee los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Corrector maestro del proyecto ayamas")
+    parser.add_argument('--changed-since', metavar='REF',
+                        help="Solo los archivos modificados respecto de REF (más los nuevos sin seguimiento)")
+    parser.add_argument('--staged', action='store_true',
+                        help="Solo los archivos del índice de git (para hooks de pre-commit)")
+    parser.add_argument('--check-index', action='store_true',
+                        help="Revisar el contenido del índice de git (lo que se va a commitear) en vez del "
+                             "árbol de trabajo; termina con código 1 si hay correcciones pendientes")
+    parser.add_argument('--write-index', action='store_true',
+                        help="Con --check-index, guardar los blobs corregidos en el índice")
+    return parser.parse_args()
+
+def check_index(project_path: Path, write_index: bool) -> bool:
+    """Revisa (y opcionalmente corrige) los blobs del índice; True si no quedan correcciones pendientes."""
+    print(f"\n🔧 Revisando el índice de git")
+    print("=" * 60)
+    
+    try:
+        result = FixPipeline(str(project_path)).check_staged(write_index)
+    except GitError as e:
+        print(f"❌ Error consultando git: {e}")
+        return False
+    
+    if result['needs_fix']:
+        print(f"❌ {result['needs_fix']} archivos del índice necesitan correcciones")
+        print("   Corregir el índice: python3 fix_all_issues.py --check-index --write-index")
+        return False
+    print("✅ El índice no necesita correcciones")
+    return True
+
 def main():
     """Función principal."""
+    args = parse_args()
     print("🎯 CORRECTOR MAESTRO - PROYECTO AYAMAS")
     print("=" * 60)
     print("Este script ejecutará todos los correctores automáticos")
@@ -87,28 +115,23 @@ def main():
         print(f"❌ Proyecto no encontrado: {project_path}")
         sys.exit(1)
     
-    # Lista de scripts a ejecutar en orden
-    scripts = [
-        ("fix_tsx_escapes.py", "Corrigiendo escapes en archivos TSX"),
-        ("fix_objectid_keys.py", "Corrigiendo ObjectId como React keys"),
-        ("fix_newlines_improved.py", "Corrigiendo saltos de línea"),
-    ]
-    
-    successful_scripts = 0
-    total_scripts = len(scripts)
+    # Con --check-index solo se revisa lo que se va a commitear: no hay build que probar
+    if args.check_index:
+        sys.exit(0 if check_index(project_path, args.write_index) else 1)
     
-    # Ejecutar scripts
-    for script_name, description in scripts:
-        if run_script(script_name, description):
-            successful_scripts += 1
-        else:
-            print(f"⚠️  {script_name} falló, pero continuando...")
+    # Con --changed-since/--staged los candidatos salen de git y no del recorrido del árbol
+    paths = None
+    if args.changed_since or args.staged:
+        try:
+            paths = changed_paths(project_path, args.changed_since, args.staged)
+        except GitError as e:
+            print(f"❌ Error consultando git: {e}")
+            sys.exit(1)
+        print(f"📝 Archivos del cambio según git: {len(paths)}")
     
-    print(f"\n📊 RESUMEN DE CORRECCIONES")
-    print("=" * 60)
-    print(f"Scripts ejecutados: {total_scripts}")
-    print(f"Scripts exitosos: {successful_scripts}")
-    print(f"Scripts fallidos: {total_scripts - successful_scripts}")
+    # Cada archivo se lee una vez y pasa por todas las etapas en orden
+    if not run_fixes(project_path, paths):
+        print("⚠️  Las correcciones fallaron, pero continuando...")
     
     # Probar build
     if test_build():
@@ -120,7 +143,7 @@ def main():
         print()
         print("🔄 Próximos pasos:")
         print("1. Revisar que todo funcione: npm run dev")
-        print("2. Eliminar backups: find . -name '*.backup' -delete")
+        print("2. Si algo salió mal, deshacer: python3 fix_backup.py restore --run latest")
         print("3. Hacer commit: git add . && git commit -m 'Fix compilation errors'")
     else:
         print(f"\n⚠️  CORRECCIONES APLICADAS PERO BUILD AÚN FALLA")
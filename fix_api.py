@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+API en memoria de los correctores del proyecto ayamas.
+Aplica las mismas etapas que fix_pipeline.py (escapes TSX, ObjectId y saltos de
+línea) a contenidos que ya están en memoria, sin leer ni escribir archivos, para
+usarla desde herramientas de build:
+
+    from fix_api import fix_texts
+
+    for name, text, changes in fix_texts([('src/app/page.tsx', source)]):
+        ...
+
+Las etapas se eligen por la ruta relativa (name), con las reglas de find_files.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Tuple
+
+from fix_pipeline import FixPipeline
+
+# Pipeline compartido por las llamadas de este proceso (reglas ya compiladas)
+_pipeline = None
+
+def _get_pipeline() -> FixPipeline:
+    global _pipeline
+    if _pipeline is None:
+        # La raíz solo se usa para backups y caché, que esta API no toca
+        _pipeline = FixPipeline('.')
+    return _pipeline
+
+def fix_text(name: str, text: str) -> Tuple[str, List[str]]:
+    """Corrige un contenido; devuelve el texto nuevo y los cambios como '[etapa] cambio'."""
+    fixed, stages = _get_pipeline().fix_text(name, text)
+    changes = [f'[{stage}] {change}' for stage, stage_changes in stages.items() for change in stage_changes]
+    return fixed, changes
+
+def _fix_item(item: Tuple[str, str]) -> Tuple[str, str, List[str]]:
+    name, text = item
+    return (name, *fix_text(name, text))
+
+def fix_texts(items: Iterable[Tuple[str, str]], jobs: int = 1,
+              batch_size: int = 64) -> Iterator[Tuple[str, str, List[str]]]:
+    """Corrige pares (nombre, texto) y produce (nombre, texto_nuevo, cambios) en el mismo orden.
+
+    Con jobs > 1 los contenidos se reparten en lotes de batch_size entre
+    procesos; se consume la entrada de a jobs lotes, así la memoria no crece
+    con la cantidad de contenidos.
+    """
+    if jobs <= 1:
+        for item in items:
+            yield _fix_item(item)
+        return
+
+    items = iter(items)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while True:
+            window = list(islice(items, jobs * batch_size))
+            if not window:
+                break
+            yield from pool.map(_fix_item, window, chunksize=batch_size)
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Almacén de backups de los scripts de corrección del proyecto ayamas.
+Guarda cada original una sola vez, direccionado por su hash y comprimido con zlib,
+con un manifiesto por ejecución que permite restaurar toda la ejecución de una vez.
+
+Uso:
+    python3 fix_backup.py list
+    python3 fix_backup.py show --run <id> <archivo>
+    python3 fix_backup.py restore --run <id|latest>
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List
+
+BACKUP_DIR = '.ayamas-backups'
+
+# Bytes por lectura al guardar un original
+SAVE_CHUNK_SIZE = 1024 * 1024
+
+class BackupStore:
+    """Backups direccionados por contenido, agrupados por ejecución."""
+
+    def __init__(self, project_root, tool: str, run_id: str = None):
+        self.project_root = Path(project_root)
+        self.root = self.project_root / BACKUP_DIR
+        self.tool = tool
+        self.run_id = run_id or f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.files: Dict[str, Dict] = {}
+
+    def object_path(self, digest: str) -> Path:
+        return self.root / 'objects' / digest[:2] / digest[2:]
+
+    def manifest_path(self, run_id: str) -> Path:
+        return self.root / 'runs' / f'{run_id}.json'
+
+    def save(self, file_path: Path) -> str:
+        """Guarda el contenido actual del archivo y devuelve la ruta del objeto.
+
+        Se lee y comprime por bloques, así que un archivo grande no se carga
+        entero en memoria.
+        """
+        objects = self.root / 'objects'
+        objects.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=objects)
+        try:
+            digest = hashlib.sha256()
+            compressor = zlib.compressobj()
+            with open(file_path, 'rb') as source, os.fdopen(fd, 'wb') as f:
+                for data in iter(lambda: source.read(SAVE_CHUNK_SIZE), b''):
+                    digest.update(data)
+                    f.write(compressor.compress(data))
+                f.write(compressor.flush())
+            digest = digest.hexdigest()
+            object_path = self.object_path(digest)
+
+            # Un original idéntico ya guardado (en esta u otra ejecución) no se repite
+            if object_path.exists():
+                os.unlink(tmp_path)
+            else:
+                object_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, object_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        self.add(os.path.relpath(file_path, self.project_root), digest,
+                 os.stat(file_path).st_mode & 0o777)
+        return os.path.relpath(object_path, self.project_root)
+
+    def add(self, rel_path: str, digest: str, mode: int):
+        """Registra un archivo en el manifiesto de la ejecución."""
+        self.files[rel_path] = {'object': digest, 'mode': mode}
+
+    def commit(self) -> Path:
+        """Escribe el manifiesto de la ejecución (si se guardó algún archivo)."""
+        if not self.files:
+            return None
+        manifest_path = self.manifest_path(self.run_id)
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(manifest_path, 'w') as f:
+            json.dump({
+                'run_id': self.run_id,
+                'tool': self.tool,
+                'timestamp': __import__('datetime').datetime.now().isoformat(),
+                'files': self.files
+            }, f, indent=2)
+        return manifest_path
+
+    def runs(self) -> List[Dict]:
+        """Manifiestos de todas las ejecuciones, de la más antigua a la más reciente."""
+        manifests = []
+        for manifest_path in sorted((self.root / 'runs').glob('*.json')):
+            with open(manifest_path) as f:
+                manifests.append(json.load(f))
+        return sorted(manifests, key=lambda manifest: manifest['timestamp'])
+
+    def load_run(self, run_id: str) -> Dict:
+        """Carga el manifiesto de una ejecución ('latest' = la más reciente)."""
+        if run_id == 'latest':
+            runs = self.runs()
+            if not runs:
+                raise FileNotFoundError('No hay ejecuciones con backups')
+            return runs[-1]
+        with open(self.manifest_path(run_id)) as f:
+            return json.load(f)
+
+    def read(self, digest: str) -> bytes:
+        """Devuelve el contenido original de un objeto."""
+        return zlib.decompress(self.object_path(digest).read_bytes())
+
+    def restore(self, run_id: str) -> List[str]:
+        """Restaura todos los archivos de una ejecución a su contenido original."""
+        manifest = self.load_run(run_id)
+        restored = []
+        for rel_path, entry in sorted(manifest['files'].items()):
+            file_path = self.project_root / rel_path
+            fd, tmp_path = tempfile.mkstemp(dir=file_path.parent)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self.read(entry['object']))
+            os.chmod(tmp_path, entry['mode'])
+            os.replace(tmp_path, file_path)
+            restored.append(rel_path)
+        return restored
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Backups de los scripts de corrección")
+    parser.add_argument('--root', default="/Users/rafaelramos/Desktop/ayamas",
+                        help="Directorio raíz del proyecto")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="Lista las ejecuciones con backups")
+    show = commands.add_parser('show', help="Imprime el original de un archivo")
+    show.add_argument('--run', required=True)
+    show.add_argument('file')
+    restore = commands.add_parser('restore', help="Restaura todos los archivos de una ejecución")
+    restore.add_argument('--run', required=True)
+    args = parser.parse_args()
+
+    store = BackupStore(args.root, 'fix_backup')
+
+    if args.command == 'list':
+        for manifest in store.runs():
+            print(f"{manifest['run_id']}  {manifest['tool']:<22} {len(manifest['files'])} archivos")
+
+    elif args.command == 'show':
+        entry = store.load_run(args.run)['files'].get(args.file)
+        if entry is None:
+            print(f"❌ {args.file} no está en la ejecución {args.run}", file=sys.stderr)
+            sys.exit(1)
+        sys.stdout.buffer.write(store.read(entry['object']))
+
+    elif args.command == 'restore':
+        restored = store.restore(args.run)
+        for rel_path in restored:
+            print(f"↩️  {rel_path}")
+        print(f"\n✅ {len(restored)} archivos restaurados")
+
+if __name__ == "__main__":
+    main()
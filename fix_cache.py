@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Caché incremental de escaneo para los scripts de corrección del proyecto ayamas.
+Recuerda qué archivos ya se sabe que están limpios, con la clave
+(ruta, tamaño, mtime_ns, hash de las reglas), para no volver a abrirlos.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Tuple
+
+CACHE_DIR = '.ayamas-cache'
+CACHE_FILE = 'scan.sqlite'
+
+# Cambiar este valor invalida todas las cachés existentes
+CACHE_VERSION = 1
+
+# Archivos modificados hace menos de esto no se guardan: su mtime podría no
+# cambiar si se vuelven a editar dentro del mismo intervalo de reloj
+RACY_WINDOW_NS = 2 * 1_000_000_000
+
+def ruleset_hash(*rules) -> str:
+    """Calcula un hash estable de las reglas activas (listas de patrones, etc.)."""
+    digest = hashlib.sha256(repr((CACHE_VERSION, rules)).encode('utf-8'))
+    return digest.hexdigest()
+
+class ScanCache:
+    """Registro en SQLite de archivos limpios para un corrector y un conjunto de reglas."""
+
+    def __init__(self, project_root, namespace: str, ruleset: str):
+        self.project_root = Path(project_root)
+        self.namespace = namespace
+        self.ruleset = ruleset
+        self.hits = 0
+        self._pending: Dict[str, Tuple[int, int]] = {}
+        self._stale = set()
+
+        cache_dir = self.project_root / CACHE_DIR
+        cache_dir.mkdir(exist_ok=True)
+        self._conn = sqlite3.connect(str(cache_dir / CACHE_FILE))
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS clean_files (
+                namespace TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                ruleset TEXT NOT NULL,
+                PRIMARY KEY (namespace, path)
+            )
+        """)
+
+        # Cargar de una vez las entradas válidas para las reglas actuales
+        rows = self._conn.execute(
+            "SELECT path, size, mtime_ns FROM clean_files WHERE namespace = ? AND ruleset = ?",
+            (namespace, ruleset))
+        self._clean = {path: (size, mtime_ns) for path, size, mtime_ns in rows}
+
+    def _key(self, file_path: Path) -> str:
+        return os.path.relpath(file_path, self.project_root)
+
+    def is_clean(self, file_path: Path, stat: os.stat_result) -> bool:
+        """Indica si el archivo está limpio según la caché, sin abrirlo."""
+        key = self._key(file_path)
+        if self._clean.get(key) == (stat.st_size, stat.st_mtime_ns):
+            self.hits += 1
+            return True
+        if key in self._clean:
+            self._stale.add(key)
+        return False
+
+    def mark_clean(self, file_path: Path, stat: os.stat_result):
+        """Registra el archivo como limpio con el stat tomado antes de leerlo."""
+        if time.time_ns() - stat.st_mtime_ns < RACY_WINDOW_NS:
+            return
+        self._pending[self._key(file_path)] = (stat.st_size, stat.st_mtime_ns)
+
+    def flush(self):
+        """Escribe los cambios pendientes en disco, sin cerrar la conexión.
+
+        Sirve a los procesos de larga duración (p. ej. fix_server.py), que
+        guardan la caché después de cada pedido y siguen consultándola.
+        """
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM clean_files WHERE namespace = ? AND ruleset != ?",
+                (self.namespace, self.ruleset))
+            self._conn.executemany(
+                "DELETE FROM clean_files WHERE namespace = ? AND path = ?",
+                [(self.namespace, key) for key in self._stale - set(self._pending)])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO clean_files VALUES (?, ?, ?, ?, ?)",
+                [(self.namespace, key, size, mtime_ns, self.ruleset)
+                 for key, (size, mtime_ns) in self._pending.items()])
+        for key in self._stale:
+            self._clean.pop(key, None)
+        self._clean.update(self._pending)
+        self._pending = {}
+        self._stale = set()
+
+    def save(self):
+        """Escribe los cambios pendientes en disco y cierra la conexión."""
+        self.flush()
+        self._conn.close()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Selección de archivos a partir de git para los scripts de corrección del proyecto ayamas.
+En un hook de pre-commit solo interesan los archivos del cambio: en vez de
+recorrer todo el árbol, la lista de candidatos sale del índice y del diff de git,
+así que el costo depende del tamaño del cambio y no del tamaño del repositorio.
+"""
+
+import os
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Iterator, List, Sequence, Tuple
+
+# Modos de archivo regular en el índice (se omiten enlaces simbólicos y submódulos)
+REGULAR_MODES = {'100644', '100755'}
+
+class GitError(Exception):
+    """git no está disponible, la raíz no es un repositorio o la referencia no existe."""
+
+def _git(project_root: Path, *args: str) -> List[str]:
+    """Ejecuta git en project_root y devuelve las rutas de la salida (separadas por NUL)."""
+    try:
+        completed = subprocess.run(['git', '-C', str(project_root), *args],
+                                   capture_output=True, check=True)
+    except FileNotFoundError:
+        raise GitError('git no está instalado')
+    except subprocess.CalledProcessError as e:
+        raise GitError(e.stderr.decode('utf-8', 'replace').strip() or f'git {args[0]} falló')
+    return [path for path in completed.stdout.decode('utf-8', 'surrogateescape').split('\0') if path]
+
+def changed_paths(project_root, since: str = None, staged: bool = False) -> List[Path]:
+    """Archivos agregados o modificados, relativos al proyecto y devueltos como rutas absolutas.
+
+    Con staged=True: los cambios del índice respecto de HEAD (lo que se va a
+    commitear). Con since: los cambios del árbol de trabajo respecto de esa
+    referencia, más los archivos nuevos aún sin seguimiento. Los archivos
+    borrados no se incluyen; --relative limita el diff a project_root aunque
+    esté dentro de un repositorio más grande.
+    """
+    project_root = Path(project_root)
+    # A = agregado, C = copiado, M = modificado, R = renombrado
+    diff = ['diff', '--name-only', '-z', '--relative', '--diff-filter=ACMR']
+    paths = set()
+    if staged:
+        paths.update(_git(project_root, *diff, '--cached'))
+    if since:
+        paths.update(_git(project_root, *diff, since, '--'))
+        paths.update(_git(project_root, 'ls-files', '-z', '--others', '--exclude-standard'))
+    return sorted(project_root / path for path in paths)
+
+def staged_blobs(project_root) -> List[Tuple[str, str, str]]:
+    """(ruta relativa, modo, blob) de los archivos agregados o modificados en el índice."""
+    fields = _git(Path(project_root), 'diff', '--cached', '--raw', '-z', '--relative', '--no-abbrev',
+                  '--no-renames', '--diff-filter=ACM')
+    blobs = []
+    # Con -z cada entrada es ':modo_ant modo blob_ant blob estado' seguido de la ruta
+    for header, path in zip(fields[::2], fields[1::2]):
+        _, mode, _, blob, _ = header.split(' ')
+        if mode in REGULAR_MODES:
+            blobs.append((path, mode, blob))
+    return blobs
+
+class CatFileBatch:
+    """Un único proceso 'git cat-file --batch' que atiende todas las lecturas de blobs."""
+
+    def __init__(self, project_root):
+        try:
+            self.process = subprocess.Popen(['git', '-C', str(project_root), 'cat-file', '--batch'],
+                                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        except FileNotFoundError:
+            raise GitError('git no está instalado')
+
+    def _request(self, objects: Sequence[str]):
+        try:
+            self.process.stdin.write(''.join(f'{name}\n' for name in objects).encode('ascii'))
+            self.process.stdin.flush()
+        except BrokenPipeError:
+            pass
+
+    def read_many(self, objects: Sequence[str]) -> Iterator[Tuple[str, bytes]]:
+        """Produce (objeto, contenido) en el orden pedido.
+
+        Los pedidos se escriben desde otro hilo mientras se leen las respuestas:
+        si se escribieran todos antes de leer, git podría bloquearse con la
+        tubería de salida llena y nunca terminar de leer la de entrada.
+        """
+        writer = threading.Thread(target=self._request, args=(objects,), daemon=True)
+        writer.start()
+        output = self.process.stdout
+        for name in objects:
+            header = output.readline().split()
+            if len(header) != 3:
+                raise GitError(f"cat-file: objeto no encontrado: {name}")
+            data = output.read(int(header[2]))
+            output.read(1)  # salto de línea que sigue a cada contenido
+            yield name, data
+        writer.join()
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.stdout.close()
+        self.process.wait()
+
+def write_blobs_to_index(project_root, entries: Sequence[Tuple[str, str, bytes]]) -> List[str]:
+    """Guarda los contenidos como blobs y actualiza el índice en bloque.
+
+    entries son (ruta relativa, modo, contenido). Usa un solo 'hash-object'
+    para todos los blobs y un solo 'update-index'; el árbol de trabajo no se
+    modifica. Devuelve los blobs nuevos, en el mismo orden.
+    """
+    project_root = Path(project_root)
+    if not entries:
+        return []
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for index, (_, _, data) in enumerate(entries):
+            path = os.path.join(tmp, str(index))
+            with open(path, 'wb') as f:
+                f.write(data)
+            paths.append(path)
+        try:
+            # --no-filters: el contenido ya es el del blob (sin conversiones de fin de línea, etc.)
+            completed = subprocess.run(['git', '-C', str(project_root), 'hash-object', '-w', '--no-filters',
+                                        '--stdin-paths'], input='\n'.join(paths).encode('utf-8') + b'\n',
+                                       capture_output=True, check=True)
+        except subprocess.CalledProcessError as e:
+            raise GitError(e.stderr.decode('utf-8', 'replace').strip() or 'git hash-object falló')
+    blobs = completed.stdout.decode('ascii').split()
+
+    index_info = b''.join(f'{mode} {blob}\t{path}'.encode('utf-8', 'surrogateescape') + b'\0'
+                          for (path, mode, _), blob in zip(entries, blobs))
+    try:
+        subprocess.run(['git', '-C', str(project_root), 'update-index', '-z', '--index-info'],
+                       input=index_info, capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise GitError(e.stderr.decode('utf-8', 'replace').strip() or 'git update-index falló')
+    return blobs
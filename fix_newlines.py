@@ -4,58 +4,114 @@ Script en Python para corregir problemas de saltos de línea en el proyecto ayam
 Corrige casos donde aparece \\n literal en lugar de saltos de línea reales.
 """
 
+import argparse
 import os
 import re
-import shutil
 import sys
 from pathlib import Path
 from typing import List, Tuple, Dict
 
-def should_skip_file(file_path: Path) -> bool:
-    """Determina si un archivo debe ser omitido."""
-    skip_dirs = {'.git', 'node_modules', '.next', '__pycache__', '.vscode'}
-    skip_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.ico', '.svg', '.woff', '.woff2', '.ttf', '.eot'}
-    skip_files = {'.DS_Store', 'package-lock.json', 'yarn.lock'}
+from fix_backup import BACKUP_DIR, BackupStore
+from fix_cache import CACHE_DIR, ScanCache, ruleset_hash
+from fix_prefilter import file_contains
+from fix_rules import LineIndex, compile_rules
+from fix_transaction import TransactionError, WriteTransaction
+from fix_walker import find_files
+
+# Reglas de omisión compartidas por should_skip_file y find_files_to_process
+SKIP_DIRS = {'.git', 'node_modules', '.next', '__pycache__', '.vscode', CACHE_DIR, BACKUP_DIR}
+SKIP_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.ico', '.svg', '.woff', '.woff2', '.ttf', '.eot'}
+SKIP_FILES = {'.DS_Store', 'package-lock.json', 'yarn.lock'}
+TARGET_EXTENSIONS = {'.js', '.ts', '.tsx', '.jsx', '.json', '.md', '.txt', '.env'}
+
+# Patrones de corrección según el tipo de archivo
+# Para archivos JavaScript/TypeScript
+JS_PATTERNS = [
+    # Strings con \\n literal que deberían ser saltos de línea
+    (r'([\'"`])([^\'"`]*?)\\\\n([^\'"`]*?)\1', r'\1\2\n\3\1', 'Fixed literal \\\\n in strings'),
     
-    # Verificar si está en directorio a omitir
-    for part in file_path.parts:
-        if part in skip_dirs:
-            return True
+    # console.log con \\n literal
+    (r'console\.(log|error|warn|info)\s*\(\s*[\'"`]([^\'"`]*?)\\\\n([^\'"`]*?)[\'"`]\s*\)', 
+     r'console.\1(`\2\n\3`)', 'Fixed console statements with literal \\\\n'),
+    
+    # Error strings con \\n literal
+    (r'(new\s+)?Error\s*\(\s*[\'"`]([^\'"`]*?)\\\\n([^\'"`]*?)[\'"`]\s*\)', 
+     r'\1Error(`\2\n\3`)', 'Fixed Error strings with literal \\\\n'),
     
+    # Template literals malformados
+    (r'`([^`]*?)\\\\n([^`]*?)`', r'`\1\n\2`', 'Fixed template literals'),
+]
+
+# Para archivos Markdown y texto (independientes entre sí: se aplican en una pasada)
+TEXT_PATTERNS = [
+    (r'\\n', '\n', 'Fixed literal \\\\n'),
+    (r'\\t', '\t', 'Fixed literal \\\\t'),
+    (r'\\r', '\r', 'Fixed literal \\\\r'),
+]
+
+# Para archivos JSON (más cuidadoso)
+JSON_PATTERNS = [
+    (r'"([^"]*?)\\\\n([^"]*?)"', r'"\1\n\2"', 'Fixed JSON strings with literal \\\\n'),
+]
+
+# Para otros archivos, corrección básica (también independientes entre sí)
+OTHER_PATTERNS = [
+    (r'\\n(?![\'"`])', '\n', 'Fixed literal \\\\n'),
+    (r'\\t(?![\'"`])', '\t', 'Fixed literal \\\\t'),
+]
+
+# Secuencias literales buscadas por detect_newline_problems
+DETECTION_LITERALS = [
+    ('literal_newline', '\\n'),
+    ('literal_tab', '\\t'),
+    ('literal_carriage_return', '\\r'),
+]
+
+# Bytes que necesita cualquiera de las detecciones anteriores
+PREFILTER_BYTES = (b'\\',)
+
+def should_skip_name(name: str) -> bool:
+    """Determina por el nombre si un archivo debe ser omitido."""
     # Verificar extensión
-    if file_path.suffix.lower() in skip_extensions:
+    if os.path.splitext(name)[1].lower() in SKIP_EXTENSIONS:
         return True
     
     # Verificar nombre de archivo
-    if file_path.name in skip_files:
+    if name in SKIP_FILES:
         return True
     
     # Omitir archivos de backup
-    if file_path.name.endswith('.backup'):
+    if name.endswith('.backup'):
         return True
         
     return False
 
+def should_skip_file(file_path: Path) -> bool:
+    """Determina si un archivo debe ser omitido."""
+    # Verificar si está en directorio a omitir
+    for part in file_path.parts:
+        if part in SKIP_DIRS:
+            return True
+    
+    return should_skip_name(file_path.name)
+
+def is_target_name(name: str) -> bool:
+    """Determina por el nombre si un archivo debe ser procesado."""
+    if should_skip_name(name):
+        return False
+    return os.path.splitext(name)[1] in TARGET_EXTENSIONS or name.startswith('.env')
+
 def detect_newline_problems(content: str) -> List[Tuple[str, int]]:
     """Detecta problemas de saltos de línea en el contenido."""
-    problems = []
-    
-    # Buscar \\n literal (no como escape real)
-    lines = content.split('\n')
-    for line_num, line in enumerate(lines, 1):
-        # Buscar \\n que no es un escape real
-        if '\\n' in line:
-            problems.append(('literal_newline', line_num))
-        
-        # Buscar \\t literal
-        if '\\t' in line:
-            problems.append(('literal_tab', line_num))
-            
-        # Buscar \\r literal
-        if '\\r' in line:
-            problems.append(('literal_carriage_return', line_num))
+    index = LineIndex(content)
+    found = []
     
-    return problems
+    # Buscar \\n, \\t y \\r que no son escapes reales, una pasada por literal
+    for order, (problem_type, literal) in enumerate(DETECTION_LITERALS):
+        for line_num in index.lines_with(literal):
+            found.append((line_num, order, problem_type))
+    
+    return [(problem_type, line_num) for line_num, _, problem_type in sorted(found)]
 
 def fix_newline_content(content: str, file_path: Path) -> Tuple[str, List[str]]:
     """Corrige problemas de saltos de línea en el contenido."""
@@ -64,50 +120,16 @@ def fix_newline_content(content: str, file_path: Path) -> Tuple[str, List[str]]:
     
     # Patrones para corregir según el tipo de archivo
     if file_path.suffix in ['.js', '.ts', '.tsx', '.jsx']:
-        # Para archivos JavaScript/TypeScript
-        patterns = [
-            # Strings con \\n literal que deberían ser saltos de línea
-            (r'([\'"`])([^\'"`]*?)\\\\n([^\'"`]*?)\1', r'\1\2\n\3\1', 'Fixed literal \\\\n in strings'),
-            
-            # console.log con \\n literal
-            (r'console\.(log|error|warn|info)\s*\(\s*[\'"`]([^\'"`]*?)\\\\n([^\'"`]*?)[\'"`]\s*\)', 
-             r'console.\1(`\2\n\3`)', 'Fixed console statements with literal \\\\n'),
-            
-            # Error strings con \\n literal
-            (r'(new\s+)?Error\s*\(\s*[\'"`]([^\'"`]*?)\\\\n([^\'"`]*?)[\'"`]\s*\)', 
-             r'\1Error(`\2\n\3`)', 'Fixed Error strings with literal \\\\n'),
-            
-            # Template literals malformados
-            (r'`([^`]*?)\\\\n([^`]*?)`', r'`\1\n\2`', 'Fixed template literals'),
-        ]
-    
+        rules = compile_rules(JS_PATTERNS, re.MULTILINE)
     elif file_path.suffix in ['.md', '.txt']:
-        # Para archivos Markdown y texto
-        patterns = [
-            (r'\\n', '\n', 'Fixed literal \\\\n'),
-            (r'\\t', '\t', 'Fixed literal \\\\t'),
-            (r'\\r', '\r', 'Fixed literal \\\\r'),
-        ]
-    
+        rules = compile_rules(TEXT_PATTERNS, re.MULTILINE, merge=True)
     elif file_path.suffix == '.json':
-        # Para archivos JSON (más cuidadoso)
-        patterns = [
-            (r'"([^"]*?)\\\\n([^"]*?)"', r'"\1\n\2"', 'Fixed JSON strings with literal \\\\n'),
-        ]
-    
+        rules = compile_rules(JSON_PATTERNS, re.MULTILINE)
     else:
-        # Para otros archivos, corrección básica
-        patterns = [
-            (r'\\n(?![\'"`])', '\n', 'Fixed literal \\\\n'),
-            (r'\\t(?![\'"`])', '\t', 'Fixed literal \\\\t'),
-        ]
-    
-    # Aplicar patrones
-    for pattern, replacement, description in patterns:
-        old_content = fixed_content
-        fixed_content = re.sub(pattern, replacement, fixed_content, flags=re.MULTILINE)
-        if fixed_content != old_content:
-            changes.append(description)
+        rules = compile_rules(OTHER_PATTERNS, re.MULTILINE, merge=True)
+    
+    # Aplicar patrones precompilados
+    fixed_content, changes = rules.apply(fixed_content)
     
     # Normalizar terminaciones de línea (CRLF -> LF)
     if '\r\n' in fixed_content:
@@ -116,13 +138,11 @@ def fix_newline_content(content: str, file_path: Path) -> Tuple[str, List[str]]:
     
     return fixed_content, changes
 
-def create_backup(file_path: Path) -> Path:
-    """Crea un archivo de backup."""
-    backup_path = file_path.with_name(file_path.name + '.backup')
-    shutil.copy2(file_path, backup_path)
-    return backup_path
+def create_backup(file_path: Path, backups: BackupStore) -> str:
+    """Guarda el original en el almacén de backups."""
+    return backups.save(file_path)
 
-def process_file(file_path: Path) -> Dict:
+def process_file(file_path: Path, backups: BackupStore, transaction: WriteTransaction) -> Dict:
     """Procesa un archivo individual."""
     result = {
         'file': str(file_path),
@@ -133,6 +153,10 @@ def process_file(file_path: Path) -> Dict:
     }
     
     try:
+        # Todos los problemas empiezan con una barra invertida: sin ella, no decodificar
+        if not file_contains(file_path, PREFILTER_BYTES):
+            return result
+        
         # Leer contenido original
         with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
             original_content = f.read()
@@ -143,17 +167,20 @@ def process_file(file_path: Path) -> Dict:
         if not problems:
             return result
         
-        # Crear backup
-        backup_path = create_backup(file_path)
-        result['backup_created'] = True
-        
         # Corregir contenido
         fixed_content, changes = fix_newline_content(original_content, file_path)
         
         # Escribir archivo corregido
         if fixed_content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(fixed_content)
+            # Crear backup; sin él no se escribe ningún archivo (ver WriteTransaction.commit)
+            try:
+                create_backup(file_path, backups)
+            except Exception as e:
+                transaction.fail(file_path, e)
+                raise
+            result['backup_created'] = True
+            
+            transaction.stage(file_path, fixed_content)
             
             result['processed'] = True
             result['changes'] = changes
@@ -161,10 +188,6 @@ def process_file(file_path: Path) -> Dict:
             print(f"✅ {file_path.name}")
             for change in changes:
                 print(f"   - {change}")
-        else:
-            # Eliminar backup si no hubo cambios
-            backup_path.unlink()
-            result['backup_created'] = False
             
     except Exception as e:
         result['errors'].append(str(e))
@@ -174,18 +197,18 @@ def process_file(file_path: Path) -> Dict:
 
 def find_files_to_process(project_root: Path) -> List[Path]:
     """Encuentra archivos que necesitan ser procesados."""
-    extensions = {'.js', '.ts', '.tsx', '.jsx', '.json', '.md', '.txt', '.env'}
-    files = []
-    
-    for file_path in project_root.rglob('*'):
-        if file_path.is_file() and not should_skip_file(file_path):
-            if file_path.suffix in extensions or file_path.name.startswith('.env'):
-                files.append(file_path)
-    
-    return sorted(files)
+    return find_files(project_root, SKIP_DIRS, is_target_name)
+
+def parse_args() -> argparse.Namespace:
+    """Lee los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Corrector de saltos de línea del proyecto ayamas")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="No usar la caché incremental de escaneo")
+    return parser.parse_args()
 
 def main():
     """Función principal."""
+    args = parse_args()
     print("🔧 CORRECTOR DE SALTOS DE LÍNEA - PROYECTO AYAMAS")
     print("=" * 55)
     print("Corrigiendo archivos con \\n literal...")
@@ -207,11 +230,35 @@ def main():
     print(f"📁 Archivos encontrados: {len(files_to_process)}")
     print()
     
-    # Procesar archivos
+    # Procesar archivos; los limpios según la caché no se abren
+    cache = None if args.no_cache else ScanCache(project_root, 'newlines', ruleset_hash(
+        JS_PATTERNS, TEXT_PATTERNS, JSON_PATTERNS, OTHER_PATTERNS, DETECTION_LITERALS))
+    backups = BackupStore(project_root, 'fix_newlines')
+    transaction = WriteTransaction()
     results = []
-    for file_path in files_to_process:
-        result = process_file(file_path)
-        results.append(result)
+    try:
+        for file_path in files_to_process:
+            stat = file_path.stat() if cache else None
+            if cache and cache.is_clean(file_path, stat):
+                continue
+            result = process_file(file_path, backups, transaction)
+            results.append(result)
+            if cache and not result['processed'] and not result['errors'] and not result['backup_created']:
+                cache.mark_clean(file_path, stat)
+        if cache:
+            cache.save()
+        
+        # Reemplazar todos los archivos corregidos a la vez, o ninguno
+        backups.commit()
+        transaction.commit()
+    except TransactionError as e:
+        print(f"❌ {e}")
+        print("↩️  Se deshicieron todas las escrituras; ningún archivo fue modificado")
+        sys.exit(1)
+    except BaseException:
+        # Una excepción o Ctrl+C no deja temporales en el árbol
+        transaction.abort()
+        raise
     
     # Resumen
     print("\n" + "=" * 55)
@@ -222,6 +269,8 @@ def main():
     error_files = [r for r in results if r['errors']]
     backup_files = [r for r in results if r['backup_created']]
     
+    if cache:
+        print(f"⚡ Archivos limpios según la caché: {cache.hits}")
     print(f"✅ Archivos corregidos: {len(processed_files)}")
     print(f"💾 Backups creados: {len(backup_files)}")
     print(f"❌ Errores: {len(error_files)}")
@@ -239,8 +288,8 @@ def main():
             print(f"• {Path(result['file']).name}: {'; '.join(result['errors'])}")
     
     print(f"\n📋 Comandos útiles:")
-    print("• Ver cambios: diff archivo.backup archivo")
-    print("• Eliminar backups: find . -name '*.backup' -delete")
+    print(f"• Ver cambios: diff <(python3 fix_backup.py show --run {backups.run_id} archivo) archivo")
+    print(f"• Deshacer correcciones: python3 fix_backup.py restore --run {backups.run_id}")
     print("• Probar app: npm run dev")
     
     print("\n🎯 ¡Corrección de saltos de línea completada!")
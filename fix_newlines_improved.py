@@ -4,22 +4,79 @@ Script mejorado para corregir problemas de saltos de línea en el proyecto ayama
 Versión más robusta que maneja múltiples tipos de problemas de escape.
 """
 
+import argparse
+import copy
+import cProfile
+import hashlib
 import os
 import re
-import shutil
 import sys
+import time
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import AnyStr, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple
 import json
 
+from fix_backup import BACKUP_DIR, BackupStore
+from fix_cache import CACHE_DIR, ScanCache, ruleset_hash
+from fix_git import GitError, changed_paths
+from fix_prefilter import file_contains
+from fix_report import ReportStream, iter_results
+from fix_rules import (LineIndex, LiteralIndex, Requirement, RuleSet, compile_bytes, compile_rules, decodes,
+                        is_possible, literal_index, merge_rule_skips, record_skip, required_literals, separable,
+                        skip_report)
+from fix_schedule import CostModel, in_input_order, plan_batches, predict_makespan
+from fix_shard import ShardError, in_shard, parse_shard
+from fix_stages import StagedPipeline, WorkItem
+from fix_stream import DEFAULT_CHUNK_SIZE, CRLFNormalizer, LineMatches, StreamingSub, detect_encoding, iter_text, line_heads
+from fix_timing import PhaseTimer, TimingSummary, merge_rule_timings, record_rule
+from fix_transaction import TransactionError, WriteTransaction
+from fix_watchdog import OK, TIMEOUT, run_with_budget
+from fix_walker import iter_entries
+
 class NewlineFixer:
-    def __init__(self, project_root: str = "/Users/rafaelramos/Desktop/ayamas"):
+    def __init__(self, project_root: str = "/Users/rafaelramos/Desktop/ayamas", use_cache: bool = False,
+                 instrument: bool = False, top_n: int = 10, timeout: float = None,
+                 stream_report: bool = False, shard: Tuple[int, int] = None,
+                 pipelined: bool = False, queue_depth: int = 64, stream_large: bool = False,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, batch_small: bool = False):
         self.project_root = Path(project_root)
+        self.use_cache = use_cache
+        # Con batch_small=True los archivos pequeños se detectan por lotes (ver process_batch)
+        self.batch_small = batch_small
+        # Con stream_large=True los archivos de más de max_file_size se procesan por bloques de chunk_size caracteres
+        self.stream_large = stream_large
+        self.chunk_size = chunk_size
+        # Con pipelined=True descubrir, leer, corregir y escribir corren a la vez (ver fix_stages.py)
+        self.pipelined = pipelined
+        self.queue_depth = queue_depth
+        self.pipeline: Dict = None
+        # (i, N): procesar solo el shard i de N (ver fix_shard.py)
+        self.shard = shard
+        # Con stream_report=True los resultados van a un reporte JSONL en vez de quedar en memoria
+        self.stream_report = stream_report
+        # Presupuesto de tiempo por archivo en segundos (None = sin límite)
+        self.timeout = timeout
+        # Con instrument=True se miden las fases de cada archivo y cada regla
+        self.instrument = instrument
+        self.top_n = top_n
+        self.rule_timings: Dict[str, Dict] = {}
+        # Por regla y detección: contenidos vistos y omitidos por el prefiltro de literales
+        self.rule_skips: Dict[str, Dict] = {}
+        self.run_timings: Dict[str, float] = {}
+        # Segundos de CPU por archivo de esta ejecución, para el modelo de costos (ver fix_schedule.py)
+        self.file_seconds: Dict[str, float] = {}
+        self.schedule: Dict = None
+        self.backups = BackupStore(self.project_root, 'fix_newlines_improved')
+        self.transaction = WriteTransaction()
         self.stats = {
             'files_processed': 0,
             'files_fixed': 0,
             'backups_created': 0,
             'errors': 0,
+            'timeouts': 0,
             'total_fixes': 0
         }
         
@@ -53,204 +110,753 @@ class NewlineFixer:
             # \r literal básico
             (r'(?<![\\\'])\\r(?![\'\"])', '\r', 'Fixed basic literal \\\\r'),
         ]
-
-    def should_skip_file(self, file_path: Path) -> bool:
-        """Determina si un archivo debe ser omitido."""
-        skip_dirs = {'.git', 'node_modules', '.next', '__pycache__', '.vscode', 'dist', 'build'}
-        skip_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.ico', '.svg', '.woff', '.woff2', '.ttf', '.eot', '.bin', '.exe'}
-        skip_files = {'.DS_Store', 'package-lock.json', 'yarn.lock'}
         
-        # Verificar si está en directorio a omitir
-        for part in file_path.parts:
-            if part in skip_dirs:
-                return True
+        # Para JSON, ser más conservador
+        self.json_patterns = [
+            (r'"([^"]*?)\\\\n([^"]*?)"', r'"\1\n\2"', 'Fixed JSON strings with literal \\\\n'),
+        ]
         
+        # Patrones de detección (además de la búsqueda de \n literal); se
+        # aplican sobre todo el contenido, así que no deben cruzar saltos de línea
+        self.detection_patterns = [
+            # console.log rotos
+            ('broken_console', r'console\.(log|error|warn|info)\([^)\n]*\\n[^)\n]*\)'),
+            
+            # Strings rotos que probablemente deberían tener saltos
+            ('string_with_literal_newline', r'[\'\"``][^\'\"``\n]*\\n[^\'\"``\n]*[\'\"``]'),
+        ]
+
+    # Reglas de omisión compartidas por should_skip_file y find_files
+    skip_dirs = {'.git', 'node_modules', '.next', '__pycache__', '.vscode', 'dist', 'build', CACHE_DIR, BACKUP_DIR}
+    skip_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.ico', '.svg', '.woff', '.woff2', '.ttf', '.eot', '.bin', '.exe'}
+    skip_files = {'.DS_Store', 'package-lock.json', 'yarn.lock'}
+    target_extensions = {'.js', '.ts', '.tsx', '.jsx', '.json', '.md', '.txt'}
+    max_file_size = 10 * 1024 * 1024  # 10MB
+    # Codificaciones que se prueban al leer, en orden (compatibles con ASCII);
+    # latin-1 acepta cualquier byte, así que va última
+    encodings = ('utf-8', 'cp1252', 'latin-1')
+    # Hilos de las etapas de lectura y de escritura en la ejecución en etapas
+    io_threads = 4
+    # Con batch_small: tamaño máximo de un archivo que va en un lote y bytes por lote
+    batch_file_size = 64 * 1024
+    batch_bytes = 1024 * 1024
+    
+    # Bytes que toda detección necesita: cada problema incluye un \n literal
+    prefilter_bytes = (b'\\',)
+
+    def should_skip_name(self, name: str) -> bool:
+        """Determina por el nombre si un archivo debe ser omitido."""
         # Verificar extensión
-        if file_path.suffix.lower() in skip_extensions:
+        if os.path.splitext(name)[1].lower() in self.skip_extensions:
             return True
         
         # Verificar nombre de archivo
-        if file_path.name in skip_files:
+        if name in self.skip_files:
             return True
         
         # Omitir archivos de backup
-        if file_path.name.endswith('.backup') or file_path.name.endswith('.bak'):
+        if name.endswith('.backup') or name.endswith('.bak'):
+            return True
+        
+        return False
+
+    def is_target_name(self, name: str) -> bool:
+        """Determina por el nombre si un archivo debe ser procesado."""
+        if self.should_skip_name(name):
+            return False
+        return os.path.splitext(name)[1] in self.target_extensions or name.startswith('.env')
+
+    def should_skip_file(self, file_path: Path) -> bool:
+        """Determina si un archivo debe ser omitido."""
+        # Verificar si está en directorio a omitir
+        for part in file_path.parts:
+            if part in self.skip_dirs:
+                return True
+        
+        if self.should_skip_name(file_path.name):
             return True
             
         # Omitir archivos binarios comunes
-        if file_path.stat().st_size > 10 * 1024 * 1024:  # > 10MB
+        if self.too_large(file_path.stat().st_size):
             return True
             
         return False
 
-    def detect_problems(self, content: str, file_path: Path) -> List[Dict]:
-        """Detecta problemas específicos en el contenido."""
+    def too_large(self, size: int) -> bool:
+        """Indica si un archivo de ese tamaño se omite (sin stream_large, los de más de max_file_size)."""
+        return size > self.max_file_size and not self.stream_large
+
+    def detect_problems(self, content: AnyStr, file_path: Path, encoding: str = None,
+                        present: FrozenSet[str] = None) -> List[Dict]:
+        """Detecta problemas específicos en el contenido.
+
+        Cada búsqueda recorre el contenido completo una vez; los números de
+        línea se obtienen después a partir de las posiciones de las coincidencias.
+        Si el contenido son bytes (ver read_content) las búsquedas usan los
+        patrones traducidos y solo se decodifican las líneas con problemas.
+        Las búsquedas cuyos literales requeridos no están en present (ver
+        literal_index) no se hacen.
+        """
+        binary = isinstance(content, bytes)
+        index = LineIndex(content)
+        found = []
+        timings = self.rule_timings if self.instrument else None
+        if present is None:
+            present = self.literal_index(file_path).scan(content, encoding)
+        required = dict(self.detection_requirements())
+        
+        # Buscar \n literal (escapado incorrectamente)
+        runs = is_possible(required['literal_newline'], present)
+        record_skip(self.rule_skips, 'detect: literal_newline', not runs)
+        if runs:
+            start = time.perf_counter() if timings is not None else 0.0
+            escaped = set(index.lines_with(b'\\\\n' if binary else '\\\\n'))
+            for line_num in index.lines_with(b'\\n' if binary else '\\n'):
+                if line_num not in escaped:
+                    found.append((line_num, 0, 'literal_newline'))
+            if timings is not None:
+                record_rule(timings, 'detect: literal_newline', time.perf_counter() - start, len(found))
+        
+        # Buscar console.log rotos y strings con \n literal
+        for order, (problem_type, pattern) in enumerate(self.detection_patterns, 1):
+            runs = is_possible(required[problem_type], present)
+            record_skip(self.rule_skips, f'detect: {problem_type}', not runs)
+            if not runs:
+                continue
+            start = time.perf_counter() if timings is not None else 0.0
+            lines = index.lines_matching(compile_bytes(pattern, 0, encoding) if binary else re.compile(pattern))
+            for line_num in lines:
+                found.append((line_num, order, problem_type))
+            if timings is not None:
+                record_rule(timings, f'detect: {problem_type}', time.perf_counter() - start, len(lines))
+        
+        return self.problem_list(found, index, encoding)
+
+    def problem_list(self, found: List[Tuple[int, int, str]], index: LineIndex, encoding: str = None,
+                     first_line: int = 1) -> List[Dict]:
+        """Problemas a partir de (línea, orden de búsqueda, tipo), ordenados como en detect_problems.
+
+        El texto de cada línea sale de index, donde la línea 1 del archivo es first_line.
+        """
         problems = []
-        lines = content.split('\n')
-        
-        for line_num, line in enumerate(lines, 1):
-            # Buscar \n literal (escapado incorrectamente)
-            if '\\n' in line and not '\\\\n' in line:
-                problems.append({
-                    'type': 'literal_newline',
-                    'line': line_num,
-                    'content': line[:100] + '...' if len(line) > 100 else line
-                })
-            
-            # Buscar console.log rotos
-            if re.search(r'console\.(log|error|warn|info)\([^)]*\\n[^)]*\)', line):
-                problems.append({
-                    'type': 'broken_console',
-                    'line': line_num,
-                    'content': line[:100] + '...' if len(line) > 100 else line
-                })
-                
-            # Buscar strings rotos que probablemente deberían tener saltos
-            if re.search(r'[\'\"``][^\'\"``]*\\n[^\'\"``]*[\'\"``]', line):
-                problems.append({
-                    'type': 'string_with_literal_newline',
-                    'line': line_num,
-                    'content': line[:100] + '...' if len(line) > 100 else line
-                })
+        for line_num, _, problem_type in sorted(found):
+            line = index.line(line_num + first_line - 1)
+            if isinstance(line, bytes):
+                line = line.decode(encoding)
+            problems.append({
+                'type': problem_type,
+                'line': line_num,
+                'content': line[:100] + '...' if len(line) > 100 else line
+            })
         
         return problems
 
-    def fix_content(self, content: str, file_path: Path) -> Tuple[str, List[str]]:
-        """Aplica correcciones al contenido según el tipo de archivo."""
-        fixed_content = content
-        changes = []
+    def detect_problems_batch(self, items: Sequence[Tuple[Path, AnyStr]], encoding: str = None) -> List[List[Dict]]:
+        """detect_problems de muchos contenidos del mismo tipo, con cada búsqueda hecha una sola vez.
+
+        Los contenidos se unen con saltos de línea en un solo texto: como las
+        búsquedas no cruzan saltos de línea, las líneas de cada archivo son
+        líneas del texto unido, y la tabla ordenada de las posiciones donde
+        empieza cada archivo lleva cada línea a su archivo. Los archivos que
+        toca una coincidencia que sí cruza la unión, o todos si algún patrón
+        depende de los bordes del texto (ver fix_rules.separable), se detectan
+        por separado: el resultado es siempre el de detect_problems.
+        """
+        if not all(separable(pattern) for _, pattern in self.detection_patterns):
+            return [self.detect_problems(content, file_path, encoding) for file_path, content in items]
+        
+        contents = [content for _, content in items]
+        binary = isinstance(contents[0], bytes) if contents else False
+        index = LineIndex((b'\n' if binary else '\n').join(contents))
+        offsets = []
+        position = 0
+        for content in contents:
+            offsets.append(position)
+            position += len(content) + 1
+        
+        def owner(line_num: int) -> int:
+            return bisect_right(offsets, index.starts[line_num - 1]) - 1
+        
+        found = [[] for _ in contents]
+        separate = set()
+        timings = self.rule_timings if self.instrument else None
+        requirements = self.detection_requirements()
+        # Literales de cada archivo (para las omisiones, que se cuentan por archivo) y de todo el texto
+        segments = [(offset, offset + len(content)) for offset, content in zip(offsets, contents)]
+        presence = literal_index(tuple(required for _, required in requirements)).scan_segments(
+            index.content, segments, encoding)
+        present = frozenset().union(*presence)
+        searched = {problem_type: is_possible(required, present) for problem_type, required in requirements}
         
-        # Determinar qué patrones aplicar según la extensión
+        # Buscar \n literal (los literales no incluyen saltos de línea: nunca cruzan la unión)
+        if searched['literal_newline']:
+            start = time.perf_counter() if timings is not None else 0.0
+            escaped = set(index.lines_with(b'\\\\n' if binary else '\\\\n'))
+            lines = [line_num for line_num in index.lines_with(b'\\n' if binary else '\\n') if line_num not in escaped]
+            for line_num in lines:
+                found[owner(line_num)].append((line_num, 0, 'literal_newline'))
+            if timings is not None:
+                record_rule(timings, 'detect: literal_newline', time.perf_counter() - start, len(lines))
+        
+        for order, (problem_type, pattern) in enumerate(self.detection_patterns, 1):
+            if not searched[problem_type]:
+                continue
+            start = time.perf_counter() if timings is not None else 0.0
+            lines = 0
+            for match in index.first_matches(compile_bytes(pattern, 0, encoding) if binary else re.compile(pattern)):
+                line_num = index.line_number(match.start())
+                found[owner(line_num)].append((line_num, order, problem_type))
+                end_line = index.line_number(match.end())
+                if end_line != line_num:
+                    separate.update(range(owner(line_num), owner(end_line) + 1))
+                lines += 1
+            if timings is not None:
+                record_rule(timings, f'detect: {problem_type}', time.perf_counter() - start, lines)
+        
+        problems = []
+        for position, (file_path, content) in enumerate(items):
+            if position in separate:
+                problems.append(self.detect_problems(content, file_path, encoding))
+                continue
+            for problem_type, required in requirements:
+                record_skip(self.rule_skips, f'detect: {problem_type}', not is_possible(required, presence[position]))
+            # Números de línea del texto unido a números de línea del archivo
+            first_line = index.line_number(offsets[position])
+            local = [(line_num - first_line + 1, order, problem_type)
+                     for line_num, order, problem_type in found[position]]
+            problems.append(self.problem_list(local, index, encoding, first_line))
+        return problems
+
+    def general_rules(self) -> RuleSet:
+        """Reglas generales compiladas.
+
+        Se despachan en una sola pasada: cada una reemplaza una barra invertida
+        seguida de una letra distinta por un carácter de control, así que no se
+        solapan ni pueden crear o romper coincidencias de las demás.
+        """
+        return compile_rules(self.general_patterns, re.MULTILINE, merge=True)
+
+    def rule_sets_for(self, file_path: Path) -> List[RuleSet]:
+        """Conjuntos de reglas que se aplican, en orden, según la extensión."""
         if file_path.suffix in ['.js', '.ts', '.tsx', '.jsx']:
-            patterns = self.js_patterns + self.general_patterns
-        elif file_path.suffix in ['.json']:
-            # Para JSON, ser más conservador
-            patterns = [
-                (r'"([^"]*?)\\\\n([^"]*?)"', r'"\1\n\2"', 'Fixed JSON strings with literal \\\\n'),
-            ]
-        elif file_path.suffix in ['.md', '.txt']:
-            patterns = self.general_patterns
-        else:
-            patterns = self.general_patterns
+            return [compile_rules(self.js_patterns, re.MULTILINE), self.general_rules()]
+        if file_path.suffix in ['.json']:
+            return [compile_rules(self.json_patterns, re.MULTILINE)]
+        return [self.general_rules()]
+
+    def detection_requirements(self) -> List[Tuple[str, Requirement]]:
+        """Literales requeridos por cada búsqueda de detect_problems (ver fix_rules.required_literals)."""
+        return [('literal_newline', (frozenset(['\\n']),))] + [
+            (problem_type, required_literals(pattern)) for problem_type, pattern in self.detection_patterns]
+
+    def literal_index(self, file_path: Path) -> LiteralIndex:
+        """Literales de las reglas y de la detección de ese archivo, para buscarlos todos en una pasada."""
+        requirements = [required for rule_set in self.rule_sets_for(file_path) for required in rule_set.required]
+        requirements.extend(required for _, required in self.detection_requirements())
+        return literal_index(tuple(requirements))
+
+    def fix_content(self, content: AnyStr, file_path: Path, encoding: str = None,
+                    present: FrozenSet[str] = None) -> Tuple[AnyStr, List[str]]:
+        """Aplica correcciones al contenido según el tipo de archivo.
+
+        Si el contenido son bytes en encoding, las reglas se aplican como patrones bytes.
+        present son los literales del contenido, si ya se buscaron con literal_index.
+        """
+        fixed_content = content
+        changes = []
+        rule_sets = self.rule_sets_for(file_path)
+        if isinstance(content, bytes):
+            rule_sets = [rule_set.for_encoding(encoding) for rule_set in rule_sets]
+        literals = self.literal_index(file_path)
+        if present is None:
+            present = literals.scan(content, encoding)
         
-        # Aplicar cada patrón
-        for pattern, replacement, description in patterns:
-            old_content = fixed_content
-            try:
-                fixed_content = re.sub(pattern, replacement, fixed_content, flags=re.MULTILINE)
-                if fixed_content != old_content:
-                    changes.append(description)
-                    self.stats['total_fixes'] += 1
-            except re.error as e:
-                print(f"⚠️  Error aplicando patrón {pattern}: {e}")
+        # Aplicar cada conjunto de reglas precompiladas
+        timings = self.rule_timings if self.instrument else None
+        for rule_set in rule_sets:
+            fixed_content, rule_changes = rule_set.apply(fixed_content, timings, present, self.rule_skips)
+            if rule_changes:
+                # Los reemplazos pueden formar literales que piden los conjuntos siguientes
+                present = literals.scan(fixed_content, encoding, present)
+            changes.extend(rule_changes)
+            self.stats['total_fixes'] += len(rule_changes)
         
         # Normalizar terminaciones de línea
-        if '\r\n' in fixed_content:
-            fixed_content = fixed_content.replace('\r\n', '\n')
+        crlf = b'\r\n' if isinstance(content, bytes) else '\r\n'
+        if crlf in fixed_content:
+            fixed_content = fixed_content.replace(crlf, crlf[1:])
             changes.append('Normalized CRLF to LF')
         
         return fixed_content, changes
 
-    def create_backup(self, file_path: Path) -> Path:
-        """Crea un archivo de backup con timestamp."""
-        import time
-        timestamp = int(time.time())
-        backup_path = file_path.with_name(f"{file_path.name}.backup")
-        
-        # Si ya existe un backup, usar timestamp
-        if backup_path.exists():
-            backup_path = file_path.with_name(f"{file_path.name}.{timestamp}.backup")
-        
-        shutil.copy2(file_path, backup_path)
+    def create_backup(self, file_path: Path) -> str:
+        """Guarda el original en el almacén de backups y devuelve la ruta del objeto."""
+        try:
+            backup_path = self.backups.save(file_path)
+        except Exception as e:
+            # Sin backup no se escribe ningún archivo de esta ejecución (ver WriteTransaction.commit)
+            self.transaction.fail(file_path, e)
+            raise
         self.stats['backups_created'] += 1
         return backup_path
 
-    def process_file(self, file_path: Path) -> Dict:
-        """Procesa un archivo individual."""
-        result = {
+    def new_result(self, file_path: Path, status: str = 'skipped') -> Dict:
+        """Crea el registro de resultado de un archivo."""
+        return {
             'file': str(file_path.relative_to(self.project_root)),
-            'status': 'skipped',
+            'status': status,
             'changes': [],
             'errors': [],
             'backup_path': None,
             'problems_detected': []
         }
+
+    def ruleset_hash(self) -> str:
+        """Hash de las reglas activas; al cambiar cualquiera se invalida la caché."""
+        return ruleset_hash(self.js_patterns, self.general_patterns,
+                            self.json_patterns, self.detection_patterns)
+
+    def read_text(self, file_path: Path) -> Optional[str]:
+        """Lee el archivo probando diferentes codificaciones; None si ninguna sirve."""
+        for encoding in self.encodings:
+            try:
+                with open(file_path, 'r', encoding=encoding) as f:
+                    return f.read()
+            except UnicodeDecodeError:
+                continue
+        return None
+
+    def has_byte_rules(self, file_path: Path, encoding: str) -> bool:
+        """Indica si las reglas y la detección de ese archivo se traducen a bytes en la codificación."""
+        try:
+            for rule_set in self.rule_sets_for(file_path):
+                rule_set.for_encoding(encoding)
+            for _, pattern in self.detection_patterns:
+                compile_bytes(pattern, 0, encoding)
+        except ValueError:
+            return False
+        return True
+
+    def read_content(self, file_path: Path) -> Tuple[Optional[AnyStr], Optional[str]]:
+        """Lee el archivo para detectar y corregir: (contenido, codificación), o (None, None).
+
+        La codificación es la primera de encodings en la que el archivo es
+        válido. Si las reglas se traducen a bytes para ella (ver
+        fix_rules.byte_pattern) el contenido queda en bytes, sin decodificar;
+        si no, se decodifica. El resultado se escribe de vuelta en esa misma
+        codificación, y en ambos casos los fines de línea se traducen a \\n
+        como al leer en modo texto.
+        """
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        if b'\r' in raw:
+            raw = raw.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        
+        # Un archivo solo ASCII es válido en cualquiera de ellas
+        ascii_only = raw.isascii()
+        for encoding in self.encodings:
+            engine = 'ascii' if ascii_only else encoding
+            if self.has_byte_rules(file_path, engine) and (ascii_only or decodes(raw, engine)):
+                return raw, engine
+            try:
+                return raw.decode(encoding), encoding
+            except UnicodeDecodeError:
+                continue
+        return None, None
+
+    def process_file(self, file_path: Path) -> Dict:
+        """Procesa un archivo individual."""
+        if self.stream_large and file_path.stat().st_size > self.max_file_size:
+            return self.process_large_file(file_path)
+        result = self.new_result(file_path)
+        timer = PhaseTimer() if self.instrument else None
+        
+        try:
+            content, encoding = self.load_file(file_path, result, timer)
+            if content is not None:
+                # Detectar problemas, buscando antes los literales de todas las reglas en una pasada
+                present = self.literal_index(file_path).scan(content, encoding)
+                problems = self.detect_problems(content, file_path, encoding, present)
+                if timer:
+                    timer.lap('detect')
+                self.fix_detected(file_path, result, content, encoding, problems, present, timer)
+        
+        except Exception as e:
+            self.fail_result(file_path, result, e)
+        
+        finally:
+            if timer:
+                result['timings'] = timer.as_dict()
+        
+        return result
+
+    def load_file(self, file_path: Path, result: Dict,
+                  timer: Optional[PhaseTimer]) -> Tuple[Optional[AnyStr], Optional[str]]:
+        """Inicio de process_file: prefiltro y lectura (ver read_content).
+
+        Devuelve (None, None) si no hay nada que detectar o no se pudo
+        decodificar, y entonces el resultado ya queda completo.
+        """
+        self.stats['files_processed'] += 1
+        
+        # Sin ninguna barra invertida no hay nada que detectar: no decodificar
+        found = file_contains(file_path, self.prefilter_bytes)
+        if timer:
+            timer.lap('prefilter')
+        if not found:
+            result['status'] = 'no_problems'
+            return None, None
+        
+        content, encoding = self.read_content(file_path)
+        if timer:
+            timer.lap('decode')
+        
+        if content is None:
+            result['errors'].append('Could not decode file with any encoding')
+            self.stats['errors'] += 1
+        return content, encoding
+
+    def fix_detected(self, file_path: Path, result: Dict, content: AnyStr, encoding: str, problems: List[Dict],
+                     present: Optional[FrozenSet[str]], timer: Optional[PhaseTimer]):
+        """Final de process_file: corrige el contenido si tiene problemas y prepara la escritura."""
+        result['problems_detected'] = problems
+        if not problems:
+            result['status'] = 'no_problems'
+            return
+        
+        # Aplicar correcciones
+        fixed_content, changes = self.fix_content(content, file_path, encoding, present)
+        if timer:
+            timer.lap('fix')
+        
+        if fixed_content != content:
+            # Crear backup antes de modificar
+            result['backup_path'] = self.create_backup(file_path)
+            
+            # Preparar la escritura en la codificación original; se confirma al final de la ejecución
+            self.transaction.stage(file_path, fixed_content, encoding)
+            if timer:
+                timer.lap('write')
+            
+            result['status'] = 'fixed'
+            result['changes'] = changes
+            self.stats['files_fixed'] += 1
+            
+            print(f"✅ {file_path.name}")
+            for change in changes:
+                print(f"   - {change}")
+        else:
+            result['status'] = 'no_changes_needed'
+
+    def fail_result(self, file_path: Path, result: Dict, error: Exception):
+        """Marca el resultado de un archivo que falló con una excepción."""
+        result['errors'].append(str(error))
+        result['status'] = 'error'
+        self.stats['errors'] += 1
+        print(f"❌ Error procesando {file_path.name}: {error}")
+
+    def small_batches(self, files: List[Path]) -> List[List[int]]:
+        """Agrupa los índices de archivos consecutivos en lotes de hasta batch_bytes.
+
+        Un archivo de más de batch_file_size forma un lote propio.
+        """
+        batches = []
+        current, current_size = [], 0
+        for index, file_path in enumerate(files):
+            try:
+                size = file_path.stat().st_size
+            except OSError:
+                # El error se informa al procesarlo
+                size = 0
+            if size > self.batch_file_size:
+                if current:
+                    batches.append(current)
+                    current, current_size = [], 0
+                batches.append([index])
+                continue
+            current.append(index)
+            current_size += size
+            if current_size >= self.batch_bytes:
+                batches.append(current)
+                current, current_size = [], 0
+        if current:
+            batches.append(current)
+        return batches
+
+    def process_batch(self, files: List[Path]) -> List[Dict]:
+        """process_file para un lote de small_batches, con la detección en una sola pasada.
+
+        Cada archivo se lee como en process_file; los contenidos se detectan
+        juntos con detect_problems_batch (un texto por codificación) y después
+        cada archivo se corrige por separado. Devuelve los mismos resultados
+        que process_file, en el mismo orden, y registra en file_seconds el
+        tiempo de CPU de cada archivo, con su parte de la detección según su tamaño.
+        """
+        if len(files) == 1:
+            start = time.process_time()
+            result = self.process_file(files[0])
+            self.file_seconds[result['file']] = time.process_time() - start
+            return [result]
+        
+        results = [self.new_result(file_path) for file_path in files]
+        timers = [PhaseTimer() if self.instrument else None for _ in files]
+        seconds = [0.0] * len(files)
+        loaded = {}
+        for position, file_path in enumerate(files):
+            start = time.process_time()
+            if timers[position]:
+                # Los cronómetros se crearon juntos: cada uno mide desde que empieza su archivo
+                timers[position].resume()
+            try:
+                content, encoding = self.load_file(file_path, results[position], timers[position])
+            except Exception as e:
+                self.fail_result(file_path, results[position], e)
+                content = None
+            if content is not None:
+                loaded[position] = (content, encoding)
+            seconds[position] += time.process_time() - start
+        
+        # Un texto unido por codificación: los contenidos en bytes se buscan con patrones de su codificación
+        groups = {}
+        for position, (content, encoding) in loaded.items():
+            groups.setdefault(encoding if isinstance(content, bytes) else None, []).append(position)
+        problems = {}
+        for encoding, positions in groups.items():
+            wall, cpu = time.perf_counter(), time.process_time()
+            try:
+                found = self.detect_problems_batch([(files[position], loaded[position][0])
+                                                    for position in positions], encoding)
+            except Exception:
+                # Cada archivo se detecta por separado, y el que falla se informa como en process_file
+                continue
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            total = sum(len(loaded[position][0]) for position in positions) or 1
+            for position, file_problems in zip(positions, found):
+                problems[position] = file_problems
+                share = len(loaded[position][0]) / total
+                seconds[position] += cpu * share
+                if timers[position]:
+                    timers[position].add('detect', wall * share)
+        
+        for position, (content, encoding) in loaded.items():
+            file_path, timer = files[position], timers[position]
+            start = time.process_time()
+            if timer:
+                timer.resume()
+            try:
+                if position not in problems:
+                    problems[position] = self.detect_problems(content, file_path, encoding)
+                    if timer:
+                        timer.lap('detect')
+                self.fix_detected(file_path, results[position], content, encoding, problems[position], None, timer)
+            except Exception as e:
+                self.fail_result(file_path, results[position], e)
+            seconds[position] += time.process_time() - start
+        
+        for result, timer, file_seconds in zip(results, timers, seconds):
+            if timer:
+                result['timings'] = timer.as_dict()
+            self.file_seconds[result['file']] = file_seconds
+        return results
+
+    def process_large_file(self, file_path: Path) -> Dict:
+        """Procesa un archivo de más de max_file_size por bloques de chunk_size caracteres.
+
+        Da el mismo resultado que process_file (problemas, cambios y contenido
+        escrito) sin cargar el archivo entero: se recorre una vez para elegir la
+        codificación, otra para detectar, otra para el texto de las líneas con
+        problemas y otra para corregir, escribiendo la salida en el temporal de
+        la transacción a medida que se produce.
+        """
+        result = self.new_result(file_path)
+        timer = PhaseTimer() if self.instrument else None
         
         try:
             self.stats['files_processed'] += 1
             
-            # Intentar leer el archivo con diferentes codificaciones
-            content = None
-            for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                try:
-                    with open(file_path, 'r', encoding=encoding) as f:
-                        content = f.read()
-                    break
-                except UnicodeDecodeError:
-                    continue
+            found = file_contains(file_path, self.prefilter_bytes)
+            if timer:
+                timer.lap('prefilter')
+            if not found:
+                result['status'] = 'no_problems'
+                return result
             
-            if content is None:
+            encoding = detect_encoding(file_path, self.encodings, self.chunk_size)
+            if timer:
+                timer.lap('decode')
+            if encoding is None:
                 result['errors'].append('Could not decode file with any encoding')
                 self.stats['errors'] += 1
                 return result
             
-            # Detectar problemas
-            problems = self.detect_problems(content, file_path)
+            problems = self.detect_problems_chunked(file_path, encoding)
             result['problems_detected'] = problems
-            
+            if timer:
+                timer.lap('detect')
             if not problems:
                 result['status'] = 'no_problems'
                 return result
             
-            # Crear backup antes de modificar
-            backup_path = self.create_backup(file_path)
-            result['backup_path'] = str(backup_path.relative_to(self.project_root))
+            changes = self.fix_file_chunked(file_path, encoding)
+            if timer:
+                timer.lap('fix')
             
-            # Aplicar correcciones
-            fixed_content, changes = self.fix_content(content, file_path)
-            
-            if fixed_content != content:
-                # Escribir archivo corregido
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(fixed_content)
+            if changes is not None:
+                result['backup_path'] = self.create_backup(file_path)
+                if timer:
+                    timer.lap('write')
                 
                 result['status'] = 'fixed'
                 result['changes'] = changes
                 self.stats['files_fixed'] += 1
                 
-                print(f"✅ {file_path.name}")
+                print(f"✅ {file_path.name} (por bloques)")
                 for change in changes:
                     print(f"   - {change}")
             else:
-                # Si no hubo cambios reales, eliminar backup
-                backup_path.unlink()
-                result['backup_path'] = None
                 result['status'] = 'no_changes_needed'
-                self.stats['backups_created'] -= 1
-                
+        
         except Exception as e:
-            result['errors'].append(str(e))
-            result['status'] = 'error'
-            self.stats['errors'] += 1
-            print(f"❌ Error procesando {file_path.name}: {e}")
+            self.fail_result(file_path, result, e)
+        
+        finally:
+            if timer:
+                result['timings'] = timer.as_dict()
         
         return result
 
-    def find_files(self) -> List[Path]:
-        """Encuentra archivos que necesitan ser procesados."""
-        target_extensions = {'.js', '.ts', '.tsx', '.jsx', '.json', '.md', '.txt'}
-        files = []
+    def detect_problems_chunked(self, file_path: Path, encoding: str) -> List[Dict]:
+        """detect_problems por bloques: mismas búsquedas, mismo orden y mismo texto por línea."""
+        searches = {
+            'literal_newline': LineMatches(re.compile(re.escape('\\n'))),
+            'escaped_newline': LineMatches(re.compile(re.escape('\\\\n'))),
+        }
+        for problem_type, pattern in self.detection_patterns:
+            searches[problem_type] = LineMatches(re.compile(pattern))
+        seconds = dict.fromkeys(searches, 0.0)
+        
+        for text in iter_text(file_path, encoding, self.chunk_size):
+            for name, search in searches.items():
+                start = time.perf_counter()
+                search.feed(text)
+                seconds[name] += time.perf_counter() - start
+        
+        escaped = set(searches.pop('escaped_newline').finish())
+        found = [(line_num, 0, 'literal_newline') for line_num in searches.pop('literal_newline').finish()
+                 if line_num not in escaped]
+        if self.instrument:
+            record_rule(self.rule_timings, 'detect: literal_newline',
+                        seconds['literal_newline'] + seconds['escaped_newline'], len(found))
+        for order, (problem_type, search) in enumerate(searches.items(), 1):
+            lines = search.finish()
+            found.extend((line_num, order, problem_type) for line_num in lines)
+            if self.instrument:
+                record_rule(self.rule_timings, f'detect: {problem_type}', seconds[problem_type], len(lines))
+        
+        if not found:
+            return []
+        heads = line_heads(iter_text(file_path, encoding, self.chunk_size), {line_num for line_num, _, _ in found})
+        return [{'type': problem_type, 'line': line_num, 'content': heads[line_num]}
+                for line_num, _, problem_type in sorted(found)]
+
+    def fix_file_chunked(self, file_path: Path, encoding: str) -> Optional[List[str]]:
+        """fix_content por bloques, escribiendo el resultado en la transacción.
+
+        Devuelve los cambios, o None si el contenido no cambia (y entonces no
+        queda ninguna escritura preparada). Cada regla es una etapa con su
+        propia ventana; las reglas unidas de un RuleSet se aplican en
+        secuencia, que por su contrato da el mismo resultado.
+        """
+        stages = [(StreamingSub(compiled, replacement), description)
+                  for rule_set in self.rule_sets_for(file_path)
+                  for compiled, replacement, description in rule_set.rules]
+        normalizer = CRLFNormalizer()
+        seconds = [0.0] * len(stages)
+        original = hashlib.sha256()
+        output = hashlib.sha256()
+        
+        def apply(text: str, final: bool = False) -> str:
+            # Lo que suelta cada etapa pasa por las siguientes; al final se vacían en orden
+            for index, (stage, _) in enumerate(stages):
+                start = time.perf_counter()
+                text = stage.feed(text) + (stage.finish() if final else '')
+                seconds[index] += time.perf_counter() - start
+            return normalizer.feed(text) + (normalizer.finish() if final else '')
+        
+        with self.transaction.staging(file_path, encoding) as f:
+            for text in iter_text(file_path, encoding, self.chunk_size):
+                original.update(text.encode('utf-8'))
+                fixed_text = apply(text)
+                output.update(fixed_text.encode('utf-8'))
+                f.write(fixed_text)
+            fixed_text = apply('', final=True)
+            output.update(fixed_text.encode('utf-8'))
+            f.write(fixed_text)
+        
+        changes = []
+        for (stage, description), stage_seconds in zip(stages, seconds):
+            if self.instrument:
+                record_rule(self.rule_timings, description, stage_seconds, stage.matches)
+            if stage.changed:
+                changes.append(description)
+                self.stats['total_fixes'] += 1
+        if normalizer.changed:
+            changes.append('Normalized CRLF to LF')
         
-        for file_path in self.project_root.rglob('*'):
-            if (file_path.is_file() and 
-                not self.should_skip_file(file_path) and 
-                (file_path.suffix in target_extensions or file_path.name.startswith('.env'))):
-                files.append(file_path)
+        if original.digest() == output.digest():
+            self.transaction.unstage(file_path)
+            return None
+        return changes
+
+    def is_candidate(self, file_path: Path) -> bool:
+        """Aplica a una ruta suelta los mismos filtros que find_files."""
+        rel_path = Path(os.path.relpath(file_path, self.project_root))
+        if rel_path.parts[0] == '..' or any(part in self.skip_dirs for part in rel_path.parts[:-1]):
+            return False
+        if not self.is_target_name(file_path.name):
+            return False
+        return file_path.is_file() and not self.too_large(file_path.stat().st_size)
+
+    def iter_candidates(self, paths: Iterable[Path] = None) -> Iterator[Tuple[Path, os.stat_result]]:
+        """Produce (ruta, stat) de los archivos a procesar, en el orden del recorrido.
+
+        Con paths (p. ej. los archivos de un diff de git) solo se filtran esas
+        rutas, sin recorrer el árbol.
+        """
+        if paths is not None:
+            candidates = ((file_path, file_path.stat()) for file_path in paths if self.is_candidate(file_path))
+        else:
+            # Los directorios omitidos se podan durante el recorrido
+            candidates = ((Path(entry.path), entry.stat())
+                          for entry in iter_entries(self.project_root, self.skip_dirs, self.is_target_name))
         
-        return sorted(files)
+        for file_path, stat in candidates:
+            if self.too_large(stat.st_size):
+                continue
+            if self.shard and not in_shard(file_path.relative_to(self.project_root).as_posix(), *self.shard):
+                continue
+            yield file_path, stat
+
+    def find_files(self, paths: Iterable[Path] = None) -> List[Path]:
+        """Encuentra archivos que necesitan ser procesados (ver iter_candidates), ordenados."""
+        return sorted(file_path for file_path, _ in self.iter_candidates(paths))
+
+    def run(self, jobs: int = 1, paths: Iterable[Path] = None) -> Dict:
+        """Ejecuta el proceso de corrección.
+
+        Con paths solo se consideran esas rutas (ver find_files).
 
-    def run(self) -> Dict:
-        """Ejecuta el proceso de corrección."""
+        Con jobs > 1 los archivos se reparten en un pool de procesos; los
+        resultados y las estadísticas se combinan en el orden de la lista de
+        archivos, de modo que el reporte es idéntico al de una ejecución serial.
+
+        Con pipelined los archivos se procesan en etapas a medida que se
+        descubren (ver process_files_pipelined); el reporte JSON tiene los
+        mismos resultados, ordenados al final.
+
+        Con stream_report cada resultado se escribe en newline_fix_report.jsonl
+        apenas se obtiene y no se conserva; el valor devuelto no incluye 'results'.
+        """
         print("🔧 CORRECTOR AVANZADO DE SALTOS DE LÍNEA")
         print("=" * 55)
         print(f"📁 Proyecto: {self.project_root}")
@@ -260,19 +866,61 @@ class NewlineFixer:
             print(f"❌ Error: El directorio {self.project_root} no existe")
             return {'success': False, 'error': 'Project directory not found'}
         
-        # Encontrar archivos
-        files = self.find_files()
-        print(f"🔍 Archivos encontrados: {len(files)}")
-        print()
+        cache = ScanCache(self.project_root, 'newlines_improved', self.ruleset_hash()) if self.use_cache else None
         
-        # Procesar archivos
-        results = []
-        for file_path in files:
-            result = self.process_file(file_path)
-            results.append(result)
+        # Cada salida es (ruta, stat tomado antes de leer o None, resultado)
+        if self.pipelined:
+            outputs = self.process_files_pipelined(jobs, paths, cache)
+        else:
+            outputs = self.process_files_in_order(jobs, paths, cache)
+        
+        stream = ReportStream(self.project_root / 'newline_fix_report.jsonl') if self.stream_report else None
+        results = None if stream else []
+        summary = TimingSummary(self.top_n) if self.instrument else None
+        
+        try:
+            for file_path, stat, result in outputs:
+                if cache and stat is not None and result['status'] == 'no_problems':
+                    cache.mark_clean(file_path, stat)
+                if summary:
+                    summary.add(result)
+                if stream:
+                    stream.write_result(result)
+                else:
+                    results.append(result)
+            
+            if self.pipelined and results is not None:
+                # Los resultados llegan a medida que terminan: mismo orden que find_files
+                results.sort(key=lambda result: Path(result['file']))
+            
+            # El manifiesto se escribe antes de reemplazar los archivos, para poder restaurarlos
+            self.backups.commit()
+            start = time.perf_counter()
+            self.commit_writes(results, stream)
+        except BaseException:
+            # Una excepción o Ctrl+C no deja temporales: primero se detienen las etapas o trabajadores
+            outputs.close()
+            self.transaction.abort()
+            raise
+        if self.instrument:
+            self.run_timings['commit'] = round(time.perf_counter() - start, 6)
+        
+        if cache:
+            cache.save()
+        
+        timings = None
+        if summary:
+            timings = summary.report(self.rule_timings)
+            timings.update(self.run_timings)
         
         # Generar reporte
-        self.generate_report(results)
+        if stream:
+            stream.write('summary', self.report_summary(timings))
+            stream.close()
+            self.generate_report(iter_results(stream.path), timings, stream.path)
+            return {'success': True, 'stats': self.stats, 'report_path': str(stream.path)}
+        
+        self.generate_report(results, timings)
         
         return {
             'success': True,
@@ -280,8 +928,446 @@ class NewlineFixer:
             'results': results
         }
 
-    def generate_report(self, results: List[Dict]):
-        """Genera un reporte detallado de los resultados."""
+    def process_files_in_order(self, jobs: int, paths: Iterable[Path],
+                               cache: Optional[ScanCache]) -> Iterator[Tuple[Path, Optional[os.stat_result], Dict]]:
+        """Produce (ruta, stat, resultado) en el orden de find_files.
+
+        La lista completa de archivos se arma antes de empezar: así la caché se
+        consulta de una vez y, con historia de costos, el trabajo se planifica
+        del archivo más costoso al menos costoso.
+        """
+        files = self.find_files(paths)
+        print(f"🔍 Archivos encontrados: {len(files)}")
+        print()
+        
+        # Consultar la caché: los archivos limpios conocidos no se abren
+        cached = [False] * len(files)
+        pending = []
+        for index, file_path in enumerate(files):
+            stat = file_path.stat() if cache else None
+            if cache and cache.is_clean(file_path, stat):
+                self.stats['files_processed'] += 1
+                cached[index] = True
+            else:
+                pending.append((file_path, stat))
+        
+        if cache:
+            print(f"⚡ Archivos limpios según la caché: {cache.hits}")
+            print()
+        
+        # Con la caché activa, el trabajo se planifica con los costos de ejecuciones anteriores
+        costs = None
+        cost_model = CostModel(self.project_root, 'newlines_improved') if cache and pending else None
+        if cost_model:
+            costs = [cost_model.estimate(file_path, stat.st_size) for file_path, stat in pending]
+        
+        # Procesar archivos (los resultados se obtienen de a uno, en orden)
+        pending_files = [file_path for file_path, _ in pending]
+        # Más procesos que núcleos no terminan antes: la predicción usa los que corren a la vez
+        workers = min(jobs, os.cpu_count() or 1)
+        predicted = None
+        if self.timeout:
+            order = None
+            if costs and jobs > 1:
+                order = sorted(range(len(costs)), key=lambda index: costs[index], reverse=True)
+            if costs:
+                predicted = predict_makespan([costs[index] for index in order or range(len(costs))], workers)
+            processed = self.process_files_watchdog(pending_files, jobs, order)
+        elif jobs > 1 and len(pending_files) > 1:
+            batches = plan_batches(costs, jobs) if costs else None
+            if batches is None and self.batch_small:
+                batches = self.small_batches(pending_files)
+            if costs:
+                predicted = predict_makespan([sum(costs[index] for index in batch) for batch in batches], workers)
+            processed = self.process_files_parallel(pending_files, jobs, batches)
+        else:
+            predicted = sum(costs) if costs else None
+            processed = self.process_files_serial(pending_files)
+        processed = zip(pending, processed)
+        start = time.perf_counter()
+        
+        for index, file_path in enumerate(files):
+            if cached[index]:
+                yield file_path, None, self.new_result(file_path, 'no_problems')
+            else:
+                (_, stat), result = next(processed)
+                yield file_path, stat, result
+        
+        if cost_model:
+            self.schedule = {
+                'jobs': jobs,
+                'predicted_makespan': round(predicted, 6),
+                'actual_makespan': round(time.perf_counter() - start, 6),
+                'estimated_from_history': cost_model.from_history,
+                'estimated_from_size': cost_model.from_size,
+            }
+            for file_path, stat in pending:
+                seconds = self.file_seconds.get(str(file_path.relative_to(self.project_root)))
+                if seconds is not None:
+                    cost_model.record(file_path, stat.st_size, seconds)
+            cost_model.save()
+
+    def report_summary(self, timings: Dict = None) -> Dict:
+        """Datos generales de la ejecución para el reporte."""
+        summary = {
+            'timestamp': __import__('datetime').datetime.now().isoformat(),
+            'backup_run': self.backups.run_id,
+            'stats': self.stats
+        }
+        if self.shard:
+            summary['shard'] = '{}/{}'.format(*self.shard)
+        if self.schedule:
+            summary['schedule'] = self.schedule
+        if self.pipeline:
+            summary['pipeline'] = self.pipeline
+        if self.rule_skips:
+            summary['prefilter'] = skip_report(self.rule_skips)
+        if timings is not None:
+            summary['timings'] = timings
+        return summary
+
+    def commit_writes(self, results: List[Dict], stream: ReportStream = None):
+        """Confirma todas las escrituras preparadas; si falla alguna, no se modifica ningún archivo."""
+        try:
+            self.transaction.commit()
+        except TransactionError as e:
+            print(f"❌ {e}")
+            print("↩️  Se deshicieron todas las escrituras de esta ejecución")
+            if stream:
+                # Los registros ya escritos se corrigen al leer el reporte (ver iter_results)
+                stream.write('rollback', {'error': str(e)})
+                self.stats['errors'] += self.stats['files_fixed']
+            for result in results or []:
+                if result['status'] == 'fixed':
+                    result['status'] = 'error'
+                    result['errors'].append(str(e))
+                    self.stats['errors'] += 1
+            self.stats['files_fixed'] = 0
+
+    def process_files_serial(self, files: List[Path]) -> Iterator[Dict]:
+        """Procesa los archivos en este proceso, midiendo el tiempo de CPU de cada uno."""
+        if self.batch_small:
+            for batch in self.small_batches(files):
+                yield from self.process_batch([files[index] for index in batch])
+            return
+        for file_path in files:
+            start = time.process_time()
+            result = self.process_file(file_path)
+            self.file_seconds[result['file']] = time.process_time() - start
+            yield result
+
+    def process_files_parallel(self, files: List[Path], jobs: int,
+                               batches: List[List[int]] = None) -> Iterator[Dict]:
+        """Procesa los archivos en un pool de procesos y combina los resultados.
+
+        Con batches (lotes de índices planificados por costo, ver
+        fix_schedule.plan_batches) los lotes se envían en ese orden; los
+        resultados igual se producen en el orden de files.
+        """
+        print(f"⚙️  Procesando con {jobs} procesos")
+        self.transaction.delegate(files)
+        
+        with ProcessPoolExecutor(max_workers=jobs,
+                                 initializer=_init_worker,
+                                 initargs=(self,)) as pool:
+            try:
+                if batches is None:
+                    # Bloques grandes para amortizar el costo de comunicación entre procesos
+                    chunksize = max(1, len(files) // (jobs * 8))
+                    # map conserva el orden de entrada, así que la combinación es determinista
+                    for output in pool.map(_process_in_worker, files, chunksize=chunksize):
+                        yield self.merge_worker_output(output)
+                    return
+                
+                futures = [pool.submit(_process_batch_in_worker, [files[index] for index in batch])
+                           for batch in batches]
+                outputs = ((index, output)
+                           for batch, future in zip(batches, futures)
+                           for index, output in zip(batch, future.result()))
+                for output in in_input_order(outputs):
+                    yield self.merge_worker_output(output)
+            except BaseException:
+                # Interrumpido: solo se espera a los archivos en curso, no a toda la cola
+                pool.shutdown(cancel_futures=True)
+                raise
+
+    def process_files_watchdog(self, files: List[Path], jobs: int, order: List[int] = None) -> Iterator[Dict]:
+        """Procesa cada archivo en un proceso que se mata si excede self.timeout.
+
+        Con order (índices del más costoso al menos costoso) los archivos se
+        despachan en ese orden; los resultados igual salen en el orden de files.
+        """
+        print(f"⏱️  Presupuesto por archivo: {self.timeout:g}s ({jobs} procesos)")
+        self.transaction.delegate(files)
+        
+        order = order or list(range(len(files)))
+        if self.batch_small:
+            budgeted = self.batch_outputs_with_budget(files, jobs, order)
+            outputs = budgeted
+        else:
+            budgeted = run_with_budget(_process_in_worker, [files[index] for index in order],
+                                       self.timeout, jobs, _init_worker, (self,))
+            outputs = zip(order, budgeted)
+        # Si la ejecución se interrumpe, los trabajadores se detienen antes de que siga la excepción
+        with closing(budgeted):
+            for file_path, status, value in in_input_order(outputs):
+                if status == OK:
+                    yield self.merge_worker_output(value)
+                    continue
+                
+                # El proceso fue interrumpido: el archivo queda sin modificar
+                self.transaction.discard([file_path])
+                self.stats['files_processed'] += 1
+                if status == TIMEOUT:
+                    result = self.new_result(file_path, 'timeout')
+                    result['errors'].append(f'Exceeded per-file time budget of {self.timeout:g}s')
+                    self.stats['timeouts'] += 1
+                    # Para la planificación, un archivo que excede el presupuesto cuesta al menos eso
+                    self.file_seconds[result['file']] = self.timeout
+                    print(f"⏱️  Tiempo excedido: {file_path.name}")
+                else:
+                    result = self.new_result(file_path, 'error')
+                    result['errors'].append(value)
+                    self.stats['errors'] += 1
+                    print(f"❌ Error procesando {file_path.name}: {value}")
+                yield result
+
+    def batch_outputs_with_budget(self, files: List[Path], jobs: int,
+                                  order: List[int]) -> Iterator[Tuple[int, Tuple[Path, str, object]]]:
+        """run_with_budget por lotes de small_batches: produce (índice, (ruta, estado, valor)) por archivo.
+
+        Un lote tiene el presupuesto de un archivo; si lo excede o falla, sus
+        archivos se repiten de a uno, así que cada uno termina con el mismo
+        estado que sin lotes.
+        """
+        ordered = [files[index] for index in order]
+        batches = [[order[position] for position in batch] for batch in self.small_batches(ordered)]
+        outputs = run_with_budget(_process_batch_in_worker, [[files[index] for index in batch] for batch in batches],
+                                  self.timeout, jobs, _init_worker, (self,))
+        with closing(outputs):
+            for batch, (batch_files, status, value) in zip(batches, outputs):
+                if status == OK:
+                    for index, file_path, output in zip(batch, batch_files, value):
+                        yield index, (file_path, OK, output)
+                    continue
+                self.transaction.discard(batch_files)
+                with closing(run_with_budget(_process_in_worker, batch_files, self.timeout, jobs,
+                                             _init_worker, (self,))) as retried:
+                    yield from zip(batch, retried)
+
+    def merge_worker_output(self, output: Tuple) -> Dict:
+        """Combina lo que devolvió _process_in_worker y devuelve el resultado del archivo."""
+        result, stats, backups, transaction, rule_timings, rule_skips, seconds = output
+        self.file_seconds[result['file']] = seconds
+        for key, value in stats.items():
+            self.stats[key] += value
+        # Los backups de los trabajadores se registran en el manifiesto común
+        self.backups.files.update(backups)
+        # Los temporales (y los fallos) de los trabajadores se confirman en este proceso
+        self.transaction.merge(transaction)
+        merge_rule_timings(self.rule_timings, rule_timings)
+        merge_rule_skips(self.rule_skips, rule_skips)
+        return result
+
+    def process_files_pipelined(self, jobs: int, paths: Iterable[Path],
+                                cache: Optional[ScanCache]) -> Iterator[Tuple[Path, Optional[os.stat_result], Dict]]:
+        """Procesa los archivos en etapas conectadas por colas acotadas (ver fix_stages.py).
+
+        El recorrido alimenta directamente a la lectura (hilos), la detección y
+        corrección (procesos si jobs > 1 o hay presupuesto por archivo; si no,
+        un hilo de este proceso) y la preparación de escrituras (hilos). Los
+        resultados salen a medida que terminan; las estadísticas se combinan
+        aquí, en un solo hilo. No usa la planificación por costos: el orden de
+        trabajo es el del recorrido.
+        """
+        pipeline = StagedPipeline(self.iter_work_items(paths, cache), self.queue_depth, fail=self.fail_stage)
+        pipeline.add_threads('read', self.read_item, self.io_threads)
+        if jobs > 1 or self.timeout:
+            pipeline.add_processes('fix', _fix_in_worker, self.fix_payload, self.complete_fix, jobs,
+                                   self.timeout, _init_worker, (self,))
+        else:
+            # Copia propia: la etapa no toca las estadísticas que combina el hilo principal
+            fixer = copy.copy(self)
+            pipeline.add_threads('fix', lambda item: self.complete_fix(item, OK, _fix_text(fixer, self.fix_payload(item))))
+        pipeline.add_threads('write', self.write_item, self.io_threads)
+        
+        print(f"🚰 Procesando en etapas: lectura y escritura con {self.io_threads} hilos, "
+              f"corrección con {jobs} {'procesos' if jobs > 1 or self.timeout else 'hilo'}, "
+              f"colas de {self.queue_depth}")
+        print()
+        
+        for item in pipeline.run():
+            cached = item.extra.get('cached', False)
+            yield item.path, None if cached else item.stat, self.merge_work_item(item)
+        
+        self.pipeline = pipeline.report()
+        print(f"🔍 Archivos encontrados: {pipeline.source_counter.items}")
+        if cache:
+            print(f"⚡ Archivos limpios según la caché: {cache.hits}")
+
+    def iter_work_items(self, paths: Iterable[Path], cache: Optional[ScanCache]) -> Iterator[WorkItem]:
+        """Fuente de la ejecución en etapas: candidatos en el orden del recorrido, con la caché ya consultada."""
+        for file_path, stat in self.iter_candidates(paths):
+            item = WorkItem(file_path, stat)
+            if cache and cache.is_clean(file_path, stat):
+                item.result = self.new_result(file_path, 'no_problems')
+                item.extra['cached'] = True
+                item.done = True
+            yield item
+
+    def record_phases(self, item: WorkItem, timer: Optional[PhaseTimer]):
+        """Suma las fases medidas en una etapa a las del archivo."""
+        if timer:
+            phases = item.extra.setdefault('phases', {})
+            for phase, seconds in timer.phases.items():
+                phases[phase] = phases.get(phase, 0.0) + seconds
+
+    def fail_item(self, item: WorkItem, message: str):
+        """Marca el archivo como error; no pasa por las etapas siguientes."""
+        item.result['status'] = 'error'
+        item.result['errors'].append(message)
+        item.done = True
+        print(f"❌ Error procesando {item.path.name}: {message}")
+
+    def fail_stage(self, item: WorkItem, message: str):
+        """Un error no manejado de una etapa: el archivo queda como error y sin escritura preparada."""
+        if item.result is None:
+            item.result = self.new_result(item.path)
+        self.transaction.unstage(item.path)
+        self.fail_item(item, message)
+
+    def read_item(self, item: WorkItem):
+        """Etapa de lectura: prefiltro y decodificación (lo mismo que el inicio de process_file)."""
+        if self.stream_large and item.size > self.max_file_size:
+            # Un archivo grande se procesa completo aquí, por bloques, con estadísticas propias
+            fixer = copy.copy(self)
+            fixer.stats = dict.fromkeys(self.stats, 0)
+            fixer.rule_timings = {}
+            fixer.rule_skips = {}
+            item.result = fixer.process_large_file(item.path)
+            item.extra.update(stats=fixer.stats, rule_timings=fixer.rule_timings, rule_skips=fixer.rule_skips)
+            item.done = True
+            return
+        
+        item.result = result = self.new_result(item.path)
+        timer = PhaseTimer() if self.instrument else None
+        try:
+            # Sin ninguna barra invertida no hay nada que detectar: no decodificar
+            found = file_contains(item.path, self.prefilter_bytes)
+            if timer:
+                timer.lap('prefilter')
+            if not found:
+                result['status'] = 'no_problems'
+                item.done = True
+                return
+            
+            item.content, item.extra['encoding'] = self.read_content(item.path)
+            if timer:
+                timer.lap('decode')
+            if item.content is None:
+                result['errors'].append('Could not decode file with any encoding')
+                item.done = True
+        except Exception as e:
+            self.fail_item(item, str(e))
+        finally:
+            self.record_phases(item, timer)
+
+    def fix_payload(self, item: WorkItem) -> Tuple[Path, AnyStr, str]:
+        """Lo que la etapa de corrección necesita del archivo; el contenido ya no se retiene."""
+        payload = (item.path, item.content, item.extra['encoding'])
+        item.content = None
+        return payload
+
+    def complete_fix(self, item: WorkItem, status: str, value):
+        """Incorpora lo que devolvió _fix_text para el archivo."""
+        if status == TIMEOUT:
+            item.result['status'] = 'timeout'
+            item.result['errors'].append(f'Exceeded per-file time budget of {self.timeout:g}s')
+            item.done = True
+            print(f"⏱️  Tiempo excedido: {item.path.name}")
+            return
+        if status != OK:
+            self.fail_item(item, value)
+            return
+        
+        problems, fixed_content, changes, fixes, rule_timings, rule_skips, phases = value
+        item.result['problems_detected'] = problems
+        item.extra.update(total_fixes=fixes, rule_timings=rule_timings, rule_skips=rule_skips, changes=changes)
+        if phases:
+            item.extra.setdefault('phases', {}).update(phases)
+        if not problems:
+            item.result['status'] = 'no_problems'
+            item.done = True
+        elif fixed_content is None:
+            item.result['status'] = 'no_changes_needed'
+            item.done = True
+        else:
+            item.fixed = fixed_content
+
+    def write_item(self, item: WorkItem):
+        """Etapa de escritura: backup del original y escritura preparada en la transacción."""
+        result = item.result
+        timer = PhaseTimer() if self.instrument else None
+        try:
+            try:
+                result['backup_path'] = self.backups.save(item.path)
+            except Exception as e:
+                self.transaction.fail(item.path, e)
+                raise
+            item.extra['backup'] = True
+            self.transaction.stage(item.path, item.fixed, item.extra['encoding'])
+            if timer:
+                timer.lap('write')
+            
+            result['status'] = 'fixed'
+            result['changes'] = item.extra['changes']
+            # Una sola llamada a print: las líneas de distintos hilos no se mezclan
+            print('\n'.join([f"✅ {item.path.name}"] + [f"   - {change}" for change in result['changes']]))
+        except Exception as e:
+            self.fail_item(item, str(e))
+        finally:
+            item.fixed = None
+            item.done = True
+            self.record_phases(item, timer)
+
+    def merge_work_item(self, item: WorkItem) -> Dict:
+        """Combina las estadísticas de un archivo que salió de las etapas y devuelve su resultado."""
+        result = item.result
+        if 'stats' in item.extra:
+            for key, value in item.extra['stats'].items():
+                self.stats[key] += value
+            merge_rule_timings(self.rule_timings, item.extra['rule_timings'])
+            merge_rule_skips(self.rule_skips, item.extra['rule_skips'])
+            return result
+        
+        self.stats['files_processed'] += 1
+        if item.extra.get('backup'):
+            self.stats['backups_created'] += 1
+        if result['status'] == 'fixed':
+            self.stats['files_fixed'] += 1
+        elif result['status'] == 'timeout':
+            self.stats['timeouts'] += 1
+        elif result['errors']:
+            self.stats['errors'] += 1
+        self.stats['total_fixes'] += item.extra.get('total_fixes', 0)
+        merge_rule_timings(self.rule_timings, item.extra.get('rule_timings', {}))
+        merge_rule_skips(self.rule_skips, item.extra.get('rule_skips', {}))
+        if self.instrument and not item.extra.get('cached'):
+            phases = item.extra.get('phases', {})
+            result['timings'] = {
+                'total': round(sum(phases.values()), 6),
+                'phases': {phase: round(seconds, 6) for phase, seconds in phases.items()}
+            }
+        return result
+
+    def generate_report(self, results: Iterable[Dict], timings: Dict = None, report_path: Path = None):
+        """Genera un reporte detallado de los resultados.
+
+        Recorre los resultados una sola vez y solo conserva los archivos que
+        se listan. Sin report_path escribe newline_fix_report.json con todos
+        los resultados; con report_path los resultados vienen de un reporte
+        JSONL ya escrito.
+        """
         print("\n" + "=" * 55)
         print("📊 REPORTE DE CORRECCIONES")
         print("=" * 55)
@@ -292,58 +1378,223 @@ class NewlineFixer:
         print(f"💾 Backups creados: {self.stats['backups_created']}")
         print(f"🔧 Total de correcciones: {self.stats['total_fixes']}")
         print(f"❌ Errores: {self.stats['errors']}")
+        if self.stats['timeouts']:
+            print(f"⏱️  Tiempo excedido: {self.stats['timeouts']}")
+        if self.schedule:
+            print(f"📐 Duración prevista: {self.schedule['predicted_makespan']:.2f}s, "
+                  f"real: {self.schedule['actual_makespan']:.2f}s ({self.schedule['jobs']} procesos)")
+        if self.pipeline:
+            print(f"🚰 Etapas (cuello de botella: {self.pipeline['bottleneck']}):")
+            for stage in self.pipeline['stages']:
+                print(f"   {stage['stage']:<9} {stage['items']:>7} archivos  {stage['items_per_second']:>10.1f}/s  "
+                      f"{stage['mb_per_second']:>8.2f} MB/s  ocupación {stage['utilization']:.0%}")
+        
+        if self.rule_skips:
+            skipping = [entry for entry in skip_report(self.rule_skips) if entry['skipped']]
+            print(f"🔎 Prefiltro de literales: {len(skipping)} de {len(self.rule_skips)} reglas omitidas en algún archivo")
+            for entry in skipping[:self.top_n]:
+                print(f"   {entry['skip_rate']:>6.1%}  {entry['rule']} ({entry['skipped']}/{entry['files']})")
+        
+        # Clasificar los resultados en una pasada
+        fixed_files, no_changes, error_files, timeout_files = [], [], [], []
+        for result in results:
+            status = result['status']
+            if status == 'fixed':
+                fixed_files.append((result['file'], result['changes'], result['backup_path']))
+            elif status == 'no_changes_needed':
+                no_changes.append((result['file'], len(result['problems_detected'])))
+            elif status == 'error':
+                error_files.append((result['file'], result['errors']))
+            elif status == 'timeout':
+                timeout_files.append(result['file'])
         
         # Archivos corregidos
-        fixed_files = [r for r in results if r['status'] == 'fixed']
         if fixed_files:
             print(f"\n🎉 Archivos corregidos exitosamente ({len(fixed_files)}):")
-            for result in fixed_files:
-                print(f"• {result['file']}")
-                for change in result['changes']:
+            for file, changes, _ in fixed_files:
+                print(f"• {file}")
+                for change in changes:
                     print(f"  - {change}")
         
         # Archivos con problemas detectados pero sin cambios
-        no_changes = [r for r in results if r['status'] == 'no_changes_needed']
         if no_changes:
             print(f"\n⚠️  Archivos con problemas detectados pero sin cambios ({len(no_changes)}):")
-            for result in no_changes:
-                print(f"• {result['file']} - {len(result['problems_detected'])} problemas detectados")
+            for file, problem_count in no_changes:
+                print(f"• {file} - {problem_count} problemas detectados")
         
         # Errores
-        error_files = [r for r in results if r['status'] == 'error']
         if error_files:
             print(f"\n❌ Archivos con errores ({len(error_files)}):")
-            for result in error_files:
-                print(f"• {result['file']}: {'; '.join(result['errors'])}")
+            for file, errors in error_files:
+                print(f"• {file}: {'; '.join(errors)}")
+        
+        # Archivos que excedieron el presupuesto de tiempo
+        if timeout_files:
+            print(f"\n⏱️  Archivos que excedieron {self.timeout:g}s ({len(timeout_files)}):")
+            for file in timeout_files:
+                print(f"• {file}")
+        
+        # Tiempos (solo con instrumentación)
+        if timings is not None:
+            print(f"\n⏱️  Archivos más lentos:")
+            for entry in timings['slowest_files']:
+                print(f"• {entry['file']}: {entry['total'] * 1000:.2f} ms")
+            print(f"\n⏱️  Reglas más costosas:")
+            for entry in timings['rules'][:self.top_n]:
+                print(f"• {entry['rule']}: {entry['seconds'] * 1000:.2f} ms, {entry['matches']} coincidencias")
         
         # Comandos útiles
         print(f"\n📋 Comandos útiles:")
+        run_id = self.backups.run_id
         print("• Ver cambios específicos:")
-        for result in fixed_files:
-            if result['backup_path']:
-                print(f"  diff '{result['backup_path']}' '{result['file']}'")
+        for file, _, backup_path in fixed_files:
+            if backup_path:
+                print(f"  diff <(python3 fix_backup.py show --run {run_id} '{file}') '{file}'")
         
-        print("• Eliminar todos los backups:")
-        print("  find . -name '*.backup' -delete")
+        if fixed_files:
+            print("• Deshacer todas las correcciones de esta ejecución:")
+            print(f"  python3 fix_backup.py restore --run {run_id}")
         
         print("• Probar la aplicación:")
         print("  npm run dev")
         
         # Generar reporte JSON
-        report_path = self.project_root / 'newline_fix_report.json'
-        with open(report_path, 'w') as f:
-            json.dump({
-                'timestamp': __import__('datetime').datetime.now().isoformat(),
-                'stats': self.stats,
-                'results': results
-            }, f, indent=2)
+        if report_path is None:
+            report_path = self.project_root / 'newline_fix_report.json'
+            report = self.report_summary(timings)
+            report['results'] = results
+            if timings is not None:
+                # Mismo orden de claves que antes: los tiempos van al final
+                report['timings'] = report.pop('timings')
+            with open(report_path, 'w') as f:
+                json.dump(report, f, indent=2)
         
         print(f"\n📄 Reporte detallado guardado en: {report_path}")
         print("\n🎯 ¡Corrección completada!")
 
+# Instancia del corrector en cada proceso del pool (ver process_files_parallel)
+_worker_fixer = None
+
+def _init_worker(fixer: NewlineFixer):
+    """Inicializa el proceso trabajador con una copia del corrector."""
+    global _worker_fixer
+    _worker_fixer = fixer
+
+def _process_in_worker(file_path: Path) -> Tuple[Dict, Dict, Dict, WriteTransaction, Dict, Dict, float]:
+    """Procesa un archivo en un proceso trabajador.
+
+    Devuelve el resultado junto con las estadísticas, los backups, la
+    transacción (escrituras preparadas y fallos), los tiempos y las omisiones por regla solo de ese
+    archivo, y su tiempo de CPU, para que el proceso principal los combine.
+    """
+    _worker_fixer.stats = dict.fromkeys(_worker_fixer.stats, 0)
+    _worker_fixer.backups.files = {}
+    _worker_fixer.transaction = WriteTransaction(_worker_fixer.transaction.token)
+    _worker_fixer.rule_timings = {}
+    _worker_fixer.rule_skips = {}
+    start = time.process_time()
+    result = _worker_fixer.process_file(file_path)
+    return (result, _worker_fixer.stats, _worker_fixer.backups.files, _worker_fixer.transaction,
+            _worker_fixer.rule_timings, _worker_fixer.rule_skips, time.process_time() - start)
+
+def _process_batch_in_worker(files: List[Path]) -> List[Tuple]:
+    """Procesa un lote de archivos planificado por costo (ver fix_schedule.plan_batches).
+
+    Con batch_small los archivos pequeños se detectan juntos (ver
+    NewlineFixer.process_batch). Las estadísticas, backups, escrituras y
+    tiempos por regla del lote van con el primer archivo: el proceso
+    principal solo los suma.
+    """
+    if not _worker_fixer.batch_small:
+        return [_process_in_worker(file_path) for file_path in files]
+    _worker_fixer.stats = dict.fromkeys(_worker_fixer.stats, 0)
+    _worker_fixer.backups.files = {}
+    _worker_fixer.transaction = WriteTransaction(_worker_fixer.transaction.token)
+    _worker_fixer.rule_timings = {}
+    _worker_fixer.rule_skips = {}
+    _worker_fixer.file_seconds = {}
+    results = []
+    for batch in _worker_fixer.small_batches(files):
+        results.extend(_worker_fixer.process_batch([files[index] for index in batch]))
+    outputs = [(result, {}, {}, WriteTransaction(), {}, {}, _worker_fixer.file_seconds[result['file']]) for result in results]
+    if outputs:
+        outputs[0] = (results[0], _worker_fixer.stats, _worker_fixer.backups.files, _worker_fixer.transaction,
+                      _worker_fixer.rule_timings, _worker_fixer.rule_skips, outputs[0][-1])
+    return outputs
+
+def _fix_text(fixer: NewlineFixer, payload: Tuple[Path, AnyStr, str]) -> Tuple:
+    """Detección y corrección de un contenido ya leído (etapa de corrección).
+
+    Devuelve los problemas, el contenido corregido (None si no cambia), los
+    cambios, la cantidad de correcciones, los tiempos y las omisiones por
+    regla y las fases.
+    """
+    file_path, content, encoding = payload
+    fixer.stats = dict.fromkeys(fixer.stats, 0)
+    fixer.rule_timings = {}
+    fixer.rule_skips = {}
+    timer = PhaseTimer() if fixer.instrument else None
+    
+    present = fixer.literal_index(file_path).scan(content, encoding)
+    problems = fixer.detect_problems(content, file_path, encoding, present)
+    if timer:
+        timer.lap('detect')
+    fixed_content, changes = None, []
+    if problems:
+        fixed_content, changes = fixer.fix_content(content, file_path, encoding, present)
+        if timer:
+            timer.lap('fix')
+        if fixed_content == content:
+            fixed_content = None
+    return (problems, fixed_content, changes, fixer.stats['total_fixes'], fixer.rule_timings,
+            fixer.rule_skips, timer.phases if timer else None)
+
+def _fix_in_worker(payload: Tuple[Path, AnyStr, str]) -> Tuple:
+    """_fix_text en un proceso trabajador de la ejecución en etapas."""
+    return _fix_text(_worker_fixer, payload)
+
+def parse_args() -> argparse.Namespace:
+    """Lee los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Corrector avanzado de saltos de línea")
+    parser.add_argument('--root', default="/Users/rafaelramos/Desktop/ayamas",
+                        help="Directorio raíz del proyecto")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="Número de procesos en paralelo (0 = todos los núcleos)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="No usar la caché incremental de escaneo")
+    parser.add_argument('--timings', action='store_true',
+                        help="Medir fases por archivo y tiempo por regla (se agregan al reporte)")
+    parser.add_argument('--top', type=int, default=10,
+                        help="Cantidad de archivos más lentos en el reporte de tiempos")
+    parser.add_argument('--timeout', type=float, default=0,
+                        help="Presupuesto de tiempo por archivo en segundos, con cada archivo en un proceso "
+                             "que se mata si lo excede (0 = sin límite, en este proceso o con --jobs)")
+    parser.add_argument('--stream-report', action='store_true',
+                        help="Escribir el reporte como JSONL, un registro por archivo, sin guardarlos en memoria")
+    parser.add_argument('--changed-since', metavar='REF',
+                        help="Solo los archivos modificados respecto de REF (más los nuevos sin seguimiento)")
+    parser.add_argument('--staged', action='store_true',
+                        help="Solo los archivos del índice de git (para hooks de pre-commit)")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="Procesar en etapas (descubrir, leer, corregir, escribir) a medida que se encuentran los archivos")
+    parser.add_argument('--queue-depth', type=int, default=64,
+                        help="Elementos por cola entre etapas con --pipeline (limita la memoria)")
+    parser.add_argument('--stream-large', action='store_true',
+                        help="Procesar por bloques los archivos de más de 10 MB en vez de omitirlos")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, metavar='CARACTERES',
+                        help="Tamaño de bloque con --stream-large (limita la memoria por archivo)")
+    parser.add_argument('--batch-small', action='store_true',
+                        help="Detectar juntos los archivos pequeños, en un solo texto por lote (sin --pipeline)")
+    parser.add_argument('--shard', metavar='i/N',
+                        help="Procesar solo el shard i de N (combinar con: python3 fix_shard.py merge-reports)")
+    parser.add_argument('--profile', metavar='ARCHIVO',
+                        help="Guardar un perfil cProfile/pstats de la ejecución (solo el proceso principal)")
+    return parser.parse_args()
+
 def main():
     """Función principal."""
-    project_path = "/Users/rafaelramos/Desktop/ayamas"
+    args = parse_args()
+    project_path = args.root
     
     # Verificar que el directorio existe
     if not os.path.exists(project_path):
@@ -354,11 +1605,38 @@ def main():
     # Cambiar al directorio del proyecto
     os.chdir(project_path)
     
+    try:
+        shard = parse_shard(args.shard) if args.shard else None
+    except ShardError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    
     # Crear instancia del corrector
-    fixer = NewlineFixer(project_path)
+    fixer = NewlineFixer(project_path, use_cache=not args.no_cache,
+                         instrument=args.timings, top_n=args.top, timeout=args.timeout or None,
+                         stream_report=args.stream_report, shard=shard,
+                         pipelined=args.pipeline, queue_depth=args.queue_depth,
+                         stream_large=args.stream_large, chunk_size=args.chunk_size,
+                         batch_small=args.batch_small)
+    
+    # Con --changed-since/--staged los candidatos salen de git y no del recorrido del árbol
+    paths = None
+    if args.changed_since or args.staged:
+        try:
+            paths = changed_paths(fixer.project_root, args.changed_since, args.staged)
+        except GitError as e:
+            print(f"❌ Error consultando git: {e}")
+            sys.exit(1)
     
     # Ejecutar corrección
-    result = fixer.run()
+    jobs = args.jobs or os.cpu_count() or 1
+    if args.profile:
+        profiler = cProfile.Profile()
+        result = profiler.runcall(fixer.run, jobs=jobs, paths=paths)
+        profiler.dump_stats(args.profile)
+        print(f"📈 Perfil guardado en: {args.profile} (ver con: python3 -m pstats {args.profile})")
+    else:
+        result = fixer.run(jobs=jobs, paths=paths)
     
     if result['success']:
         print(f"\n✅ Proceso completado exitosamente")
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+Pipeline unificado de corrección para el proyecto ayamas.
+Lee cada archivo una sola vez, lo pasa por las etapas de escapes TSX, ObjectId y
+saltos de línea en secuencia, y lo escribe como máximo una vez con un único backup.
+fix_tsx_escapes.py y fix_objectid_keys.py ejecutan este mismo pipeline con una
+sola etapa; las reglas de esas etapas están en fix_stage_rules.py.
+"""
+
+import os
+from contextlib import closing
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fix_backup import BackupStore
+from fix_cache import ScanCache, ruleset_hash
+from fix_git import CatFileBatch, staged_blobs, write_blobs_to_index
+from fix_newlines_improved import NewlineFixer
+from fix_prefilter import file_contains
+from fix_stage_rules import (ESCAPES_PREFILTER_BYTES, OBJECTID_PATTERNS, OBJECTID_PREFILTER_BYTES,
+                             OBJECTID_SKIP_DIRS, PROBLEM_FILES, REACT_EXTENSIONS, TSX_PATTERNS,
+                             fix_escapes_content, fix_objectid_content)
+from fix_transaction import TransactionError, WriteTransaction
+from fix_watchdog import OK, TIMEOUT, run_with_budget
+from fix_walker import iter_entries
+
+# Etapas en el orden en que las ejecutaba fix_all_issues.py
+STAGES = ['escapes', 'objectid', 'newlines']
+
+# Etapas que, como los scripts originales, solo leen archivos UTF-8
+UTF8_ONLY_STAGES = {'escapes', 'objectid'}
+
+class FixPipeline:
+    def __init__(self, project_root: str = "/Users/rafaelramos/Desktop/ayamas", use_cache: bool = False,
+                 timeout: float = None, stages: Iterable[str] = None, tool: str = 'fix_pipeline'):
+        self.project_root = Path(project_root)
+        self.use_cache = use_cache
+        # Presupuesto de tiempo por archivo en segundos (None = sin límite)
+        self.timeout = timeout
+        # Etapas que se ejecutan (p. ej. solo 'objectid' desde fix_objectid_keys.py), en el orden de STAGES
+        unknown = set(stages or ()) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Etapas desconocidas: {', '.join(sorted(unknown))}")
+        self.stages = [stage for stage in STAGES if stages is None or stage in stages]
+        self.newline_fixer = NewlineFixer(project_root)
+        self.backups = BackupStore(self.project_root, tool)
+        self.transaction = WriteTransaction()
+        self.escape_files = set(PROBLEM_FILES)
+        self.stats = {
+            'files_processed': 0,
+            'files_fixed': 0,
+            'backups_created': 0,
+            'errors': 0,
+            'timeouts': 0,
+            'total_fixes': 0
+        }
+        self.stage_stats = dict.fromkeys(self.stages, 0)
+
+    def stages_for_name(self, rel_path: str, dirs: Tuple[str, ...]) -> List[str]:
+        """Etapas que aplican según la ruta relativa, sin consultar el archivo."""
+        stages = []
+        name = os.path.basename(rel_path)
+
+        if 'escapes' in self.stages and rel_path in self.escape_files:
+            stages.append('escapes')
+
+        if ('objectid' in self.stages and os.path.splitext(name)[1] in REACT_EXTENSIONS and
+            not any(part in OBJECTID_SKIP_DIRS for part in dirs)):
+            stages.append('objectid')
+
+        fixer = self.newline_fixer
+        if ('newlines' in self.stages and fixer.is_target_name(name) and
+            not any(part in fixer.skip_dirs for part in dirs)):
+            stages.append('newlines')
+
+        return stages
+
+    def stages_for(self, rel_path: str, dirs: Tuple[str, ...], entry: os.DirEntry) -> List[str]:
+        """Determina qué etapas aplican a un archivo, con las reglas de cada script.
+
+        entry puede ser un os.DirEntry o un Path: solo se usa .stat(), y solo
+        si aplica la etapa de saltos de línea (que omite archivos grandes).
+        """
+        stages = self.stages_for_name(rel_path, dirs)
+        if 'newlines' in stages and entry.stat().st_size > self.newline_fixer.max_file_size:
+            stages.remove('newlines')
+        return stages
+
+    def stages_for_path(self, file_path: Path) -> List[str]:
+        """Etapas de un archivo individual, con las mismas reglas que find_files."""
+        rel_path = Path(os.path.relpath(file_path, self.project_root))
+        if rel_path.parts[0] == '..' or any(part in self.common_skip_dirs() for part in rel_path.parts[:-1]):
+            return []
+        return self.stages_for(rel_path.as_posix(), rel_path.parts[:-1], Path(file_path))
+
+    def common_skip_dirs(self) -> set:
+        """Directorios que todas las etapas activas omiten (se podan durante el recorrido)."""
+        common = self.newline_fixer.skip_dirs & OBJECTID_SKIP_DIRS
+        # La etapa de escapes no omite directorios propios: usa los que omiten las otras dos
+        skip_dirs = {'escapes': common, 'objectid': OBJECTID_SKIP_DIRS, 'newlines': self.newline_fixer.skip_dirs}
+        return set.intersection(*(skip_dirs[stage] for stage in self.stages)) if self.stages else common
+
+    def find_files(self, paths: Iterable[Path] = None) -> List[Tuple[Path, List[str]]]:
+        """Recorre el árbol una sola vez y asigna las etapas de cada archivo.
+
+        Con paths (p. ej. los archivos de un diff de git) solo se asignan las
+        etapas de esas rutas, sin recorrer el árbol.
+        """
+        if paths is not None:
+            files = []
+            for file_path in paths:
+                stages = self.stages_for_path(file_path) if os.path.isfile(file_path) else []
+                if stages:
+                    files.append((Path(file_path), stages))
+            return sorted(files)
+
+        # Solo se podan los directorios que todas las etapas omiten
+        files = []
+
+        for entry in iter_entries(self.project_root, self.common_skip_dirs()):
+            rel_path = Path(os.path.relpath(entry.path, self.project_root))
+            stages = self.stages_for(rel_path.as_posix(), rel_path.parts[:-1], entry)
+            if stages:
+                files.append((Path(entry.path), stages))
+
+        return sorted(files)
+
+    def ruleset_hash(self) -> str:
+        """Hash de las reglas de las etapas activas."""
+        if self.stages == STAGES:
+            return ruleset_hash(TSX_PATTERNS, OBJECTID_PATTERNS, PROBLEM_FILES,
+                                self.newline_fixer.ruleset_hash())
+        rules = {'escapes': (TSX_PATTERNS, PROBLEM_FILES), 'objectid': OBJECTID_PATTERNS,
+                 'newlines': self.newline_fixer.ruleset_hash()}
+        return ruleset_hash(*(rules[stage] for stage in self.stages))
+
+    def cache_namespace(self) -> str:
+        """Espacio de la caché: cada combinación de etapas lleva su propio registro de archivos limpios."""
+        return 'pipeline' if self.stages == STAGES else 'pipeline:' + '+'.join(self.stages)
+
+    def prefilter_bytes(self, stages: List[str]) -> Tuple[bytes, ...]:
+        """Bytes de los que depende alguna de las etapas.
+
+        Ninguna etapa introduce los bytes que necesitan las siguientes, así que
+        basta con buscarlos en el archivo original.
+        """
+        needles = set()
+        for stage in stages:
+            if stage == 'escapes':
+                needles.update(ESCAPES_PREFILTER_BYTES)
+            elif stage == 'objectid':
+                needles.update(OBJECTID_PREFILTER_BYTES)
+            else:
+                needles.update(self.newline_fixer.prefilter_bytes)
+        return tuple(needles)
+
+    def run_stage(self, stage: str, content: str, file_path: Path) -> Tuple[str, List[str]]:
+        """Aplica una etapa al contenido."""
+        if stage == 'escapes':
+            return fix_escapes_content(content)
+        if stage == 'objectid':
+            return fix_objectid_content(content)
+
+        # La etapa de saltos de línea solo corrige si detecta problemas
+        if not self.newline_fixer.detect_problems(content, file_path):
+            return content, []
+        return self.newline_fixer.fix_content(content, file_path)
+
+    def fix_text(self, rel_path: str, content: str) -> Tuple[str, Dict[str, List[str]]]:
+        """Aplica las etapas de rel_path a un contenido en memoria, sin acceder al disco.
+
+        Devuelve el contenido corregido y los cambios de cada etapa, igual que
+        process_file para un archivo con esa ruta y ese contenido (UTF-8).
+        """
+        path = PurePosixPath(rel_path)
+        stages = self.stages_for_name(path.as_posix(), path.parts[:-1])
+        if ('newlines' in stages and len(content) * 4 > self.newline_fixer.max_file_size and
+                len(content.encode('utf-8')) > self.newline_fixer.max_file_size):
+            stages.remove('newlines')
+
+        if not any(needle.decode('ascii') in content for needle in self.prefilter_bytes(stages)):
+            return content, {}
+
+        changes = {}
+        for stage in stages:
+            content, stage_changes = self.run_stage(stage, content, Path(path))
+            if stage_changes:
+                changes[stage] = stage_changes
+        return content, changes
+
+    def create_backup(self, file_path: Path) -> str:
+        """Crea un único backup del original antes de escribir."""
+        try:
+            backup_path = self.backups.save(file_path)
+        except Exception as e:
+            # Sin backup no se escribe ningún archivo de esta ejecución (ver WriteTransaction.commit)
+            self.transaction.fail(file_path, e)
+            raise
+        self.stats['backups_created'] += 1
+        return backup_path
+
+    def decode(self, raw: bytes) -> Tuple[Optional[str], Optional[str]]:
+        """Decodifica el contenido: (texto, codificación), o (None, None).
+
+        Prueba las mismas codificaciones, en el mismo orden, que
+        NewlineFixer.read_content; el resultado se escribe de vuelta en la
+        codificación en que se leyó.
+        """
+        for encoding in self.newline_fixer.encodings:
+            try:
+                return raw.decode(encoding), encoding
+            except UnicodeDecodeError:
+                continue
+        return None, None
+
+    def apply_stages(self, content: str, encoding: str, stages: List[str], file_path: Path,
+                     result: Dict) -> str:
+        """Pasa el contenido por las etapas y registra los cambios de cada una en result."""
+        for stage in stages:
+            # Como en los scripts originales, estas etapas no tocan archivos que no son UTF-8
+            if stage in UTF8_ONLY_STAGES and encoding != 'utf-8':
+                continue
+            content, changes = self.run_stage(stage, content, file_path)
+            if changes:
+                result['stages'][stage] = changes
+                self.stage_stats[stage] += 1
+                self.stats['total_fixes'] += len(changes)
+        return content
+
+    def check_staged(self, write_index: bool = False) -> Dict:
+        """Revisa el contenido del índice de git (lo que se va a commitear), no el árbol de trabajo.
+
+        Todos los blobs se leen por un único 'git cat-file --batch'. Con
+        write_index=True los blobs corregidos se guardan de nuevo en el índice
+        (en bloque, ver write_blobs_to_index); el árbol de trabajo no se toca.
+        """
+        max_size = self.newline_fixer.max_file_size
+        candidates = []
+        for rel_path, mode, blob in staged_blobs(self.project_root):
+            path = PurePosixPath(rel_path)
+            stages = self.stages_for_name(rel_path, path.parts[:-1])
+            if stages:
+                candidates.append((rel_path, mode, blob, stages))
+        print(f"🔍 Archivos en el índice: {len(candidates)}")
+
+        results = []
+        fixed = []
+        reader = CatFileBatch(self.project_root)
+        try:
+            blobs = reader.read_many([blob for _, _, blob, _ in candidates])
+            for (rel_path, mode, blob, stages), (_, raw) in zip(candidates, blobs):
+                self.stats['files_processed'] += 1
+                result = {'file': rel_path, 'blob': blob, 'status': 'no_changes', 'stages': {}, 'errors': []}
+                results.append(result)
+                if len(raw) > max_size and 'newlines' in stages:
+                    stages = [stage for stage in stages if stage != 'newlines']
+                if not any(needle in raw for needle in self.prefilter_bytes(stages)):
+                    continue
+
+                original, encoding = self.decode(raw)
+                if original is None:
+                    result['errors'].append('Could not decode file with any encoding')
+                    result['status'] = 'error'
+                    self.stats['errors'] += 1
+                    continue
+
+                content = self.apply_stages(original, encoding, stages, Path(rel_path), result)
+                if result['errors']:
+                    self.stats['errors'] += 1
+                if content != original:
+                    result['status'] = 'needs_fix'
+                    fixed.append((result, mode, content.encode(encoding)))
+                    print(f"⚠️  {rel_path}")
+                    for stage, changes in result['stages'].items():
+                        for change in changes:
+                            print(f"   - [{stage}] {change}")
+        finally:
+            reader.close()
+
+        if write_index and fixed:
+            blobs = write_blobs_to_index(self.project_root,
+                                         [(result['file'], mode, data) for result, mode, data in fixed])
+            for (result, _, _), blob in zip(fixed, blobs):
+                result['status'] = 'fixed'
+                result['fixed_blob'] = blob
+            self.stats['files_fixed'] += len(fixed)
+            print(f"✅ Blobs corregidos en el índice: {len(fixed)} (el árbol de trabajo no se modificó)")
+
+        return {
+            'success': True,
+            'stats': self.stats,
+            'stage_stats': self.stage_stats,
+            'needs_fix': 0 if write_index else len(fixed),
+            'results': results
+        }
+
+    def process_file(self, file_path: Path, stages: List[str]) -> Dict:
+        """Procesa un archivo por todas sus etapas con una lectura y una escritura."""
+        result = {
+            'file': str(file_path.relative_to(self.project_root)),
+            'status': 'no_changes',
+            'stages': {},
+            'errors': [],
+            'backup_path': None
+        }
+
+        try:
+            self.stats['files_processed'] += 1
+
+            # Sin los bytes que necesita alguna etapa, no leer ni decodificar
+            if not file_contains(file_path, self.prefilter_bytes(stages)):
+                return result
+
+            with open(file_path, 'rb') as f:
+                original, encoding = self.decode(f.read())
+
+            if original is None:
+                result['errors'].append('Could not decode file with any encoding')
+                result['status'] = 'error'
+                self.stats['errors'] += 1
+                return result
+
+            content = self.apply_stages(original, encoding, stages, file_path, result)
+
+            if content != original:
+                result['backup_path'] = self.create_backup(file_path)
+
+                # Se escribe en la codificación original, sin transcodificar
+                self.transaction.stage(file_path, content, encoding)
+
+                result['status'] = 'fixed'
+                self.stats['files_fixed'] += 1
+
+                print(f"✅ {result['file']}")
+                for stage, changes in result['stages'].items():
+                    for change in changes:
+                        print(f"   - [{stage}] {change}")
+
+            if result['errors']:
+                self.stats['errors'] += 1
+
+        except Exception as e:
+            result['errors'].append(str(e))
+            result['status'] = 'error'
+            self.stats['errors'] += 1
+            print(f"❌ Error procesando {file_path.name}: {e}")
+
+        return result
+
+    def process_files(self, files: List[Tuple[Path, List[str]]]) -> List[Dict]:
+        """Procesa los archivos; con timeout, cada uno en un proceso que se mata si lo excede."""
+        if not self.timeout:
+            return [self.process_file(file_path, stages) for file_path, stages in files]
+
+        self.transaction.delegate(file_path for file_path, _ in files)
+        results = []
+        # Si la ejecución se interrumpe, los trabajadores se detienen antes de que siga la excepción
+        with closing(run_with_budget(_process_in_worker, files, self.timeout,
+                                     initializer=_init_worker, initargs=(self,))) as outputs:
+            for (file_path, _), status, value in outputs:
+                if status == OK:
+                    result, stats, stage_stats, backups, transaction = value
+                    for key, count in stats.items():
+                        self.stats[key] += count
+                    for stage, count in stage_stats.items():
+                        self.stage_stats[stage] += count
+                    self.backups.files.update(backups)
+                    self.transaction.merge(transaction)
+                    results.append(result)
+                    continue
+
+                # El proceso fue interrumpido: el archivo queda sin modificar
+                self.transaction.discard([file_path])
+                self.stats['files_processed'] += 1
+                result = {
+                    'file': str(file_path.relative_to(self.project_root)),
+                    'status': 'timeout' if status == TIMEOUT else 'error',
+                    'stages': {},
+                    'errors': [],
+                    'backup_path': None
+                }
+                if status == TIMEOUT:
+                    result['errors'].append(f'Exceeded per-file time budget of {self.timeout:g}s')
+                    self.stats['timeouts'] += 1
+                    print(f"⏱️  Tiempo excedido: {result['file']}")
+                else:
+                    result['errors'].append(value)
+                    self.stats['errors'] += 1
+                    print(f"❌ Error procesando {file_path.name}: {value}")
+                results.append(result)
+
+        return results
+
+    def run(self, paths: Iterable[Path] = None) -> Dict:
+        """Ejecuta todas las etapas sobre el proyecto (o solo sobre paths, ver find_files)."""
+        if not self.project_root.exists():
+            print(f"❌ Error: El directorio {self.project_root} no existe")
+            return {'success': False, 'error': 'Project directory not found'}
+
+        files = self.find_files(paths)
+        print(f"🔍 Archivos encontrados: {len(files)}")
+
+        cache = ScanCache(self.project_root, self.cache_namespace(), self.ruleset_hash()) if self.use_cache else None
+        pending = []
+
+        for file_path, stages in files:
+            stat = file_path.stat() if cache else None
+            if cache and cache.is_clean(file_path, stat):
+                self.stats['files_processed'] += 1
+                continue
+            pending.append((file_path, stages, stat))
+
+        try:
+            results = self.process_files([(file_path, stages) for file_path, stages, _ in pending])
+            for (file_path, _, stat), result in zip(pending, results):
+                if cache and result['status'] == 'no_changes' and not result['errors']:
+                    cache.mark_clean(file_path, stat)
+
+            # El manifiesto se escribe antes de reemplazar los archivos, para poder restaurarlos
+            manifest = self.backups.commit()
+            self.transaction.commit()
+        except TransactionError as e:
+            print(f"❌ {e}")
+            print("↩️  Se deshicieron todas las escrituras de esta ejecución")
+            for result in results:
+                if result['status'] == 'fixed':
+                    result['status'] = 'error'
+                    result['errors'].append(str(e))
+                    self.stats['errors'] += 1
+            self.stats['files_fixed'] = 0
+            manifest = None
+        except BaseException:
+            # Una excepción o Ctrl+C no deja temporales en el árbol
+            self.transaction.abort()
+            raise
+
+        if cache:
+            cache.save()
+            print(f"⚡ Archivos limpios según la caché: {cache.hits}")
+
+        if manifest:
+            print(f"↩️  Para deshacer: python3 fix_backup.py restore --run {self.backups.run_id}")
+
+        print(f"📂 Archivos procesados: {self.stats['files_processed']}")
+        print(f"✅ Archivos corregidos: {self.stats['files_fixed']}")
+        for stage in self.stages:
+            print(f"   - {stage}: {self.stage_stats[stage]}")
+        print(f"💾 Backups creados: {self.stats['backups_created']}")
+        print(f"❌ Errores: {self.stats['errors']}")
+        if self.stats['timeouts']:
+            print(f"⏱️  Tiempo excedido: {self.stats['timeouts']}")
+
+        return {
+            'success': True,
+            'stats': self.stats,
+            'stage_stats': self.stage_stats,
+            'results': results
+        }
+
+# Instancia del pipeline en cada proceso trabajador (ver process_files)
+_worker_pipeline = None
+
+def _init_worker(pipeline: FixPipeline):
+    """Inicializa el proceso trabajador con una copia del pipeline."""
+    global _worker_pipeline
+    _worker_pipeline = pipeline
+
+def _process_in_worker(item: Tuple[Path, List[str]]) -> Tuple[Dict, Dict, Dict, Dict, WriteTransaction]:
+    """Procesa un archivo en un proceso trabajador.
+
+    Devuelve el resultado junto con las estadísticas, los backups y la
+    transacción (escrituras preparadas y fallos) solo de ese archivo.
+    """
+    file_path, stages = item
+    _worker_pipeline.stats = dict.fromkeys(_worker_pipeline.stats, 0)
+    _worker_pipeline.stage_stats = dict.fromkeys(_worker_pipeline.stage_stats, 0)
+    _worker_pipeline.backups.files = {}
+    _worker_pipeline.transaction = WriteTransaction(_worker_pipeline.transaction.token)
+    result = _worker_pipeline.process_file(file_path, stages)
+    return (result, _worker_pipeline.stats, _worker_pipeline.stage_stats,
+            _worker_pipeline.backups.files, _worker_pipeline.transaction)
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Prefiltro a nivel de bytes para los scripts de corrección del proyecto ayamas.
+Mapea el archivo en memoria y busca los bytes que cualquier regla necesita, para
+descartar archivos limpios sin decodificarlos a str.
+"""
+
+import mmap
+from pathlib import Path
+from typing import Sequence
+
+def file_contains(file_path: Path, needles: Sequence[bytes]) -> bool:
+    """Indica si el archivo contiene alguna de las secuencias de bytes.
+
+    Solo es válido para codificaciones compatibles con ASCII (utf-8, latin-1,
+    cp1252), donde un carácter ASCII siempre se codifica con su mismo byte.
+    """
+    with open(file_path, 'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return any(mapped.find(needle) != -1 for needle in needles)
+        except ValueError:
+            # mmap no admite archivos vacíos
+            return False
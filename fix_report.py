@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Reporte en streaming (JSONL) para los scripts de corrección del proyecto ayamas.
+Cada archivo procesado se agrega como una línea JSON compacta apenas termina, y
+la ejecución cierra con un registro de resumen; así la memoria no crece con la
+cantidad de archivos y el reporte parcial sobrevive si la ejecución se corta.
+
+Tipos de registro:
+    {"type": "file", ...resultado del archivo}
+    {"type": "rollback", "error": ...}    la transacción de escritura se deshizo
+    {"type": "summary", "timestamp": ..., "stats": ..., ...}
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Iterator
+
+class ReportStream:
+    """Escritor de un reporte JSONL, una línea por registro."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.file = open(self.path, 'w', encoding='utf-8')
+
+    def write(self, record_type: str, record: Dict):
+        self.file.write(json.dumps({'type': record_type, **record}, separators=(',', ':')))
+        self.file.write('\n')
+        # Cada registro llega al sistema operativo de inmediato: el reporte parcial no se pierde
+        self.file.flush()
+
+    def write_result(self, result: Dict):
+        self.write('file', result)
+
+    def close(self):
+        self.file.close()
+
+def read_report(path: Path) -> Iterator[Dict]:
+    """Lee los registros de un reporte JSONL, uno por vez."""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def iter_results(path: Path) -> Iterator[Dict]:
+    """Resultados por archivo de un reporte JSONL, sin el campo 'type'.
+
+    Si la transacción de escritura se deshizo, los archivos marcados como
+    corregidos se devuelven como errores, igual que en el reporte completo.
+    """
+    # Primera pasada (sin decodificar los archivos): buscar un registro de rollback
+    rollback = None
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('{"type":"rollback"'):
+                rollback = json.loads(line)['error']
+
+    for record in read_report(path):
+        if record.pop('type') != 'file':
+            continue
+        if rollback and record['status'] == 'fixed':
+            record['status'] = 'error'
+            record['errors'].append(rollback)
+        yield record
@@ -0,0 +1,637 @@
+#!/usr/bin/env python3
+"""
+Motor de reglas precompiladas para los scripts de corrección del proyecto ayamas.
+Compila cada lista de patrones una sola vez y une las reglas compatibles en una
+alternación con grupos nombrados que se aplica en una sola pasada. Las reglas
+también pueden traducirse a patrones bytes para aplicarlas sobre el contenido
+sin decodificar (ver byte_pattern), y una regla cuyos literales requeridos no
+están en el contenido no se aplica (ver required_literals y LiteralIndex).
+"""
+
+import codecs
+import os
+import re
+import string
+import time
+from bisect import bisect_right
+from functools import lru_cache
+from typing import (AbstractSet, AnyStr, Dict, FrozenSet, Iterable, Iterator, List, Match, Optional, Pattern,
+                    Sequence, Tuple)
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+from fix_timing import record_rule
+
+Rule = Tuple[str, str, str]
+
+# Requisito de un patrón: de cada conjunto, toda coincidencia contiene al menos un literal
+Requirement = Tuple[FrozenSet[str], ...]
+
+# Referencias numéricas (\1, \g<1>) y escapes de un patrón o plantilla
+_ESCAPE = re.compile(r'\\(?:([1-9][0-9]?)|g<([0-9]+)>|.)', re.DOTALL)
+
+def _shift_refs(text: str, offset: int) -> str:
+    """Desplaza las referencias a grupos numerados (\\1) de un patrón."""
+    def shift(match):
+        if match.group(1) is None:
+            return match.group()
+        return f'(?:\\{int(match.group(1)) + offset})'
+    return _ESCAPE.sub(shift, text)
+
+def _shift_template(text: str, offset: int) -> str:
+    """Desplaza las referencias de una plantilla de reemplazo."""
+    def shift(match):
+        number = match.group(1) or match.group(2)
+        if number is None:
+            return match.group()
+        return f'\\g<{int(number) + offset}>'
+    return _ESCAPE.sub(shift, text)
+
+def _common_prefix(patterns: Sequence[str]) -> str:
+    """Prefijo común que puede factorizarse de una alternación sin cambiar su significado.
+
+    Debe compilar por sí solo, no tener grupos ni alternativas, y cortar los
+    patrones en un límite de token (sin dejar un cuantificador al inicio del resto).
+    """
+    prefix = os.path.commonprefix(list(patterns))
+    while prefix:
+        rests = [pattern[len(prefix):] for pattern in patterns]
+        if '|' not in prefix and all(rest and rest[0] not in '*+?{' for rest in rests):
+            try:
+                if re.compile(prefix).groups == 0 and all(re.compile(rest) for rest in rests):
+                    return prefix
+            except re.error:
+                pass
+        prefix = prefix[:-1]
+    return prefix
+
+class RuleSet:
+    """Lista ordenada de reglas (patrón, reemplazo, descripción) compiladas una vez.
+
+    apply() produce el mismo contenido y la misma lista de descripciones que
+    aplicar re.sub regla por regla. Con merge=True el autor declara que las
+    reglas no se solapan ni crean coincidencias entre sí; entonces se unen en
+    una alternación con grupos nombrados, con el prefijo común factorizado, y
+    los reemplazos se despachan desde una sola pasada de finditer.
+
+    Sin merge las reglas se aplican en secuencia: el motor de re de CPython
+    pierde la búsqueda rápida por prefijo literal en una alternación, así que
+    unir reglas sin prefijo común resulta más lento que recorrerlas una a una.
+    """
+
+    def __init__(self, rules: Sequence[Rule], flags: int = 0, merge: bool = False):
+        self.rules = []
+        self.merge = merge
+        self.templates = []
+        self.combined = None
+        # Copias con patrones bytes por codificación (ver for_encoding)
+        self._encoded: Dict[str, object] = {}
+        # Codificación del contenido de las copias en bytes (None: contenido str)
+        self.encoding = None
+
+        for pattern, replacement, description in rules:
+            try:
+                compiled = re.compile(pattern, flags)
+            except re.error as e:
+                print(f"⚠️  Error aplicando patrón {pattern}: {e}")
+                continue
+            self.rules.append((compiled, replacement, description))
+
+        if merge and self.rules:
+            self._build_alternation(flags)
+
+        # Literales que necesita cada regla, buscados juntos en cada contenido
+        self.required = tuple(required_literals(compiled.pattern, compiled.flags) for compiled, _, _ in self.rules)
+        self.literals = literal_index(self.required)
+
+    def _build_alternation(self, flags: int):
+        """Une las reglas en una alternación: prefijo(?:(?P<r0>...)|(?P<r1>...))."""
+        patterns = [compiled.pattern for compiled, _, _ in self.rules]
+        prefix = _common_prefix(patterns)
+        alternatives = []
+        offset = 0
+
+        for index, (compiled, replacement, _) in enumerate(self.rules):
+            # Los grupos de cada regla se desplazan por los de las anteriores
+            rest = _shift_refs(compiled.pattern[len(prefix):], offset + 1)
+            alternatives.append(f'(?P<r{index}>{rest})')
+            self.templates.append(_shift_template(replacement, offset + 1))
+            offset += compiled.groups + 1
+
+        self.combined = re.compile(f"{prefix}(?:{'|'.join(alternatives)})", flags)
+
+    def for_encoding(self, encoding: str) -> 'RuleSet':
+        """Las mismas reglas con patrones bytes, para contenido sin decodificar en esa codificación.
+
+        Lanza ValueError si alguna regla no tiene traducción exacta (ver byte_pattern).
+        """
+        if encoding not in self._encoded:
+            try:
+                clone = RuleSet((), merge=self.merge)
+                clone.encoding = encoding
+                clone.required = self.required
+                clone.literals = self.literals
+                clone.rules = [(compile_bytes(compiled.pattern, compiled.flags, encoding),
+                                replacement.encode(encoding), description)
+                               for compiled, replacement, description in self.rules]
+                clone.templates = [template.encode(encoding) for template in self.templates]
+                if self.combined is not None:
+                    clone.combined = compile_bytes(self.combined.pattern, self.combined.flags, encoding)
+                self._encoded[encoding] = clone
+            except ValueError as e:
+                self._encoded[encoding] = e
+        encoded = self._encoded[encoding]
+        if isinstance(encoded, ValueError):
+            raise encoded
+        return encoded
+
+    def apply(self, content: AnyStr, timings: Optional[Dict[str, Dict]] = None,
+              present: AbstractSet[str] = None, skips: Optional[Dict[str, Dict]] = None) -> Tuple[AnyStr, List[str]]:
+        """Aplica las reglas y devuelve el contenido y las descripciones aplicadas.
+
+        El contenido es str, o bytes si las reglas salieron de for_encoding.
+        Si se pasa timings, se acumulan ahí el tiempo y las coincidencias de
+        cada regla (por descripción).
+
+        Las reglas con literales requeridos ausentes no se aplican (no pueden
+        coincidir). present son los literales presentes, si ya se buscaron
+        con un LiteralIndex que incluye los de estas reglas; en skips se
+        cuentan por regla los contenidos vistos y los omitidos.
+        """
+        if present is None:
+            present = self.literals.scan(content, self.encoding)
+        if timings is None and self.combined is not None:
+            active = [is_possible(required, present) for required in self.required]
+            if skips is not None:
+                for (_, _, description), runs in zip(self.rules, active):
+                    record_skip(skips, description, not runs)
+            # Si ninguna regla puede coincidir, aplicarlas en secuencia no cambia nada
+            return self._apply_merged(content) if any(active) else (content, [])
+
+        # En secuencia (también las reglas unidas al medir: por el contrato de
+        # merge, aplicarlas una por una da el mismo resultado que la pasada única)
+        changes = []
+        for (compiled, replacement, description), required in zip(self.rules, self.required):
+            runs = is_possible(required, present)
+            if skips is not None:
+                record_skip(skips, description, not runs)
+            if not runs:
+                continue
+            if timings is None:
+                fixed_content = compiled.sub(replacement, content)
+            else:
+                start = time.perf_counter()
+                fixed_content, matches = compiled.subn(replacement, content)
+                record_rule(timings, description, time.perf_counter() - start, matches)
+            if fixed_content != content:
+                changes.append(description)
+                content = fixed_content
+                # El reemplazo puede haber formado literales que piden las reglas siguientes
+                present = self.literals.scan(content, self.encoding, present)
+        return content, changes
+
+    def _apply_merged(self, content: AnyStr) -> Tuple[AnyStr, List[str]]:
+        """Despacha todos los reemplazos desde una sola pasada de finditer."""
+        fired = set()
+        parts = []
+        position = 0
+
+        for match in self.combined.finditer(content):
+            index = int(match.lastgroup[1:])
+            replacement = match.expand(self.templates[index])
+            if replacement != match.group():
+                fired.add(index)
+            parts.append(content[position:match.start()])
+            parts.append(replacement)
+            position = match.end()
+
+        if not parts:
+            return content, []
+
+        parts.append(content[position:])
+        changes = [self.rules[index][2] for index in sorted(fired)]
+        return content[:0].join(parts), changes
+
+@lru_cache(maxsize=None)
+def _compile(rules: Tuple[Rule, ...], flags: int, merge: bool) -> RuleSet:
+    return RuleSet(rules, flags, merge)
+
+def compile_rules(rules: Sequence[Rule], flags: int = 0, merge: bool = False) -> RuleSet:
+    """Devuelve el RuleSet de una lista de reglas, compilándolo solo la primera vez."""
+    return _compile(tuple(rules), flags, merge)
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT,
+            getattr(sre_constants, 'POSSESSIVE_REPEAT', sre_constants.MAX_REPEAT)}
+
+def _clauses(items) -> List[FrozenSet[str]]:
+    """Requisitos de una secuencia del árbol de sre_parse, en el formato de Requirement."""
+    clauses = []
+    run = []
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            run.append(chr(av))
+            continue
+        # Los literales seguidos forman una sola cadena requerida
+        if run:
+            clauses.append(frozenset([''.join(run)]))
+            run = []
+        if op is sre_constants.SUBPATTERN:
+            if not av[1] & re.IGNORECASE:
+                clauses.extend(_clauses(av[-1]))
+        elif op in _REPEATS:
+            if av[0] >= 1:
+                clauses.extend(_clauses(av[2]))
+        elif op is sre_constants.ASSERT:
+            clauses.extend(_clauses(av[1]))
+        elif op is sre_constants.BRANCH:
+            # Cada alternativa aporta su mejor requisito; si alguna no tiene, no hay requisito
+            best = [_best(_clauses(branch)) for branch in av[1]]
+            if all(best):
+                clauses.append(frozenset().union(*best))
+        elif op is sre_constants.IN and all(kind is sre_constants.LITERAL for kind, _ in av):
+            clauses.append(frozenset(chr(value) for _, value in av))
+    if run:
+        clauses.append(frozenset([''.join(run)]))
+    return clauses
+
+def _best(clauses: Sequence[FrozenSet[str]]) -> Optional[FrozenSet[str]]:
+    """El requisito más selectivo: el de literal más corto más largo y, a igualdad, con menos literales."""
+    return max(clauses, key=lambda clause: (min(map(len, clause)), -len(clause)), default=None)
+
+@lru_cache(maxsize=None)
+def required_literals(pattern: str, flags: int = 0) -> Requirement:
+    """Literales que toda coincidencia del patrón contiene, como conjuntos: de cada uno, al menos uno.
+
+    Sale del árbol del patrón: cadenas de literales seguidos, grupos y
+    repeticiones obligatorias, y de una alternación la unión del mejor
+    requisito de cada alternativa. Se conservan los de literales de 2 o más
+    caracteres (o el mejor, si no hay), y una tupla vacía indica que no hay
+    requisito seguro (p. ej. con IGNORECASE): la regla se aplica siempre.
+    """
+    if flags & re.IGNORECASE:
+        return ()
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return ()
+    if parsed.state.flags & re.IGNORECASE:
+        return ()
+    clauses = set(_clauses(parsed))
+    strong = [clause for clause in clauses if min(map(len, clause)) >= 2]
+    if strong:
+        return tuple(sorted(strong, key=sorted))
+    best = _best(list(clauses))
+    return (best,) if best else ()
+
+# Anclas que dependen de dónde empieza o termina el texto buscado
+_STRING_ANCHORS = {sre_constants.AT_BEGINNING, sre_constants.AT_BEGINNING_STRING,
+                   sre_constants.AT_END, sre_constants.AT_END_STRING}
+
+def _walk(items):
+    """Todos los nodos del árbol de sre_parse, también los de grupos, repeticiones y alternaciones."""
+    for op, av in items:
+        yield op, av
+        stack = [av]
+        while stack:
+            value = stack.pop()
+            if isinstance(value, sre_parse.SubPattern):
+                yield from _walk(value)
+            elif isinstance(value, (tuple, list)):
+                stack.extend(value)
+
+@lru_cache(maxsize=None)
+def separable(pattern: str, flags: int = 0) -> bool:
+    """Indica si buscar el patrón en textos unidos por '\\n' da las coincidencias de cada texto.
+
+    Se cumple si no usa anclas de principio o fin del texto (\\A, \\Z, y ^ o $
+    sin MULTILINE) ni lookarounds, que al borde de un texto verían los
+    caracteres del vecino; quedan aparte las coincidencias que cruzan la unión.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return False
+    # Con MULTILINE, ^ y $ se compilan como anclas de línea, y la unión es un salto de línea
+    anchors = _STRING_ANCHORS
+    if (flags | parsed.state.flags) & re.MULTILINE:
+        anchors = {sre_constants.AT_BEGINNING_STRING, sre_constants.AT_END_STRING}
+    for op, av in _walk(parsed):
+        if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            return False
+        if op is sre_constants.AT and av in anchors:
+            return False
+    return True
+
+def is_possible(required: Requirement, present: AbstractSet[str]) -> bool:
+    """Indica si un patrón con ese requisito puede coincidir en un contenido con esos literales."""
+    return all(not clause.isdisjoint(present) for clause in required)
+
+# Caracteres frecuentes en el código fuente: no sirven de ancla para buscar un literal
+_COMMON_CHARS = frozenset(string.ascii_letters + string.digits + string.whitespace + '.,;:()[]{}<>=+-*/_\'"!?&|')
+
+# Apariciones del ancla que se prueban antes de pasar a la búsqueda completa del literal
+_ANCHOR_PROBES = 16
+
+Needle = Tuple[str, Optional[AnyStr], Optional[AnyStr], int, List[str]]
+
+def _contains(content: AnyStr, needle: AnyStr, anchor: Optional[AnyStr], offset: int) -> bool:
+    """needle in content, buscando primero las apariciones del ancla (un carácter raro de needle).
+
+    La búsqueda de subcadenas de CPython es lenta cuando el último carácter
+    del literal es frecuente (p. ej. la n de \\n); un carácter raro se
+    encuentra a la velocidad de memchr y casi nunca aparece.
+    """
+    if anchor is None:
+        return needle in content
+    position = content.find(anchor)
+    for _ in range(_ANCHOR_PROBES):
+        if position == -1:
+            return False
+        if position >= offset and content.startswith(needle, position - offset):
+            return True
+        position = content.find(anchor, position + 1)
+    # Ancla frecuente en este contenido: el literal no empieza antes de la última probada
+    return position != -1 and content.find(needle, max(0, position - offset)) != -1
+
+def _find(content: AnyStr, needle: AnyStr, anchor: Optional[AnyStr], offset: int, start: int) -> int:
+    """content.find(needle, start), buscando primero el ancla como en _contains."""
+    if anchor is not None:
+        position = content.find(anchor, start + offset)
+        for _ in range(_ANCHOR_PROBES):
+            if position == -1:
+                return -1
+            if content.startswith(needle, position - offset):
+                return position - offset
+            position = content.find(anchor, position + 1)
+        if position == -1:
+            return -1
+        start = position - offset
+    return content.find(needle, start)
+
+class LiteralIndex:
+    """Los literales requeridos por un grupo de patrones, buscados una vez por contenido.
+
+    Cada literal distinto se busca una sola vez aunque lo requieran varias
+    reglas, del más corto al más largo: si falta uno, los que lo contienen se
+    dan por ausentes sin buscarlos. Cada búsqueda es la de subcadenas de
+    CPython (en C), anclada en un carácter poco frecuente del literal si lo
+    tiene; es más rápida que una alternación de re o que un autómata de
+    Aho-Corasick escrito en Python.
+    """
+
+    def __init__(self, requirements: Iterable[Requirement]):
+        atoms = {atom for required in requirements for clause in required for atom in clause}
+        self.atoms = sorted(atoms, key=lambda atom: (len(atom), atom))
+        # Literales más cortos contenidos en cada uno
+        self._parts = {atom: [part for part in self.atoms if len(part) < len(atom) and part in atom]
+                       for atom in self.atoms}
+        self._needles: Dict[Optional[str], List[Needle]] = {}
+
+    def _encoded(self, encoding: Optional[str]) -> List[Needle]:
+        """(literal, lo que se busca, ancla, posición del ancla, literales contenidos).
+
+        Lo que se busca es None si el literal no se puede codificar; el ancla,
+        None si el literal no tiene caracteres poco frecuentes.
+        """
+        if encoding not in self._needles:
+            needles = []
+            for atom in self.atoms:
+                rare = [char for char in atom if char not in _COMMON_CHARS]
+                try:
+                    needle = atom if encoding is None else atom.encode(encoding)
+                    anchor = (rare[0] if encoding is None else rare[0].encode(encoding)) if rare else None
+                except UnicodeEncodeError:
+                    needle = anchor = None
+                offset = needle.find(anchor) if anchor is not None else 0
+                needles.append((atom, needle, anchor, offset, self._parts[atom]))
+            self._needles[encoding] = needles
+        return self._needles[encoding]
+
+    def scan(self, content: AnyStr, encoding: str = None, known: AbstractSet[str] = frozenset()) -> FrozenSet[str]:
+        """Literales presentes en el contenido (str, o bytes en esa codificación).
+
+        Los de known se dan por presentes sin buscarlos (p. ej. los de antes de
+        un reemplazo: dar de más solo hace que se aplique una regla sin efecto).
+        """
+        present = set(known)
+        absent = set()
+        for atom, needle, anchor, offset, parts in self._encoded(encoding if isinstance(content, bytes) else None):
+            if atom in present:
+                continue
+            if (needle is None or any(part in absent for part in parts)
+                    or not _contains(content, needle, anchor, offset)):
+                absent.add(atom)
+            else:
+                present.add(atom)
+        return frozenset(present)
+
+    def scan_segments(self, content: AnyStr, segments: Sequence[Tuple[int, int]],
+                      encoding: str = None) -> List[FrozenSet[str]]:
+        """scan de cada tramo content[inicio:fin] de un contenido unido (tramos ordenados, sin solaparse).
+
+        Cada literal se busca a lo largo de todo el contenido, pero después
+        de encontrarlo en un tramo la búsqueda salta al siguiente: el costo
+        depende de los tramos que lo tienen, no de cuántos tramos hay.
+        """
+        starts = [start for start, _ in segments]
+        present = [set() for _ in segments]
+        for atom, needle, anchor, offset, _ in self._encoded(encoding if isinstance(content, bytes) else None):
+            if needle is None:
+                continue
+            position = _find(content, needle, anchor, offset, starts[0] if starts else 0)
+            while position != -1:
+                segment = bisect_right(starts, position) - 1
+                if position + len(needle) > segments[segment][1]:
+                    # Aparición que cruza el final del tramo (o entre dos tramos)
+                    resume = position + 1
+                else:
+                    present[segment].add(atom)
+                    resume = segments[segment + 1][0] if segment + 1 < len(segments) else len(content)
+                position = _find(content, needle, anchor, offset, resume)
+        return [frozenset(found) for found in present]
+
+@lru_cache(maxsize=None)
+def literal_index(requirements: Tuple[Requirement, ...]) -> LiteralIndex:
+    """Devuelve el LiteralIndex de un grupo de requisitos, armándolo solo la primera vez."""
+    return LiteralIndex(requirements)
+
+def record_skip(skips: Dict[str, Dict], name: str, skipped: bool):
+    """Cuenta un contenido visto por una regla y si se omitió por el prefiltro de literales."""
+    entry = skips.get(name)
+    if entry is None:
+        entry = skips[name] = {'files': 0, 'skipped': 0}
+    entry['files'] += 1
+    entry['skipped'] += skipped
+
+def merge_rule_skips(target: Dict[str, Dict], source: Dict[str, Dict]):
+    """Suma los conteos de omisiones por regla de otro proceso."""
+    for name, entry in source.items():
+        current = target.setdefault(name, {'files': 0, 'skipped': 0})
+        for key in current:
+            current[key] += entry[key]
+
+def merge_skip_reports(reports: Sequence[List[Dict]]) -> List[Dict]:
+    """Combina los skip_report de varias ejecuciones parciales (p. ej. shards)."""
+    skips: Dict[str, Dict] = {}
+    for report in reports:
+        merge_rule_skips(skips, {entry['rule']: entry for entry in report})
+    return skip_report(skips)
+
+def skip_report(skips: Dict[str, Dict]) -> List[Dict]:
+    """Tasa de omisión por regla, de la más omitida a la menos."""
+    rules = [{'rule': name, 'files': entry['files'], 'skipped': entry['skipped'],
+              'skip_rate': round(entry['skipped'] / entry['files'], 4) if entry['files'] else 0.0}
+             for name, entry in skips.items()]
+    return sorted(rules, key=lambda rule: (-rule['skip_rate'], rule['rule']))
+
+# Piezas de un patrón: una clase [...], un escape o un carácter suelto
+_PATTERN_TOKEN = re.compile(r'\[\^?\]?(?:\\.|[^\]\\])*\]|\\.|.', re.DOTALL)
+_CLASS_ESCAPES = {'\\s', '\\S', '\\d', '\\D', '\\w', '\\W'}
+
+# Clase que no acepta ningún byte (a diferencia de (?!) admite cuantificadores)
+_NO_BYTE = '[^\\x00-\\xff]'
+
+def _hex(data: bytes) -> str:
+    return ''.join(f'\\x{value:02x}' for value in data)
+
+@lru_cache(maxsize=None)
+def byte_table(encoding: str) -> Tuple[Optional[str], ...]:
+    """Carácter de cada byte en una codificación de un byte por carácter (None si no está definido).
+
+    Lanza ValueError si la codificación no es compatible con ASCII o usa
+    varios bytes por carácter (como UTF-8).
+    """
+    decoder = codecs.getincrementaldecoder(encoding)
+    table = []
+    for value in range(256):
+        try:
+            char = decoder().decode(bytes([value]))
+        except UnicodeDecodeError:
+            char = None
+        if char == '':
+            # El decodificador espera más bytes: es un carácter de varios bytes
+            raise ValueError(f'{encoding} no usa un byte por carácter')
+        table.append(char)
+    if any(table[value] != chr(value) for value in range(128)):
+        raise ValueError(f'{encoding} no es compatible con ASCII')
+    return tuple(table)
+
+@lru_cache(maxsize=None)
+def defined_bytes(encoding: str) -> bytes:
+    """Bytes que tienen carácter en la codificación (para validar sin decodificar)."""
+    return bytes(value for value, char in enumerate(byte_table(encoding)) if char is not None)
+
+def byte_pattern(pattern: str, flags: int, encoding: str) -> bytes:
+    """Traduce un patrón str a un patrón bytes para contenido sin decodificar.
+
+    Solo para codificaciones de un byte por carácter compatibles con ASCII:
+    cada clase (incluidos ., \\s, \\w, ...) pasa a ser el conjunto de bytes
+    cuyos caracteres acepta, así que sobre los bytes el patrón encuentra las
+    mismas coincidencias, con los mismos grupos, que el original sobre el
+    texto decodificado (\\s de str, por ejemplo, también acepta \\x1c-\\x1f y
+    el \\xa0 de latin-1, que \\s de bytes no acepta). Lanza ValueError si no
+    hay traducción exacta (IGNORECASE, \\b, UTF-8, ...).
+    """
+    if flags & (re.IGNORECASE | re.LOCALE):
+        raise ValueError(f'{pattern!r}: IGNORECASE no se traduce a bytes')
+    table = byte_table(encoding)
+
+    parts = []
+    for token in _PATTERN_TOKEN.findall(pattern):
+        if token in ('\\b', '\\B'):
+            raise ValueError(f'{pattern!r}: \\b no se traduce a bytes')
+        if (token[0] == '[' and len(token) > 1) or token == '.' or token in _CLASS_ESCAPES:
+            matcher = re.compile(token, flags)
+            values = bytes(value for value, char in enumerate(table) if char is not None and matcher.fullmatch(char))
+            parts.append(f'[{_hex(values)}]' if values else _NO_BYTE)
+        elif token.isascii():
+            parts.append(token)
+        else:
+            parts.append(_hex(token.encode(encoding)))
+    return ''.join(parts).encode('ascii')
+
+@lru_cache(maxsize=None)
+def _compile_bytes(pattern: str, flags: int, encoding: str):
+    try:
+        return re.compile(byte_pattern(pattern, flags, encoding), flags & ~re.UNICODE)
+    except re.error as e:
+        return ValueError(f'{pattern!r} no se traduce a bytes en {encoding}: {e}')
+    except ValueError as e:
+        return e
+
+def compile_bytes(pattern: str, flags: int, encoding: str) -> Pattern[bytes]:
+    """Compila (una sola vez) la traducción a bytes de un patrón; ValueError si no la tiene."""
+    compiled = _compile_bytes(pattern, flags, encoding)
+    if isinstance(compiled, ValueError):
+        raise compiled
+    return compiled
+
+def decodes(raw: bytes, encoding: str) -> bool:
+    """Indica si el contenido es válido en una codificación de un byte por carácter, sin decodificarlo."""
+    # Basta con que no quede ningún byte sin carácter
+    return not raw.translate(None, defined_bytes(encoding))
+
+class LineIndex:
+    """Convierte posiciones del contenido en números de línea (base 1).
+
+    Los offsets de inicio de línea se calculan solo la primera vez que se
+    necesitan, así que un archivo sin coincidencias no paga por el índice.
+    El contenido puede ser str o bytes (y entonces los literales también).
+    """
+
+    def __init__(self, content: AnyStr):
+        self.content = content
+        self.newline = '\n' if isinstance(content, str) else b'\n'
+        self._starts = None
+
+    @property
+    def starts(self) -> List[int]:
+        if self._starts is None:
+            starts = [0]
+            find = self.content.find
+            position = find(self.newline)
+            while position != -1:
+                starts.append(position + 1)
+                position = find(self.newline, position + 1)
+            self._starts = starts
+        return self._starts
+
+    def line_number(self, offset: int) -> int:
+        """Número de línea de una posición."""
+        return bisect_right(self.starts, offset)
+
+    def line(self, number: int) -> AnyStr:
+        """Texto de una línea, sin el salto final (como content.split('\\n'))."""
+        starts = self.starts
+        end = starts[number] - 1 if number < len(starts) else len(self.content)
+        return self.content[starts[number - 1]:end]
+
+    def _line_end(self, offset: int) -> int:
+        end = self.content.find(self.newline, offset)
+        return len(self.content) if end == -1 else end
+
+    def lines_with(self, literal: AnyStr) -> List[int]:
+        """Líneas que contienen el literal, en orden y sin repetir."""
+        lines = []
+        find = self.content.find
+        position = find(literal)
+        while position != -1:
+            lines.append(self.line_number(position))
+            # Basta una aparición por línea: saltar al final de la línea
+            position = find(literal, self._line_end(position + len(literal)) + 1)
+        return lines
+
+    def first_matches(self, pattern: Pattern) -> Iterator[Match]:
+        """La primera coincidencia de cada línea que tiene alguna, de un patrón que no cruza saltos de línea."""
+        match = pattern.search(self.content)
+        while match:
+            yield match
+            match = pattern.search(self.content, self._line_end(match.end()) + 1)
+
+    def lines_matching(self, pattern: Pattern) -> List[int]:
+        """Líneas con alguna coincidencia de un patrón que no cruza saltos de línea."""
+        return [self.line_number(match.start()) for match in self.first_matches(pattern)]
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Planificación por costo para las ejecuciones en paralelo del proyecto ayamas.
+Recuerda cuánto tardó cada archivo en ejecuciones anteriores (o lo estima por
+su tamaño si no hay historia) y reparte el trabajo del más costoso al menos
+costoso (LPT), para que unos pocos archivos pesados que empiezan al final no
+alarguen la ejecución.
+"""
+
+import heapq
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from fix_cache import CACHE_DIR
+
+COSTS_FILE = 'costs.sqlite'
+
+# Velocidad supuesta cuando todavía no hay historia (bytes por segundo)
+DEFAULT_BYTES_PER_SECOND = 2 * 1024 * 1024
+
+# Lotes por proceso: más lotes equilibran mejor, menos amortizan la comunicación
+BATCHES_PER_JOB = 8
+
+class CostModel:
+    """Costo por archivo de ejecuciones anteriores, guardado en SQLite junto a la caché."""
+
+    def __init__(self, project_root, namespace: str):
+        self.project_root = Path(project_root)
+        self.namespace = namespace
+        self.from_history = 0
+        self.from_size = 0
+        self._pending: Dict[str, Tuple[int, float]] = {}
+
+        cache_dir = self.project_root / CACHE_DIR
+        cache_dir.mkdir(exist_ok=True)
+        self._conn = sqlite3.connect(str(cache_dir / COSTS_FILE))
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS file_costs (
+                namespace TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                seconds REAL NOT NULL,
+                PRIMARY KEY (namespace, path)
+            )
+        """)
+        rows = self._conn.execute("SELECT path, size, seconds FROM file_costs WHERE namespace = ?", (namespace,))
+        self.history = {path: (size, seconds) for path, size, seconds in rows}
+
+        # Velocidad observada en la historia, para estimar los archivos nuevos
+        total_bytes = sum(size for size, _ in self.history.values())
+        total_seconds = sum(seconds for _, seconds in self.history.values())
+        self.bytes_per_second = (total_bytes / total_seconds if total_bytes and total_seconds
+                                 else DEFAULT_BYTES_PER_SECOND)
+
+    def _key(self, file_path: Path) -> str:
+        return os.path.relpath(file_path, self.project_root)
+
+    def estimate(self, file_path: Path, size: int) -> float:
+        """Segundos estimados: la última medición (escalada si cambió el tamaño) o tamaño / velocidad."""
+        entry = self.history.get(self._key(file_path))
+        if entry is not None:
+            self.from_history += 1
+            previous_size, seconds = entry
+            return seconds * size / previous_size if previous_size else seconds
+        self.from_size += 1
+        return size / self.bytes_per_second
+
+    def record(self, file_path: Path, size: int, seconds: float):
+        self._pending[self._key(file_path)] = (size, seconds)
+
+    def save(self):
+        """Guarda las mediciones de esta ejecución y cierra la conexión."""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO file_costs VALUES (?, ?, ?, ?)",
+                [(self.namespace, key, size, seconds) for key, (size, seconds) in self._pending.items()])
+        self._conn.close()
+
+def plan_batches(costs: Sequence[float], jobs: int) -> List[List[int]]:
+    """Agrupa los índices en lotes, del más costoso al menos costoso.
+
+    Los archivos que por sí solos superan el costo objetivo de un lote van
+    solos (y primero); los demás se juntan hasta llegar al objetivo, para no
+    pagar la comunicación entre procesos por cada archivo pequeño.
+    """
+    order = sorted(range(len(costs)), key=lambda index: costs[index], reverse=True)
+    target = sum(costs) / (max(1, jobs) * BATCHES_PER_JOB)
+    batches = []
+    current, current_cost = [], 0.0
+    for index in order:
+        if costs[index] >= target:
+            batches.append([index])
+            continue
+        current.append(index)
+        current_cost += costs[index]
+        if current_cost >= target:
+            batches.append(current)
+            current, current_cost = [], 0.0
+    if current:
+        batches.append(current)
+    return batches
+
+def predict_makespan(costs: Sequence[float], jobs: int) -> float:
+    """Duración prevista si cada costo se asigna, en orden, al proceso que se libera primero."""
+    loads = [0.0] * max(1, jobs)
+    for cost in costs:
+        heapq.heapreplace(loads, loads[0] + cost)
+    return max(loads)
+
+def in_input_order(outputs: Iterable[Tuple[int, Any]]) -> Iterator[Any]:
+    """Reordena pares (índice, valor) que llegan en otro orden y produce los valores por índice.
+
+    Solo retiene los valores que llegaron antes que los que faltan.
+    """
+    done = {}
+    next_index = 0
+    for index, value in outputs:
+        done[index] = value
+        while next_index in done:
+            yield done.pop(next_index)
+            next_index += 1
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Servidor JSON-RPC de corrección para el proyecto ayamas.
+Mantiene en memoria las reglas compiladas y la caché de escaneo entre pedidos,
+para que las integraciones con el editor y los hooks previos al build no paguen
+en cada llamada el arranque del intérprete, las importaciones y el recorrido
+completo del árbol.
+
+Protocolo: JSON-RPC 2.0, un mensaje JSON por línea, por stdin/stdout o por un
+socket Unix. Métodos:
+    fix_text   {"text": ..., "path": "x.js"}   corrige un texto, sin tocar archivos
+    scan_paths {"paths": [...]}                 detecta problemas, sin modificar
+    fix_paths  {"paths": [...]}                 corrige los archivos (con backup)
+    stats      {}                               estadísticas acumuladas
+    shutdown   {}                               guarda la caché y termina
+
+Uso:
+    python3 fix_server.py [--root RUTA]                  # stdin/stdout
+    python3 fix_server.py --socket /tmp/ayamas-fix.sock   # socket Unix
+"""
+
+import argparse
+import contextlib
+import inspect
+import json
+import os
+import socket
+import socketserver
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from fix_backup import BackupStore
+from fix_cache import ScanCache
+from fix_newlines_improved import NewlineFixer
+from fix_prefilter import file_contains
+from fix_transaction import WriteTransaction
+
+# Códigos de error de JSON-RPC 2.0
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+class RPCError(Exception):
+    """Error que se devuelve al cliente con su código JSON-RPC."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+class FixServer:
+    """Estado caliente del servidor: un NewlineFixer y su caché, compartidos por todos los pedidos."""
+
+    def __init__(self, project_root: str, use_cache: bool = True):
+        self.fixer = NewlineFixer(project_root)
+        self.project_root = self.fixer.project_root
+        self.cache = (ScanCache(self.project_root, 'newlines_improved', self.fixer.ruleset_hash())
+                      if use_cache else None)
+        self.requests = 0
+        self.running = True
+        self.methods: Dict[str, Callable] = {
+            'fix_text': self.fix_text,
+            'scan_paths': self.scan_paths,
+            'fix_paths': self.fix_paths,
+            'stats': self.get_stats,
+            'shutdown': self.shutdown,
+        }
+        # Compilar todas las reglas ahora y no en el primer pedido
+        for name in ('warmup.js', 'warmup.json', 'warmup.md'):
+            self.fixer.fix_content('', Path(name))
+
+    def fix_text(self, text: str, path: str = 'untitled.js') -> Dict:
+        """Corrige un texto con las reglas del tipo de archivo de path, sin acceder al disco."""
+        problems = self.fixer.detect_problems(text, Path(path))
+        if not problems:
+            return {'text': text, 'changed': False, 'changes': [], 'problems_detected': []}
+        fixed, changes = self.fixer.fix_content(text, Path(path))
+        return {'text': fixed, 'changed': fixed != text, 'changes': changes, 'problems_detected': problems}
+
+    def resolve(self, paths: List[str]) -> List[Path]:
+        """Rutas absolutas dentro del proyecto (las relativas son relativas a la raíz)."""
+        if not isinstance(paths, list) or not all(isinstance(path, str) for path in paths):
+            raise RPCError(INVALID_PARAMS, 'paths must be a list of strings')
+        resolved = []
+        for path in paths:
+            file_path = Path(os.path.normpath(self.project_root / path))
+            if os.path.relpath(file_path, self.project_root).startswith('..'):
+                raise RPCError(INVALID_PARAMS, f'Path outside project: {path}')
+            resolved.append(file_path)
+        return resolved
+
+    def scan_paths(self, paths: List[str]) -> Dict:
+        """Detecta problemas en los archivos indicados, sin modificarlos."""
+        results = []
+        for file_path in self.resolve(paths):
+            result = self.fixer.new_result(file_path)
+            if not self.fixer.is_candidate(file_path):
+                results.append(result)
+                continue
+            stat = file_path.stat()
+            if self.cache and self.cache.is_clean(file_path, stat):
+                result['status'] = 'no_problems'
+                results.append(result)
+                continue
+            content = self.fixer.read_text(file_path) if file_contains(file_path, self.fixer.prefilter_bytes) else ''
+            if content is None:
+                result['status'] = 'error'
+                result['errors'].append('Could not decode file with any encoding')
+            else:
+                result['problems_detected'] = self.fixer.detect_problems(content, file_path)
+                result['status'] = 'problems' if result['problems_detected'] else 'no_problems'
+            if self.cache and result['status'] == 'no_problems':
+                self.cache.mark_clean(file_path, stat)
+            results.append(result)
+        if self.cache:
+            self.cache.flush()
+        return {'results': results}
+
+    def fix_paths(self, paths: List[str]) -> Dict:
+        """Corrige los archivos indicados; cada pedido es una ejecución con su backup y su transacción."""
+        fixer = self.fixer
+        fixer.backups = BackupStore(self.project_root, 'fix_server',
+                                    run_id=f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.requests}")
+        fixer.transaction = WriteTransaction()
+
+        results = []
+        try:
+            for file_path in self.resolve(paths):
+                if not self.fixer.is_candidate(file_path):
+                    results.append(fixer.new_result(file_path))
+                    continue
+                stat = file_path.stat()
+                if self.cache and self.cache.is_clean(file_path, stat):
+                    results.append(fixer.new_result(file_path, 'no_problems'))
+                    continue
+                result = fixer.process_file(file_path)
+                if self.cache and result['status'] == 'no_problems':
+                    self.cache.mark_clean(file_path, stat)
+                results.append(result)
+
+            # El manifiesto se escribe antes de reemplazar los archivos, para poder restaurarlos
+            fixer.backups.commit()
+            fixer.commit_writes(results)
+        except BaseException:
+            # Un pedido que falla (p. ej. una ruta inexistente) no deja temporales en el árbol
+            fixer.transaction.abort()
+            raise
+        if self.cache:
+            self.cache.flush()
+        backup_run = fixer.backups.run_id if fixer.backups.files else None
+        return {'results': results, 'backup_run': backup_run}
+
+    def get_stats(self) -> Dict:
+        return {'requests': self.requests, 'stats': self.fixer.stats,
+                'cache_hits': self.cache.hits if self.cache else 0}
+
+    def shutdown(self) -> Dict:
+        self.running = False
+        return {'requests': self.requests}
+
+    def close(self):
+        if self.cache:
+            self.cache.save()
+            self.cache = None
+
+    def handle(self, line: str) -> Optional[Dict]:
+        """Atiende un mensaje JSON-RPC; devuelve la respuesta (None para notificaciones)."""
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return {'jsonrpc': '2.0', 'id': None, 'error': {'code': PARSE_ERROR, 'message': str(e)}}
+
+        request_id = request.get('id') if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+                raise RPCError(INVALID_REQUEST, 'Invalid request')
+            method = self.methods.get(request['method'])
+            if method is None:
+                raise RPCError(METHOD_NOT_FOUND, f"Method not found: {request['method']}")
+            params = request.get('params', {})
+            if not isinstance(params, dict):
+                raise RPCError(INVALID_PARAMS, 'params must be an object')
+            self.requests += 1
+            try:
+                inspect.signature(method).bind(**params)
+            except TypeError as e:
+                raise RPCError(INVALID_PARAMS, str(e))
+            # Los mensajes de los correctores van a stderr: stdout puede ser el canal del protocolo
+            with contextlib.redirect_stdout(sys.stderr):
+                result = method(**params)
+            response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+        except RPCError as e:
+            response = {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': e.code, 'message': str(e)}}
+        except Exception as e:
+            response = {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': INTERNAL_ERROR, 'message': str(e)}}
+
+        # Sin 'id' es una notificación: no lleva respuesta
+        if isinstance(request, dict) and 'id' not in request:
+            return None
+        return response
+
+def serve_stdio(server: FixServer):
+    """Atiende pedidos por stdin/stdout hasta EOF o shutdown."""
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        response = server.handle(line)
+        if response is not None:
+            sys.stdout.write(json.dumps(response) + '\n')
+            sys.stdout.flush()
+        if not server.running:
+            break
+
+class _ConnectionHandler(socketserver.StreamRequestHandler):
+    """Una conexión del socket Unix: varios pedidos, uno por línea."""
+
+    def handle(self):
+        fix_server = self.server.fix_server
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = fix_server.handle(line.decode('utf-8'))
+            if response is not None:
+                self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+                self.wfile.flush()
+            if not fix_server.running:
+                break
+
+def serve_unix(server: FixServer, socket_path: str):
+    """Atiende pedidos por un socket Unix, de a una conexión (el estado no es compartible entre hilos)."""
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    with socketserver.UnixStreamServer(socket_path, _ConnectionHandler) as unix_server:
+        unix_server.fix_server = server
+        print(f"🔌 Escuchando en {socket_path}", file=sys.stderr)
+        try:
+            while server.running:
+                unix_server.handle_request()
+        finally:
+            os.unlink(socket_path)
+
+class FixClient:
+    """Cliente mínimo para el socket Unix del servidor."""
+
+    def __init__(self, socket_path: str):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.file = self.sock.makefile('rwb')
+        self.next_id = 0
+
+    def call(self, method: str, **params) -> Dict:
+        self.next_id += 1
+        request = {'jsonrpc': '2.0', 'id': self.next_id, 'method': method, 'params': params}
+        self.file.write(json.dumps(request).encode('utf-8') + b'\n')
+        self.file.flush()
+        response = json.loads(self.file.readline())
+        if 'error' in response:
+            raise RPCError(response['error']['code'], response['error']['message'])
+        return response['result']
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Servidor JSON-RPC de corrección")
+    parser.add_argument('--root', default="/Users/rafaelramos/Desktop/ayamas",
+                        help="Directorio raíz del proyecto")
+    parser.add_argument('--socket', help="Escuchar en este socket Unix en vez de stdin/stdout")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="No usar la caché incremental de escaneo")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.root):
+        print(f"❌ Error: El directorio {args.root} no existe", file=sys.stderr)
+        sys.exit(1)
+
+    server = FixServer(args.root, use_cache=not args.no_cache)
+    try:
+        if args.socket:
+            serve_unix(server, args.socket)
+        else:
+            serve_stdio(server)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Ejecución repartida en shards para los scripts de corrección del proyecto ayamas.
+Cada runner de CI procesa solo los archivos de su shard (--shard i/N en
+fix_newlines_improved.py), elegidos por un hash estable de la ruta relativa, y
+después merge-reports combina los reportes en uno equivalente al de una
+ejecución completa.
+
+Uso:
+    python3 fix_newlines_improved.py --shard 1/4     (en cada runner, 1/4 ... 4/4)
+    python3 fix_shard.py merge-reports shard1.json shard2.json ... [-o newline_fix_report.json]
+
+Los reportes de shards ejecutados con --stream-report (.jsonl) también se
+combinan; con -o terminado en .jsonl el reporte combinado también es JSONL.
+"""
+
+import argparse
+import json
+import sys
+import zlib
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from fix_report import ReportStream, iter_results, read_report
+from fix_rules import merge_skip_reports
+from fix_timing import merge_timing_reports
+
+class ShardError(Exception):
+    """Especificación de shard inválida o reportes que no forman una ejecución completa."""
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """Convierte 'i/N' (1 <= i <= N) en (i, N)."""
+    try:
+        index, count = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise ShardError(f"Shard inválido: {text!r} (formato i/N)")
+    if not 1 <= index <= count:
+        raise ShardError(f"Shard inválido: {text!r} (se requiere 1 <= i <= N)")
+    return index, count
+
+def in_shard(rel_path: str, index: int, count: int) -> bool:
+    """Indica si la ruta relativa (con '/') pertenece al shard index de count.
+
+    crc32 es estable entre procesos, versiones de Python y sistemas (a
+    diferencia de hash()), así que todos los runners reparten igual.
+    """
+    return zlib.crc32(rel_path.encode('utf-8')) % count == index - 1
+
+def load_report(path: Path) -> Dict:
+    """Lee el reporte de un shard: el JSON completo o el JSONL de --stream-report.
+
+    Del JSONL se toman los datos generales (estadísticas, shard, ...) del
+    registro de resumen y los resultados de los registros por archivo.
+    """
+    path = Path(path)
+    try:
+        if path.suffix != '.jsonl':
+            with open(path) as f:
+                return json.load(f)
+        summary = next((record for record in read_report(path) if record['type'] == 'summary'), None)
+        if summary is None:
+            raise ShardError(f"{path}: el reporte JSONL no tiene registro de resumen (¿la ejecución se cortó?)")
+        report = {key: value for key, value in summary.items() if key != 'type'}
+        report['results'] = list(iter_results(path))
+    except ValueError as e:
+        raise ShardError(f"{path}: reporte ilegible ({e})")
+    return report
+
+def write_report(report: Dict, path: Path):
+    """Guarda el reporte combinado: JSONL (como --stream-report) si path termina en .jsonl, si no JSON."""
+    path = Path(path)
+    if path.suffix != '.jsonl':
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        return
+    stream = ReportStream(path)
+    for result in report['results']:
+        stream.write_result(result)
+    stream.write('summary', {key: value for key, value in report.items() if key != 'results'})
+    stream.close()
+
+def merge_reports(reports: List[Dict]) -> Dict:
+    """Combina los reportes de todos los shards de una ejecución.
+
+    Las estadísticas son sumas por archivo y cada archivo está en exactamente
+    un shard, así que la suma es igual a la de una ejecución completa; los
+    resultados quedan en el mismo orden que los de find_files.
+    """
+    shards = sorted(parse_shard(report.get('shard', '')) for report in reports)
+    count = shards[0][1] if shards else 0
+    if shards != [(index, count) for index in range(1, count + 1)]:
+        found = ', '.join(f'{index}/{total}' for index, total in shards)
+        raise ShardError(f"Los reportes no forman un juego completo de shards: {found}")
+
+    stats = dict.fromkeys(reports[0]['stats'], 0)
+    results = []
+    for report in reports:
+        for key, value in report['stats'].items():
+            stats[key] = stats.get(key, 0) + value
+        results.extend(report['results'])
+    results.sort(key=lambda result: Path(result['file']))
+
+    backup_runs = sorted({report['backup_run'] for report in reports})
+    merged = {
+        'timestamp': max(report['timestamp'] for report in reports),
+        'backup_run': backup_runs[0] if len(backup_runs) == 1 else None,
+        'backup_runs': backup_runs,
+        'stats': stats,
+        'results': results,
+    }
+    if any('prefilter' in report for report in reports):
+        merged['prefilter'] = merge_skip_reports([report.get('prefilter', []) for report in reports])
+    if all('timings' in report for report in reports):
+        merged['timings'] = merge_timing_reports([report['timings'] for report in reports])
+    return merged
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Ejecución repartida en shards")
+    commands = parser.add_subparsers(dest='command', required=True)
+    merge = commands.add_parser('merge-reports', help="Combina los reportes de todos los shards")
+    merge.add_argument('reports', nargs='+',
+                       help="newline_fix_report.json (o .jsonl, con --stream-report) de cada shard")
+    merge.add_argument('-o', '--output', default='newline_fix_report.json',
+                       help="Reporte combinado (JSONL si termina en .jsonl)")
+    args = parser.parse_args()
+
+    if args.command == 'merge-reports':
+        try:
+            merged = merge_reports([load_report(path) for path in args.reports])
+        except ShardError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+        write_report(merged, args.output)
+
+        stats = merged['stats']
+        print(f"🧩 {len(args.reports)} shards combinados")
+        print(f"📂 Archivos procesados: {stats['files_processed']}")
+        print(f"✅ Archivos corregidos: {stats['files_fixed']}")
+        print(f"❌ Errores: {stats['errors']}")
+        print(f"📄 Reporte combinado guardado en: {args.output}")
+
+if __name__ == "__main__":
+    main()
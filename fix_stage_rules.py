@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Reglas de las etapas de escapes TSX y de ObjectId del pipeline de corrección
+del proyecto ayamas (ver fix_pipeline.py). Las reglas de la etapa de saltos
+de línea son las de NewlineFixer (ver fix_newlines_improved.py).
+"""
+
+import re
+from typing import List, Tuple
+
+from fix_backup import BACKUP_DIR
+from fix_cache import CACHE_DIR
+from fix_rules import compile_rules
+
+# Patrones de corrección específicos para TSX
+TSX_PATTERNS = [
+    # className con escape incorrecto
+    (r'className=\\"([^"]*)\\"', r'className="\1"', 'Fixed className escapes'),
+
+    # Otros atributos con escape incorrecto
+    (r'(\w+)=\\"([^"]*)\\"', r'\1="\2"', 'Fixed attribute escapes'),
+
+    # Template strings con escape incorrecto
+    (r'`([^`]*)\\"([^`]*)`', r'`\1"\2`', 'Fixed template string escapes'),
+
+    # Comillas simples con escape incorrecto
+    (r"\\'", r"'", 'Fixed single quote escapes'),
+
+    # Normalizar espacios y saltos de línea
+    (r'\\"\\n\s*', r'"\n', 'Fixed newline escapes'),
+
+    # Corregir escapes dobles
+    (r'\\\\"', r'"', 'Fixed double escapes'),
+]
+
+# Bytes que necesita cualquiera de los patrones anteriores
+ESCAPES_PREFILTER_BYTES = (b'\\',)
+
+# Archivos específicos con problemas (los únicos de la etapa de escapes)
+PROBLEM_FILES = [
+    "src/components/carousel/MainCarouselFixed.tsx",
+    "src/components/carousel/SimpleCarouselTest.tsx",
+    "src/components/ui/ProductsGrid.tsx"
+]
+
+REACT_EXTENSIONS = {'.tsx', '.ts', '.jsx', '.js'}
+OBJECTID_SKIP_DIRS = {'node_modules', '.next', '.git', 'scripts-obsoletos', '__pycache__', CACHE_DIR, BACKUP_DIR}
+
+# Patrones para corregir ObjectIds
+OBJECTID_PATTERNS = [
+    # React keys: key={item._id} → key={item._id.toString()}
+    (r'key=\{([^}]+\._id)\}', r'key={\1.toString()}', 'Fixed React keys with ObjectId'),
+
+    # URLs en router.push: `/path/${item._id}` → `/path/${item._id.toString()}`
+    (r'router\.push\(`([^`]*?)\$\{([^}]+\._id)\}([^`]*?)`\)',
+     r'router.push(`\1${\2.toString()}\3`)', 'Fixed router.push URLs with ObjectId'),
+
+    # URLs en fetch: `/api/endpoint/${item._id}` → `/api/endpoint/${item._id.toString()}`
+    (r'fetch\(`([^`]*?)\$\{([^}]+\._id)\}([^`]*?)`',
+     r'fetch(`\1${\2.toString()}\3`', 'Fixed fetch URLs with ObjectId'),
+
+    # Comparaciones simples: item._id === other._id → item._id.toString() === other._id.toString()
+    (r'([a-zA-Z_$][a-zA-Z0-9_$]*\._id)\s*([!=]==?)\s*([a-zA-Z_$][a-zA-Z0-9_$]*\._id)',
+     r'\1.toString() \2 \3.toString()', 'Fixed ObjectId comparisons'),
+]
+
+# Bytes que necesita cualquiera de los patrones anteriores
+OBJECTID_PREFILTER_BYTES = (b'_id',)
+
+def fix_escapes_content(content: str) -> Tuple[str, List[str]]:
+    """Aplica las correcciones de escape al contenido y devuelve los cambios."""
+    return compile_rules(TSX_PATTERNS, re.MULTILINE).apply(content)
+
+def fix_objectid_content(content: str) -> Tuple[str, List[str]]:
+    """Aplica las correcciones de ObjectId al contenido y devuelve los cambios."""
+    return compile_rules(OBJECTID_PATTERNS).apply(content)
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Ejecución en etapas para los scripts de corrección del proyecto ayamas.
+Descubrir, leer, corregir y escribir corren a la vez, conectadas por colas
+acotadas: el trabajo empieza con el primer archivo encontrado, la memoria queda
+limitada por la profundidad de las colas y cada etapa lleva contadores de
+rendimiento para ver cuál es el cuello de botella.
+
+    source ──▶ [lectura: hilos] ──▶ [CPU: procesos] ──▶ [escritura: hilos] ──▶ salida
+
+Un elemento marcado como terminado (done) no pasa por las etapas siguientes:
+va directo a la salida (p. ej. un archivo que el prefiltro descarta).
+
+Si quien consume la salida se detiene (una excepción, Ctrl+C), las etapas dejan
+de trabajar y se vacían antes de que la excepción siga: ninguna escribe nada
+después de que el consumidor deshizo lo suyo.
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fix_watchdog import OK, TIMEOUT, run_with_budget
+
+# Marca de fin en las colas: la etapa que termina envía una por cada hilo de la siguiente
+_END = object()
+
+class WorkItem:
+    """Un archivo en tránsito por las etapas."""
+
+    __slots__ = ('path', 'stat', 'content', 'fixed', 'result', 'done', 'extra')
+
+    def __init__(self, path, stat=None):
+        self.path = path
+        self.stat = stat
+        self.content = None
+        self.fixed = None
+        self.result = None
+        self.done = False
+        # Datos propios de cada etapa (tiempos, estadísticas del trabajador, ...)
+        self.extra: Dict[str, Any] = {}
+
+    @property
+    def size(self) -> int:
+        return self.stat.st_size if self.stat is not None else 0
+
+class StageCounter:
+    """Contadores de una etapa: elementos, bytes y en qué se fue el tiempo de sus hilos.
+
+    busy es el tiempo trabajando; wait_input el tiempo esperando elementos (la
+    etapa anterior no da abasto) y wait_output el tiempo bloqueado porque la
+    cola siguiente está llena (la etapa siguiente no da abasto).
+    """
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.bytes = 0
+        self.busy = 0.0
+        self.wait_input = 0.0
+        self.wait_output = 0.0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def add(self, items: int = 0, size: int = 0, busy: float = 0.0,
+            wait_input: float = 0.0, wait_output: float = 0.0):
+        with self._lock:
+            self.items += items
+            self.bytes += size
+            self.busy += busy
+            self.wait_input += wait_input
+            self.wait_output += wait_output
+
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    def utilization(self) -> float:
+        """Fracción del tiempo disponible de sus hilos que la etapa pasó trabajando."""
+        available = self.elapsed() * self.workers
+        return self.busy / available if available else 0.0
+
+    def as_dict(self) -> Dict:
+        elapsed = self.elapsed()
+        return {
+            'stage': self.name,
+            'workers': self.workers,
+            'items': self.items,
+            'bytes': self.bytes,
+            'seconds': round(elapsed, 6),
+            'busy_seconds': round(self.busy, 6),
+            'wait_input_seconds': round(self.wait_input, 6),
+            'wait_output_seconds': round(self.wait_output, 6),
+            'utilization': round(self.utilization(), 4),
+            'items_per_second': round(self.items / elapsed, 2) if elapsed else 0.0,
+            'mb_per_second': round(self.bytes / elapsed / (1024 * 1024), 3) if elapsed else 0.0,
+        }
+
+class _Stage:
+    def __init__(self, name: str, workers: int):
+        self.counter = StageCounter(name, workers)
+        self.workers = workers
+        self.input: Optional[queue.Queue] = None
+
+class _ThreadStage(_Stage):
+    def __init__(self, name: str, func: Callable[[WorkItem], None], workers: int):
+        super().__init__(name, workers)
+        self.func = func
+
+class _ProcessStage(_Stage):
+    def __init__(self, name: str, func: Callable, jobs: int, timeout: Optional[float],
+                 initializer: Callable, initargs: Tuple, payload: Callable, complete: Callable):
+        super().__init__(name, jobs)
+        self.func = func
+        self.timeout = timeout
+        self.initializer = initializer
+        self.initargs = initargs
+        self.payload = payload
+        self.complete = complete
+
+class StagedPipeline:
+    """Etapas conectadas por colas acotadas, alimentadas por un generador.
+
+    Las etapas de hilos reciben el WorkItem y lo modifican en el lugar. La
+    etapa de procesos envía payload(item) a procesos trabajadores (con
+    fix_watchdog.run_with_budget, así que admite presupuesto por elemento) y
+    complete(item, estado, valor) incorpora la respuesta en este proceso.
+
+    run() produce los elementos a medida que terminan, no en el orden de la
+    fuente. Una excepción de una etapa termina solo ese elemento: fail(item,
+    mensaje) lo marca como error y va a la salida. Las fallas que no son de un
+    elemento (la fuente, el pool de procesos) se relanzan al final de run().
+    """
+
+    def __init__(self, source: Iterable[WorkItem], depth: int = 64, name: str = 'discover',
+                 fail: Callable[[WorkItem, str], None] = None):
+        self.source = source
+        self.depth = depth
+        self.fail = fail
+        self.source_counter = StageCounter(name, 1)
+        self.stages: List[_Stage] = []
+        self.errors: List[BaseException] = []
+        self.cancelled = threading.Event()
+
+    def add_threads(self, name: str, func: Callable[[WorkItem], None], workers: int = 1) -> 'StagedPipeline':
+        self.stages.append(_ThreadStage(name, func, max(1, workers)))
+        return self
+
+    def add_processes(self, name: str, func: Callable, payload: Callable[[WorkItem], Any],
+                      complete: Callable[[WorkItem, str, Any], None], jobs: int = 1,
+                      timeout: float = None, initializer: Callable = None,
+                      initargs: Tuple = ()) -> 'StagedPipeline':
+        self.stages.append(_ProcessStage(name, func, max(1, jobs), timeout, initializer, initargs,
+                                         payload, complete))
+        return self
+
+    def counters(self) -> List[StageCounter]:
+        return [self.source_counter] + [stage.counter for stage in self.stages]
+
+    def report(self) -> Dict:
+        """Contadores por etapa y la etapa más ocupada (el cuello de botella)."""
+        stages = [counter.as_dict() for counter in self.counters()]
+        bottleneck = max(self.counters(), key=StageCounter.utilization)
+        return {'depth': self.depth, 'stages': stages, 'bottleneck': bottleneck.name}
+
+    def _fail_item(self, item: WorkItem, error: BaseException):
+        """Termina el elemento cuya etapa lanzó error (ver fail)."""
+        item.done = True
+        if self.fail is None or not isinstance(error, Exception):
+            self.errors.append(error)
+            return
+        try:
+            self.fail(item, str(error))
+        except Exception as e:
+            self.errors.append(e)
+
+    def _put(self, target: queue.Queue, item: Any) -> float:
+        """Encola (bloqueando si la cola está llena) y devuelve el tiempo bloqueado."""
+        start = time.perf_counter()
+        target.put(item)
+        return time.perf_counter() - start
+
+    def _route(self, position: int, item: WorkItem, output: queue.Queue) -> float:
+        """Envía el elemento a la etapa siguiente, o a la salida si ya terminó."""
+        following = self.stages[position + 1].input if position + 1 < len(self.stages) else output
+        return self._put(output if item.done else following, item)
+
+    def _finish(self, position: int, output: queue.Queue, counter: StageCounter):
+        """Avisa a cada consumidor de la etapa siguiente que no hay más elementos."""
+        counter.finished = time.perf_counter()
+        if position + 1 < len(self.stages):
+            following = self.stages[position + 1]
+            for _ in range(following.workers if isinstance(following, _ThreadStage) else 1):
+                following.input.put(_END)
+        else:
+            output.put(_END)
+
+    def _run_source(self, output: queue.Queue):
+        counter = self.source_counter
+        counter.started = time.perf_counter()
+        try:
+            source = iter(self.source)
+            while not self.cancelled.is_set():
+                start = time.perf_counter()
+                item = next(source, _END)
+                busy = time.perf_counter() - start
+                if item is _END:
+                    counter.add(busy=busy)
+                    break
+                waited = self._route(-1, item, output)
+                counter.add(1, item.size, busy, wait_output=waited)
+        except BaseException as e:
+            self.errors.append(e)
+        finally:
+            self._finish(-1, output, counter)
+
+    def _run_thread_worker(self, position: int, stage: _ThreadStage, output: queue.Queue, remaining: List[int]):
+        counter = stage.counter
+        while True:
+            start = time.perf_counter()
+            item = stage.input.get()
+            waited = time.perf_counter() - start
+            if item is _END:
+                counter.add(wait_input=waited)
+                break
+            start = time.perf_counter()
+            if self.cancelled.is_set():
+                item.done = True
+            else:
+                try:
+                    stage.func(item)
+                except BaseException as e:
+                    self._fail_item(item, e)
+            busy = time.perf_counter() - start
+            blocked = self._route(position, item, output)
+            counter.add(1, item.size, busy, waited, blocked)
+        # El último hilo de la etapa en terminar avisa a la siguiente
+        with counter._lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            self._finish(position, output, counter)
+
+    def _run_process_stage(self, position: int, stage: _ProcessStage, output: queue.Queue):
+        counter = stage.counter
+        # Elementos enviados a los trabajadores, por clave, hasta que vuelve su respuesta
+        inputs: Dict[int, WorkItem] = {}
+
+        def payloads():
+            # run_with_budget pide el siguiente elemento cuando se libera un trabajador
+            while True:
+                start = time.perf_counter()
+                item = stage.input.get()
+                counter.add(wait_input=time.perf_counter() - start)
+                if item is _END:
+                    return
+                if self.cancelled.is_set():
+                    # Se descarta sin procesar; la etapa sigue leyendo hasta el fin de su entrada
+                    continue
+                inputs[id(item)] = item
+                yield id(item), stage.payload(item)
+
+        try:
+            for (key, _), status, value in run_with_budget(_call_keyed, payloads(), stage.timeout, stage.workers,
+                                                           _init_keyed, (stage.func, stage.initializer,
+                                                                         stage.initargs)):
+                item = inputs.pop(key)
+                busy = 0.0
+                if status == OK:
+                    busy, value = value
+                elif status == TIMEOUT:
+                    busy = stage.timeout
+                try:
+                    stage.complete(item, status, value)
+                except BaseException as e:
+                    self._fail_item(item, e)
+                blocked = self._route(position, item, output)
+                counter.add(1, item.size, busy, wait_output=blocked)
+        except BaseException as e:
+            self.errors.append(e)
+        finally:
+            self._finish(position, output, counter)
+
+    def run(self) -> Iterator[WorkItem]:
+        """Arranca todas las etapas y produce los elementos a medida que terminan."""
+        output: queue.Queue = queue.Queue(self.depth)
+        for stage in self.stages:
+            stage.input = queue.Queue(self.depth)
+
+        threads = [threading.Thread(target=self._run_source, args=(output,), daemon=True)]
+        for position, stage in enumerate(self.stages):
+            stage.counter.started = time.perf_counter()
+            if isinstance(stage, _ThreadStage):
+                remaining = [stage.workers]
+                threads.extend(threading.Thread(target=self._run_thread_worker, daemon=True,
+                                                args=(position, stage, output, remaining))
+                               for _ in range(stage.workers))
+            else:
+                threads.append(threading.Thread(target=self._run_process_stage, daemon=True,
+                                                args=(position, stage, output)))
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = output.get()
+                if item is _END:
+                    break
+                yield item
+        except BaseException:
+            # El consumidor se detuvo: las etapas terminan sin trabajar y se vacían
+            self.cancelled.set()
+            while output.get() is not _END:
+                pass
+            for thread in threads:
+                thread.join()
+            raise
+
+        for thread in threads:
+            thread.join()
+        if self.errors:
+            raise self.errors[0]
+
+# Función de la etapa de procesos en cada trabajador (ver _init_keyed)
+_keyed_func = None
+
+def _init_keyed(func: Callable, initializer: Callable, initargs: Tuple):
+    global _keyed_func
+    _keyed_func = func
+    if initializer is not None:
+        initializer(*initargs)
+
+def _call_keyed(keyed: Tuple[int, Any]) -> Tuple[float, Any]:
+    """Aplica la función de la etapa y devuelve también cuánto tardó en el trabajador."""
+    _, payload = keyed
+    start = time.perf_counter()
+    value = _keyed_func(payload)
+    return time.perf_counter() - start, value
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Procesamiento por bloques para los archivos grandes del proyecto ayamas.
+Aplica las mismas reglas que sobre el contenido completo, pero leyendo el archivo
+en bloques de tamaño fijo y escribiendo la salida a medida que se produce, con
+un resultado idéntico byte a byte.
+
+Cada regla recorre su propia ventana del texto. Una coincidencia solo se acepta
+cuando todo lo que el motor de re pudo leer para encontrarla (y para descartar
+las posiciones anteriores) ya está en la ventana; el resto espera al bloque
+siguiente. Cuánto puede leer un intento se deduce del patrón (ver attempt_bounds).
+"""
+
+import codecs
+import io
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Pattern, Sequence
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+# Tamaño de bloque por defecto, en caracteres
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+class StreamError(Exception):
+    """El patrón no se puede aplicar por bloques con resultado idéntico."""
+
+class Bounds(NamedTuple):
+    """Hasta dónde puede leer un intento de coincidencia que empieza en s.
+
+    Sin stops el intento lee a lo sumo width + ahead caracteres desde s. Con
+    stops (caracteres que ninguna repetición sin límite puede consumir) lee a
+    lo sumo hasta la (width + 1)-ésima aparición de uno de ellos desde s, más
+    ahead: las partes acotadas consumen como mucho width caracteres en total.
+    behind es cuánto puede mirar hacia atrás.
+    """
+    width: int
+    stops: Optional[FrozenSet[str]]
+    ahead: int
+    behind: int
+
+_SINGLE = {sre_constants.LITERAL, sre_constants.NOT_LITERAL, sre_constants.ANY,
+           sre_constants.IN, sre_constants.CATEGORY}
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT,
+            getattr(sre_constants, 'POSSESSIVE_REPEAT', sre_constants.MAX_REPEAT)}
+
+_CATEGORIES = {
+    sre_constants.CATEGORY_SPACE: str.isspace,
+    sre_constants.CATEGORY_DIGIT: str.isdecimal,
+    sre_constants.CATEGORY_WORD: lambda ch: ch.isalnum() or ch == '_',
+}
+_CATEGORIES.update({
+    sre_constants.CATEGORY_NOT_SPACE: lambda ch: not ch.isspace(),
+    sre_constants.CATEGORY_NOT_DIGIT: lambda ch: not ch.isdecimal(),
+    sre_constants.CATEGORY_NOT_WORD: lambda ch: not (ch.isalnum() or ch == '_'),
+})
+
+class _Analysis:
+    """Recorre el árbol de sre_parse de un patrón y acumula sus límites."""
+
+    def __init__(self, flags: int):
+        self.flags = flags
+        self.stop_sets: List[FrozenSet[str]] = []
+        self.accepters: List[Callable[[str], bool]] = []
+        self.groups: Dict[int, int] = {}
+        self.ahead = 0
+        self.behind = 0
+
+    def accepter(self, op, av) -> Callable[[str], bool]:
+        """Función que indica si un elemento de un carácter acepta ch."""
+        if op is sre_constants.LITERAL:
+            return lambda ch: ch == chr(av)
+        if op is sre_constants.NOT_LITERAL:
+            return lambda ch: ch != chr(av)
+        if op is sre_constants.ANY:
+            return lambda ch: ch != '\n' or bool(self.flags & sre_parse.SRE_FLAG_DOTALL)
+        if op is sre_constants.CATEGORY:
+            return _CATEGORIES[av]
+        negate = bool(av) and av[0][0] is sre_constants.NEGATE
+        tests = [self.accepter(item_op, item_av) if item_op is not sre_constants.RANGE
+                 else (lambda lo, hi: lambda ch: lo <= ord(ch) <= hi)(*item_av)
+                 for item_op, item_av in (av[1:] if negate else av)]
+        return lambda ch: any(test(ch) for test in tests) != negate
+
+    def stop_set(self, op, av) -> Optional[FrozenSet[str]]:
+        """Caracteres (finitos) que el elemento no acepta, o None si son infinitos."""
+        if op is sre_constants.NOT_LITERAL:
+            return frozenset(chr(av))
+        if op is sre_constants.ANY and not self.flags & sre_parse.SRE_FLAG_DOTALL:
+            return frozenset('\n')
+        if op is sre_constants.IN and av and av[0][0] is sre_constants.NEGATE:
+            if all(item_op is sre_constants.LITERAL for item_op, _ in av[1:]):
+                return frozenset(chr(item_av) for _, item_av in av[1:])
+        return None
+
+    def walk(self, items) -> int:
+        """Ancho máximo de las partes acotadas de una secuencia."""
+        width = 0
+        for op, av in items:
+            if op in _SINGLE:
+                width += 1
+            elif op is sre_constants.SUBPATTERN:
+                group, _, _, sub = av
+                sub_width = self.walk(sub)
+                if group is not None:
+                    self.groups[group] = sub_width
+                width += sub_width
+            elif op is sre_constants.BRANCH:
+                width += max(self.walk(alternative) for alternative in av[1])
+            elif op in _REPEATS:
+                low, high, sub = av
+                if high != sre_constants.MAXREPEAT:
+                    width += high * self.walk(sub)
+                elif len(sub) == 1 and sub[0][0] in _SINGLE:
+                    stops = self.stop_set(*sub[0])
+                    if stops is None:
+                        self.accepters.append(self.accepter(*sub[0]))
+                    else:
+                        self.stop_sets.append(stops)
+                else:
+                    raise StreamError('repetición sin límite de un subpatrón')
+            elif op is sre_constants.AT:
+                # ^, $, \b y compañía miran un carácter a cada lado
+                self.ahead = max(self.ahead, 1)
+                self.behind = max(self.behind, 1)
+            elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+                direction, sub = av
+                before = len(self.stop_sets) + len(self.accepters)
+                sub_width = self.walk(sub)
+                if len(self.stop_sets) + len(self.accepters) != before:
+                    raise StreamError('aserción sin límite')
+                if direction > 0:
+                    self.ahead = max(self.ahead, sub_width)
+                else:
+                    self.behind = max(self.behind, sub_width)
+            elif op is sre_constants.GROUPREF and av in self.groups:
+                width += self.groups[av]
+            else:
+                raise StreamError(f'operación no soportada: {op}')
+        return width
+
+def attempt_bounds(pattern: Pattern) -> Bounds:
+    """Calcula los límites de lectura de un patrón compilado (ver Bounds)."""
+    if pattern.flags & sre_parse.SRE_FLAG_IGNORECASE:
+        raise StreamError('patrones sin distinción de mayúsculas no soportados')
+    parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    if parsed.getwidth()[0] == 0:
+        raise StreamError('el patrón puede coincidir con la cadena vacía')
+    analysis = _Analysis(pattern.flags)
+    width = analysis.walk(parsed)
+
+    stops = None
+    if analysis.stop_sets or analysis.accepters:
+        if not analysis.stop_sets:
+            raise StreamError('repetición sin límite sin caracteres de corte')
+        stops = frozenset.intersection(*analysis.stop_sets)
+        stops = frozenset(ch for ch in stops if not any(accepts(ch) for accepts in analysis.accepters))
+        if not stops:
+            raise StreamError('las repeticiones sin límite no tienen caracteres de corte en común')
+    # Un carácter más de margen: al final de la ventana $ y \Z coincidirían por error
+    return Bounds(width, stops, analysis.ahead + 1, analysis.behind)
+
+class _Window:
+    """Ventana deslizante sobre el texto de un patrón.
+
+    buffer[:pos] ya fue decidido; se conservan hasta behind caracteres antes
+    de pos como contexto para las miradas hacia atrás.
+    """
+
+    def __init__(self, pattern: Pattern):
+        self.pattern = pattern
+        self.bounds = attempt_bounds(pattern)
+        self.context = max(1, self.bounds.behind)
+        self.buffer = ''
+        self.pos = 0
+        self.final = False
+        self.matches = 0
+
+    def limit(self) -> int:
+        """Las posiciones de inicio anteriores a este índice ya no dependen del texto que falta."""
+        if self.final:
+            return len(self.buffer)
+        width, stops, ahead, _ = self.bounds
+        if stops is None:
+            return max(self.pos, len(self.buffer) - width - ahead)
+        # Buscar hacia atrás la (width + 1)-ésima aparición de un carácter de corte
+        index = len(self.buffer) - ahead
+        for _ in range(width + 1):
+            index = max(self.buffer.rfind(ch, self.pos, index) for ch in stops)
+            if index < 0:
+                return self.pos
+        return index + 1
+
+    def trim(self):
+        """Descarta lo ya decidido, salvo el contexto."""
+        cut = self.pos - self.context
+        if cut > 0:
+            self.buffer = self.buffer[cut:]
+            self.pos -= cut
+
+class StreamingSub(_Window):
+    """re.sub(pattern, template, texto) aplicado por partes.
+
+    feed() recibe el texto de a bloques y devuelve la salida que ya es
+    definitiva; finish() devuelve el resto. changed indica si algún reemplazo
+    difiere del texto que reemplazó (el mismo criterio que RuleSet para las
+    reglas unidas).
+    """
+
+    def __init__(self, pattern: Pattern, template: str):
+        super().__init__(pattern)
+        self.template = template
+        self.changed = False
+
+    def feed(self, text: str) -> str:
+        self.buffer += text
+        return self._drain()
+
+    def finish(self) -> str:
+        self.final = True
+        return self._drain()
+
+    def _drain(self) -> str:
+        limit = self.limit()
+        buffer = self.buffer
+        parts = []
+        while True:
+            match = self.pattern.search(buffer, self.pos)
+            if match is None or match.start() >= limit:
+                break
+            replacement = match.expand(self.template)
+            if replacement != match.group():
+                self.changed = True
+            parts.append(buffer[self.pos:match.start()])
+            parts.append(replacement)
+            self.matches += 1
+            self.pos = match.end()
+        end = max(self.pos, limit)
+        parts.append(buffer[self.pos:end])
+        self.pos = end
+        self.trim()
+        return ''.join(parts)
+
+class LineMatches(_Window):
+    """Números de línea (base 1) con alguna coincidencia, como LineIndex.lines_matching.
+
+    El patrón no debe cruzar saltos de línea: después de una coincidencia se
+    sigue buscando en la línea siguiente.
+    """
+
+    def __init__(self, pattern: Pattern):
+        super().__init__(pattern)
+        self.lines: List[int] = []
+        self.line = 1
+        self.skip_line = False
+
+    def feed(self, text: str):
+        self.buffer += text
+        self._drain()
+
+    def finish(self) -> List[int]:
+        self.final = True
+        self._drain()
+        return self.lines
+
+    def _advance(self, position: int):
+        self.line += self.buffer.count('\n', self.pos, position)
+        self.pos = position
+
+    def _drain(self):
+        limit = self.limit()
+        buffer = self.buffer
+        while True:
+            if self.skip_line:
+                newline = buffer.find('\n', self.pos)
+                if newline == -1:
+                    self.pos = len(buffer)
+                    break
+                self._advance(newline + 1)
+                self.skip_line = False
+            match = self.pattern.search(buffer, self.pos)
+            if match is None or match.start() >= limit:
+                self._advance(max(self.pos, min(limit, len(buffer))))
+                break
+            self._advance(match.start())
+            self.lines.append(self.line)
+            self.matches += 1
+            self.skip_line = True
+        self.trim()
+
+class CRLFNormalizer:
+    """text.replace('\\r\\n', '\\n') aplicado por partes."""
+
+    def __init__(self):
+        self.pending = ''
+        self.changed = False
+
+    def feed(self, text: str) -> str:
+        text = self.pending + text
+        # Un \r al final puede ser la primera mitad de un \r\n
+        self.pending = '\r' if text.endswith('\r') else ''
+        if self.pending:
+            text = text[:-1]
+        if '\r\n' in text:
+            self.changed = True
+            text = text.replace('\r\n', '\n')
+        return text
+
+    def finish(self) -> str:
+        text, self.pending = self.pending, ''
+        return text
+
+def detect_encoding(file_path, encodings: Sequence[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Optional[str]:
+    """Primera codificación que decodifica todo el archivo (como leerlo entero con cada una)."""
+    for encoding in encodings:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open(file_path, 'rb') as f:
+                while True:
+                    data = f.read(chunk_size)
+                    decoder.decode(data, final=not data)
+                    if not data:
+                        return encoding
+        except UnicodeDecodeError:
+            continue
+    return None
+
+def iter_text(file_path, encoding: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Texto del archivo en bloques de chunk_size caracteres, con los mismos saltos de línea que open(..., 'r')."""
+    with open(file_path, 'r', encoding=encoding) as f:
+        while True:
+            text = f.read(chunk_size)
+            if not text:
+                return
+            yield text
+
+def line_heads(chunks: Iterable[str], numbers: Iterable[int], width: int = 100) -> Dict[int, str]:
+    """Comienzo de las líneas pedidas: los primeros width caracteres, con '...' si la línea sigue."""
+    wanted = set(numbers)
+    heads: Dict[int, str] = {}
+    line = 1
+    head = io.StringIO()
+    length = 0
+    for text in chunks:
+        start = 0
+        while start <= len(text):
+            newline = text.find('\n', start)
+            end = len(text) if newline == -1 else newline
+            if line in wanted and length <= width:
+                piece = text[start:min(end, start + width + 1 - length)]
+                head.write(piece)
+                length += len(piece)
+            if newline == -1:
+                break
+            if line in wanted:
+                heads[line] = _head(head.getvalue(), width)
+            line += 1
+            head = io.StringIO()
+            length = 0
+            start = newline + 1
+    if line in wanted:
+        heads[line] = _head(head.getvalue(), width)
+    return heads
+
+def _head(text: str, width: int) -> str:
+    return text[:width] + '...' if len(text) > width else text
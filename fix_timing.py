@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Instrumentación de tiempos para los scripts de corrección del proyecto ayamas.
+Mide cada fase del procesamiento de un archivo y el costo de cada regla, y
+resume los tiempos en histogramas y en la lista de archivos más lentos.
+"""
+
+import heapq
+import time
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Tuple
+
+# Límites superiores (en milisegundos) de los intervalos de los histogramas
+HISTOGRAM_BOUNDS_MS = [0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000]
+
+class PhaseTimer:
+    """Cronómetro por fases: cada lap() asigna el tiempo transcurrido a una fase."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.last = time.perf_counter()
+
+    def lap(self, phase: str):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last
+        self.last = now
+
+    def add(self, phase: str, seconds: float):
+        """Asigna a una fase tiempo medido aparte (p. ej. su parte de un trabajo por lotes)."""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def resume(self):
+        """Sigue midiendo desde ahora: lo transcurrido desde el último lap no es de este cronómetro."""
+        self.last = time.perf_counter()
+
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def as_dict(self) -> Dict:
+        return {
+            'total': round(self.total(), 6),
+            'phases': {phase: round(seconds, 6) for phase, seconds in self.phases.items()}
+        }
+
+def record_rule(timings: Dict[str, Dict], name: str, seconds: float, matches: int):
+    """Acumula el tiempo y las coincidencias de una regla."""
+    entry = timings.get(name)
+    if entry is None:
+        entry = timings[name] = {'calls': 0, 'seconds': 0.0, 'matches': 0}
+    entry['calls'] += 1
+    entry['seconds'] += seconds
+    entry['matches'] += matches
+
+def merge_rule_timings(target: Dict[str, Dict], source: Dict[str, Dict]):
+    """Suma los tiempos por regla de otro proceso."""
+    for name, entry in source.items():
+        current = target.setdefault(name, {'calls': 0, 'seconds': 0.0, 'matches': 0})
+        for key in current:
+            current[key] += entry[key]
+
+def _histogram_labels() -> List[str]:
+    return [f'<{bound:g}ms' for bound in HISTOGRAM_BOUNDS_MS] + [f'>={HISTOGRAM_BOUNDS_MS[-1]:g}ms']
+
+def _bucket(seconds: float) -> int:
+    return bisect_right(HISTOGRAM_BOUNDS_MS, seconds * 1000)
+
+def latency_histogram(seconds: Iterable[float]) -> Dict[str, int]:
+    """Cuenta las duraciones por intervalo ('<1ms', '<5ms', ..., '>=1000ms')."""
+    counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    for value in seconds:
+        counts[_bucket(value)] += 1
+    return dict(zip(_histogram_labels(), counts))
+
+class TimingSummary:
+    """Acumula los tiempos por archivo de a uno, con memoria constante.
+
+    Guarda solo totales, conteos por intervalo y los top_n archivos más lentos,
+    así que sirve tanto para una lista de resultados como para un reporte en streaming.
+    """
+
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        self.total = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.phases: Dict[str, List] = {}
+        self.slowest: List[Tuple[float, int, Dict]] = []
+        self.count = 0
+
+    def add(self, result: Dict):
+        timings = result.get('timings')
+        if not timings:
+            return
+        self.total += timings['total']
+        self.histogram[_bucket(timings['total'])] += 1
+        for phase, seconds in timings['phases'].items():
+            entry = self.phases.setdefault(phase, [0.0, [0] * len(self.histogram)])
+            entry[0] += seconds
+            entry[1][_bucket(seconds)] += 1
+
+        # Montículo de los más lentos; el contador desempata sin comparar dicts
+        item = (timings['total'], -self.count, {'file': result['file'], **timings})
+        self.count += 1
+        if len(self.slowest) < self.top_n:
+            heapq.heappush(self.slowest, item)
+        elif item > self.slowest[0]:
+            heapq.heapreplace(self.slowest, item)
+
+    def report(self, rule_timings: Dict[str, Dict]) -> Dict:
+        """Resumen para el reporte JSON."""
+        labels = _histogram_labels()
+        rules = sorted(rule_timings.items(), key=lambda item: item[1]['seconds'], reverse=True)
+        return {
+            'files': {
+                'total_seconds': round(self.total, 6),
+                'histogram': dict(zip(labels, self.histogram)),
+            },
+            'phases': {
+                phase: {
+                    'total_seconds': round(total, 6),
+                    'histogram': dict(zip(labels, counts)),
+                }
+                for phase, (total, counts) in sorted(self.phases.items())
+            },
+            'rules': [
+                {'rule': name, 'calls': entry['calls'], 'seconds': round(entry['seconds'], 6),
+                 'matches': entry['matches']}
+                for name, entry in rules
+            ],
+            'slowest_files': [entry for _, _, entry in sorted(self.slowest, reverse=True)],
+        }
+
+def timing_report(results: Iterable[Dict], rule_timings: Dict[str, Dict], top_n: int = 10) -> Dict:
+    """Resume los tiempos de una ejecución para el reporte JSON."""
+    summary = TimingSummary(top_n)
+    for result in results:
+        summary.add(result)
+    return summary.report(rule_timings)
+
+def _merge_section(target: Dict, section: Dict):
+    """Suma un total con su histograma ({'total_seconds', 'histogram'})."""
+    target['total_seconds'] = round(target['total_seconds'] + section['total_seconds'], 6)
+    for label, count in section['histogram'].items():
+        target['histogram'][label] += count
+
+def merge_timing_reports(reports: List[Dict]) -> Dict:
+    """Combina los resúmenes de tiempos de varias ejecuciones (p. ej. los shards de fix_shard.py)."""
+    def empty_section() -> Dict:
+        return {'total_seconds': 0.0, 'histogram': dict.fromkeys(_histogram_labels(), 0)}
+
+    files = empty_section()
+    phases: Dict[str, Dict] = {}
+    rules: Dict[str, Dict] = {}
+    slowest = []
+    run_timings: Dict[str, float] = {}
+
+    for report in reports:
+        _merge_section(files, report['files'])
+        for phase, section in report['phases'].items():
+            _merge_section(phases.setdefault(phase, empty_section()), section)
+        for entry in report['rules']:
+            merge_rule_timings(rules, {entry['rule']: {key: entry[key] for key in ('calls', 'seconds', 'matches')}})
+        slowest.extend(report['slowest_files'])
+        # Tiempos de la ejecución completa (p. ej. 'commit'): se suman
+        for key, value in report.items():
+            if isinstance(value, (int, float)):
+                run_timings[key] = round(run_timings.get(key, 0.0) + value, 6)
+
+    top_n = max(len(report['slowest_files']) for report in reports)
+    return {
+        'files': files,
+        'phases': dict(sorted(phases.items())),
+        'rules': [
+            {'rule': name, 'calls': entry['calls'], 'seconds': round(entry['seconds'], 6),
+             'matches': entry['matches']}
+            for name, entry in sorted(rules.items(), key=lambda item: item[1]['seconds'], reverse=True)
+        ],
+        'slowest_files': sorted(slowest, key=lambda entry: entry['total'], reverse=True)[:top_n],
+        **run_timings,
+    }
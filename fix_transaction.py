@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Escritura transaccional de archivos para los scripts de corrección del proyecto ayamas.
+Los archivos corregidos se preparan como temporales en su mismo directorio y solo al
+final se sincronizan en lote y se renombran en su lugar; si algo falla, se deshace todo.
+"""
+
+import os
+import re
+import shutil
+import stat
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, AnyStr, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# A partir de esta cantidad de archivos un solo os.sync() es más barato que un fsync por archivo
+SYNC_ALL_THRESHOLD = 64
+
+# Temporales: .<archivo>.ayamas-<transacción>-<aleatorio>.tmp. Las partes de largo fijo
+# identifican sin ambigüedad el archivo y la transacción (ver WriteTransaction.discard)
+TEMP_NAME = re.compile(r'\.(?P<name>.+)\.ayamas-(?P<token>[0-9a-f]{12})-[0-9a-f]{8}\.tmp')
+
+class TransactionError(Exception):
+    """La transacción no pudo confirmarse y se deshicieron los cambios."""
+
+class WriteTransaction:
+    """Conjunto de escrituras que se confirman todas o ninguna."""
+
+    def __init__(self, token: str = None):
+        # Los procesos trabajadores usan el mismo identificador que la transacción principal (ver merge)
+        self.token = token or os.urandom(6).hex()
+        self.staged: List[Tuple[str, str]] = []
+        # Escrituras (o backups) que fallaron: con alguna, commit no reemplaza nada
+        self.failed: List[Tuple[str, str]] = []
+        # Archivos cuya escritura prepara un proceso trabajador (ver delegate)
+        self.delegated: Set[str] = set()
+
+    def fail(self, file_path: Path, error: Exception):
+        """Registra que no se pudo preparar la escritura de un archivo."""
+        self.failed.append((str(file_path), str(error)))
+
+    def delegate(self, paths: Iterable[Path]):
+        """Registra archivos que se envían a procesos trabajadores.
+
+        Si la transacción se aborta antes de recibir sus escrituras (una
+        excepción, Ctrl+C), abort borra igual los temporales que hayan creado.
+        """
+        self.delegated.update(str(file_path) for file_path in paths)
+
+    def merge(self, other: 'WriteTransaction'):
+        """Incorpora las escrituras y los fallos de otra transacción (p. ej. la de un proceso trabajador)."""
+        self.staged.extend(other.staged)
+        self.failed.extend(other.failed)
+
+    def stage(self, file_path: Path, content: AnyStr, encoding: str = 'utf-8'):
+        """Escribe el nuevo contenido en un temporal junto al archivo destino (bytes tal cual)."""
+        with self.staging(file_path, None if isinstance(content, bytes) else encoding) as f:
+            f.write(content)
+
+    @contextmanager
+    def staging(self, file_path: Path, encoding: Optional[str] = 'utf-8') -> Iterator[IO]:
+        """Como stage, pero entrega el temporal abierto para escribir el contenido por partes.
+
+        Con encoding=None el temporal se abre en modo binario.
+        """
+        file_path = Path(file_path)
+        try:
+            fd, tmp_path = self._create_temp(file_path)
+        except OSError as e:
+            self.fail(file_path, e)
+            raise
+        try:
+            with os.fdopen(fd, 'wb' if encoding is None else 'w', encoding=encoding) as f:
+                yield f
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(file_path).st_mode))
+        except Exception as e:
+            os.unlink(tmp_path)
+            self.fail(file_path, e)
+            raise
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.staged.append((str(file_path), tmp_path))
+
+    def _create_temp(self, file_path: Path) -> Tuple[int, str]:
+        """Crea el temporal de un archivo (ver TEMP_NAME) y devuelve (descriptor, ruta)."""
+        flags = os.O_RDWR | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+        while True:
+            tmp_path = str(file_path.parent / f'.{file_path.name}.ayamas-{self.token}-{os.urandom(4).hex()}.tmp')
+            try:
+                return os.open(tmp_path, flags, 0o600), tmp_path
+            except FileExistsError:
+                continue
+
+    def discard(self, paths: Iterable[Path]):
+        """Borra los temporales de esta transacción para esos archivos, los haya creado quien sea.
+
+        Sirve para los archivos de un proceso trabajador que se mató o cuya
+        respuesta no llegó: este proceso no conoce las rutas, pero sí el nombre
+        exacto que tienen. Cada directorio se lista una sola vez.
+        """
+        names: Dict[Path, Set[str]] = {}
+        for file_path in paths:
+            file_path = Path(file_path)
+            names.setdefault(file_path.parent, set()).add(file_path.name)
+        for directory, directory_names in names.items():
+            try:
+                entries = os.listdir(directory)
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                match = TEMP_NAME.fullmatch(entry)
+                if match and match['token'] == self.token and match['name'] in directory_names:
+                    try:
+                        os.unlink(os.path.join(directory, entry))
+                    except FileNotFoundError:
+                        pass
+
+    def unstage(self, file_path: Path):
+        """Descarta la escritura preparada para un archivo."""
+        for entry in [entry for entry in self.staged if entry[0] == str(file_path)]:
+            self.staged.remove(entry)
+            os.unlink(entry[1])
+
+    def abort(self):
+        """Descarta los temporales sin tocar los archivos originales."""
+        for _, tmp_path in self.staged:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+        if self.delegated:
+            self.discard(self.delegated)
+        self.staged = []
+        self.failed = []
+        self.delegated = set()
+
+    def _sync(self):
+        """Lleva a disco todos los temporales antes de renombrar."""
+        if len(self.staged) >= SYNC_ALL_THRESHOLD and hasattr(os, 'sync'):
+            os.sync()
+            return
+        for _, tmp_path in self.staged:
+            fd = os.open(tmp_path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _sync_dirs(self, paths):
+        """Sincroniza una vez cada directorio afectado por los renombres."""
+        if os.name != 'posix':
+            return
+        for directory in sorted({os.path.dirname(path) for path in paths}):
+            fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def commit(self) -> int:
+        """Confirma todas las escrituras; devuelve cuántos archivos se reemplazaron.
+
+        Si no se pudo preparar alguna (ver fail), no se reemplaza ninguna.
+        """
+        if self.failed:
+            file_path, error = self.failed[0]
+            count = len(self.failed)
+            self.abort()
+            raise TransactionError(f'No se pudo preparar la escritura de {file_path}: {error}'
+                                   + (f' (y {count - 1} más)' if count > 1 else ''))
+
+        self.delegated = set()
+        if not self.staged:
+            return 0
+
+        try:
+            self._sync()
+        except OSError as e:
+            self.abort()
+            raise TransactionError(f'No se pudieron sincronizar los temporales: {e}') from e
+
+        # Conservar los originales (enlace duro o copia) hasta que todo esté en su lugar
+        replaced = []
+        for target, tmp_path in self.staged:
+            undo_path = f'{tmp_path}.orig'
+            try:
+                try:
+                    os.link(target, undo_path)
+                except OSError:
+                    shutil.copy2(target, undo_path)
+                os.replace(tmp_path, target)
+            except OSError as e:
+                # El archivo que falló sigue intacto; los ya reemplazados vuelven a su original
+                if os.path.exists(undo_path):
+                    os.unlink(undo_path)
+                for done_target, done_undo in reversed(replaced):
+                    os.replace(done_undo, done_target)
+                self.abort()
+                raise TransactionError(f'Falló el reemplazo de {target}: {e}') from e
+            replaced.append((target, undo_path))
+
+        for _, undo_path in replaced:
+            os.unlink(undo_path)
+        self._sync_dirs([target for target, _ in self.staged])
+
+        count = len(self.staged)
+        self.staged = []
+        return count
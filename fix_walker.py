@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Recorrido de directorios compartido por los scripts de corrección del proyecto ayamas.
+Usa os.scandir y poda los directorios omitidos antes de entrar en ellos, en lugar
+de recorrer todo el árbol con rglob y descartar las rutas después.
+"""
+
+import os
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional
+
+def iter_entries(root, skip_dirs: Iterable[str] = (),
+                 include: Optional[Callable[[str], bool]] = None) -> Iterator[os.DirEntry]:
+    """Genera las entradas de archivo bajo root.
+
+    Los directorios cuyo nombre está en skip_dirs no se abren nunca. El filtro
+    include recibe solo el nombre del archivo, así que la extensión se decide
+    con los datos de la DirEntry sin llamadas extra a stat.
+    """
+    skip_dirs = frozenset(skip_dirs)
+    stack = [os.fspath(root)]
+
+    while stack:
+        current = stack.pop()
+        try:
+            entries = os.scandir(current)
+        except OSError:
+            continue
+
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in skip_dirs:
+                            stack.append(entry.path)
+                    elif entry.is_file() and (include is None or include(entry.name)):
+                        yield entry
+                except OSError:
+                    continue
+
+def find_files(root, skip_dirs: Iterable[str] = (),
+               include: Optional[Callable[[str], bool]] = None) -> List[Path]:
+    """Devuelve la lista ordenada de archivos bajo root (ver iter_entries)."""
+    return sorted(Path(entry.path) for entry in iter_entries(root, skip_dirs, include))
+
+def has_extension(extensions: Iterable[str]) -> Callable[[str], bool]:
+    """Crea un filtro por extensión (con punto, p. ej. '.tsx') sobre el nombre."""
+    extensions = frozenset(extensions)
+
+    def include(name: str) -> bool:
+        return os.path.splitext(name)[1] in extensions
+
+    return include
+
+def iter_dirs(root, skip_dirs: Iterable[str] = ()) -> Iterator[str]:
+    """Genera root y todos sus subdirectorios, con la misma poda que iter_entries."""
+    skip_dirs = frozenset(skip_dirs)
+    stack = [os.fspath(root)]
+
+    while stack:
+        current = stack.pop()
+        yield current
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False) and entry.name not in skip_dirs:
+                        stack.append(entry.path)
+        except OSError:
+            continue
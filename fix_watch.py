@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Modo watch para el proyecto ayamas: corrige los archivos al guardarlos.
+Vigila el proyecto con inotify (Linux) o, si no está disponible, revisando el
+árbol periódicamente; agrupa las ráfagas de eventos de cada guardado y aplica
+el pipeline de corrección solo a los archivos que cambiaron.
+
+Uso:
+    python3 fix_watch.py [--root RUTA] [--debounce-ms 30] [--poll [SEGUNDOS]]
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from fix_backup import BackupStore
+from fix_pipeline import FixPipeline
+from fix_transaction import TransactionError, WriteTransaction
+from fix_walker import iter_dirs, iter_entries
+
+# Constantes de <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct('iIII')
+
+class InotifyWatcher:
+    """Vigila un árbol con inotify; un watch por directorio no omitido."""
+
+    def __init__(self, root: Path, skip_dirs: Set[str]):
+        libc_name = ctypes.util.find_library('c')
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 falló')
+        self.root = root
+        self.skip_dirs = skip_dirs
+        self.dirs: Dict[int, str] = {}
+        self.overflowed = False
+        self.add_tree(root)
+
+    def add_tree(self, path) -> List[str]:
+        """Agrega watches a path y sus subdirectorios; devuelve los archivos que ya contienen."""
+        files = []
+        for directory in iter_dirs(path, self.skip_dirs):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd >= 0:
+                self.dirs[wd] = directory
+            if directory != os.fspath(self.root):
+                with os.scandir(directory) as entries:
+                    files.extend(entry.path for entry in entries if entry.is_file())
+        return files
+
+    def wait(self, timeout: Optional[float]) -> List[str]:
+        """Espera eventos (None = sin límite) y devuelve las rutas de archivo que cambiaron."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        changed = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    self.overflowed = True
+                    continue
+                if mask & IN_IGNORED:
+                    self.dirs.pop(wd, None)
+                    continue
+                directory = self.dirs.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if mask & IN_ISDIR:
+                    # Directorio nuevo (o movido dentro del árbol): vigilarlo y revisar su contenido
+                    if os.path.basename(path) not in self.skip_dirs:
+                        changed.extend(self.add_tree(path))
+                elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    changed.append(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Alternativa sin inotify: compara mtime y tamaño de los archivos cada interval segundos."""
+
+    def __init__(self, root: Path, skip_dirs: Set[str], interval: float):
+        self.root = root
+        self.skip_dirs = skip_dirs
+        self.interval = interval
+        self.overflowed = False
+        self.snapshot = self.scan()
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for entry in iter_entries(self.root, self.skip_dirs):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: Optional[float]) -> List[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = self.interval if deadline is None else min(self.interval, deadline - time.monotonic())
+            if remaining > 0:
+                time.sleep(remaining)
+            snapshot = self.scan()
+            changed = [path for path, signature in snapshot.items() if self.snapshot.get(path) != signature]
+            self.snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+def create_watcher(root: Path, skip_dirs: Set[str], poll_interval: Optional[float]):
+    """inotify en Linux; si no está disponible (o se pidió --poll), sondeo periódico."""
+    if poll_interval is None and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(root, skip_dirs)
+        except (OSError, AttributeError) as e:
+            print(f"⚠️  inotify no disponible ({e}); se usa sondeo periódico")
+    return PollingWatcher(root, skip_dirs, poll_interval or 1.0)
+
+class FixWatcher:
+    """Aplica el pipeline de corrección a los archivos que cambian."""
+
+    def __init__(self, project_root: str, debounce: float = 0.03, poll_interval: float = None):
+        self.pipeline = FixPipeline(project_root)
+        self.project_root = self.pipeline.project_root
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.batches = 0
+        # Firma (mtime, tamaño) de lo que escribió el propio watch, para ignorar sus eventos
+        self.written: Dict[str, Tuple[int, int]] = {}
+
+    def signature(self, path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def process_batch(self, paths: Dict[str, float]):
+        """Corrige un lote de archivos modificados, con una transacción y un backup por lote."""
+        self.batches += 1
+        pipeline = self.pipeline
+        pipeline.backups = BackupStore(self.project_root, 'fix_watch',
+                                       run_id=f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.batches}")
+        pipeline.transaction = WriteTransaction()
+
+        fixed = []
+        try:
+            for path, first_event in sorted(paths.items()):
+                signature = self.signature(path)
+                if signature is None or self.written.pop(path, None) == signature:
+                    continue
+                stages = pipeline.stages_for_path(Path(path))
+                if not stages:
+                    continue
+                result = pipeline.process_file(Path(path), stages)
+                if result['status'] == 'fixed':
+                    fixed.append((path, first_event))
+
+            if not fixed:
+                return
+
+            pipeline.backups.commit()
+            pipeline.transaction.commit()
+        except TransactionError as e:
+            print(f"❌ {e}")
+            return
+        except BaseException:
+            # Una excepción o Ctrl+C no deja temporales en el árbol vigilado
+            pipeline.transaction.abort()
+            raise
+
+        now = time.monotonic()
+        for path, first_event in fixed:
+            self.written[path] = self.signature(path)
+            print(f"   ⚡ {os.path.relpath(path, self.project_root)} en {(now - first_event) * 1000:.0f} ms")
+        print(f"   ↩️  python3 fix_backup.py restore --run {pipeline.backups.run_id}")
+
+    def run(self):
+        """Bucle principal: espera eventos, agrupa ráfagas y procesa cada lote."""
+        skip_dirs = self.pipeline.common_skip_dirs()
+        watcher = create_watcher(self.project_root, skip_dirs, self.poll_interval)
+        mode = 'inotify' if isinstance(watcher, InotifyWatcher) else f'sondeo cada {watcher.interval:g}s'
+        print(f"👀 Vigilando {self.project_root} ({mode}); Ctrl+C para salir")
+
+        pending: Dict[str, float] = {}
+        last_event = 0.0
+        try:
+            while True:
+                # Sin eventos pendientes se bloquea sin límite: sin consumo de CPU en reposo
+                timeout = None if not pending else max(0.0, last_event + self.debounce - time.monotonic())
+                changed = watcher.wait(timeout)
+                now = time.monotonic()
+
+                if watcher.overflowed:
+                    # Se perdieron eventos: revisar todo el árbol una vez
+                    print("⚠️  Cola de eventos desbordada; revisando todo el proyecto")
+                    watcher.overflowed = False
+                    changed.extend(str(file_path) for file_path, _ in self.pipeline.find_files())
+
+                for path in changed:
+                    pending.setdefault(path, now)
+                if changed:
+                    last_event = now
+                elif pending and now - last_event >= self.debounce:
+                    batch, pending = pending, {}
+                    self.process_batch(batch)
+        except KeyboardInterrupt:
+            print(f"\n📂 Archivos procesados: {self.pipeline.stats['files_processed']}")
+            print(f"✅ Archivos corregidos: {self.pipeline.stats['files_fixed']}")
+        finally:
+            watcher.close()
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Corrige los archivos del proyecto al guardarlos")
+    parser.add_argument('--root', default="/Users/rafaelramos/Desktop/ayamas",
+                        help="Directorio raíz del proyecto")
+    parser.add_argument('--debounce-ms', type=float, default=30,
+                        help="Espera sin eventos antes de procesar una ráfaga")
+    parser.add_argument('--poll', type=float, nargs='?', const=1.0, metavar='SEGUNDOS',
+                        help="Usar sondeo periódico en vez de inotify")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.root):
+        print(f"❌ Error: El directorio {args.root} no existe")
+        sys.exit(1)
+
+    FixWatcher(args.root, args.debounce_ms / 1000, args.poll).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Ejecución con presupuesto de tiempo para los scripts de corrección del proyecto ayamas.
+El motor re de Python no puede interrumpirse desde el mismo proceso, así que cada
+archivo se procesa en un proceso trabajador que se mata si excede su presupuesto.
+"""
+
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from collections.abc import Sized
+from multiprocessing.connection import wait
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+# Resultado de cada elemento: 'ok' (valor de func), 'timeout' o 'error' (mensaje)
+OK = 'ok'
+TIMEOUT = 'timeout'
+ERROR = 'error'
+
+# Marca de fin de los elementos de entrada
+_END = object()
+
+def _worker_loop(conn, func: Callable, initializer: Callable, initargs: Tuple):
+    """Bucle del proceso trabajador: recibe (índice, elemento) y responde con el resultado."""
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        index, item = message
+        try:
+            conn.send((index, OK, func(item)))
+        except Exception as e:
+            conn.send((index, ERROR, str(e)))
+
+class _Worker:
+    """Proceso trabajador con su conexión y el elemento que está procesando."""
+
+    def __init__(self, context, func, initializer, initargs):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_loop, daemon=True,
+                                       args=(child_conn, func, initializer, initargs))
+        self.process.start()
+        child_conn.close()
+        self.index = None
+        self.deadline = None
+
+    def assign(self, index: int, item: Any, timeout: Optional[float]):
+        self.index = index
+        self.deadline = time.monotonic() + timeout if timeout else float('inf')
+        self.conn.send((index, item))
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+class _Failed:
+    """Excepción de la entrada, que se vuelve a lanzar en el hilo que consume."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+class _Feeder:
+    """Toma los elementos de entrada en un hilo aparte, de a uno y solo cuando se piden.
+
+    Esperar un elemento (p. ej. de la cola de una etapa anterior, ver
+    fix_stages) no debe impedir vigilar los plazos de los trabajadores
+    ocupados ni entregar sus resultados: la llegada de cada elemento se
+    avisa por la conexión ready, que se espera junto con las de los trabajadores.
+    """
+
+    def __init__(self, items: Iterator):
+        self.items = items
+        self.ready, self._signal = multiprocessing.Pipe(duplex=False)
+        self.requested = False
+        self._requests: queue.Queue = queue.Queue()
+        self._fed: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while self._requests.get():
+            try:
+                item = next(self.items, _END)
+            except BaseException as e:
+                item = _Failed(e)
+            self._fed.put(item)
+            try:
+                self._signal.send_bytes(b'')
+            except OSError:
+                # Se cerró mientras esperaba el elemento
+                return
+            if item is _END or isinstance(item, _Failed):
+                return
+
+    def request(self):
+        """Pide el siguiente elemento; ready queda lista cuando llega."""
+        self.requested = True
+        self._requests.put(True)
+
+    def take(self) -> Any:
+        """El elemento pedido (_END si no hay más), una vez que ready está lista."""
+        self.ready.recv_bytes()
+        self.requested = False
+        item = self._fed.get()
+        if isinstance(item, _Failed):
+            raise item.error
+        return item
+
+    def close(self):
+        self._requests.put(False)
+        self.ready.close()
+        self._signal.close()
+
+def run_with_budget(func: Callable, items: Iterable, timeout: Optional[float], jobs: int = 1,
+                    initializer: Callable = None, initargs: Tuple = ()) -> Iterator[Tuple[Any, str, Any]]:
+    """Aplica func a cada elemento en procesos trabajadores, con un presupuesto por elemento.
+
+    Produce (elemento, estado, valor) en el orden de entrada. Un trabajador que
+    excede el presupuesto se mata y se reemplaza por uno nuevo, de modo que un
+    solo elemento patológico no detiene el resto de la ejecución. timeout=None
+    no impone presupuesto.
+
+    Los elementos se toman de a uno, cuando hay un trabajador libre: items
+    puede ser un generador que se sigue produciendo mientras se procesa. Si
+    no es una secuencia se lee desde otro hilo (ver _Feeder), porque pedirle
+    un elemento puede bloquear.
+    """
+    sized = isinstance(items, Sized)
+    if sized:
+        jobs = min(jobs, len(items))
+    items = iter(items)
+    first = next(items, _END)
+    if first is _END:
+        return
+    items = itertools.chain([first], items)
+    context = multiprocessing.get_context()
+    workers = [_Worker(context, func, initializer, initargs) for _ in range(max(1, jobs))]
+    feeder = None if sized else _Feeder(items)
+    pending = {}
+    done = {}
+    next_item = 0
+    next_result = 0
+    exhausted = False
+
+    def assign(worker, item):
+        nonlocal next_item, exhausted
+        if item is _END:
+            exhausted = True
+            return
+        pending[next_item] = item
+        worker.assign(next_item, item, timeout)
+        next_item += 1
+
+    def dispatch(worker):
+        # Con _Feeder el trabajador queda libre hasta que llegue un elemento
+        worker.index = None
+        if feeder is None and not exhausted:
+            assign(worker, next(items, _END))
+
+    try:
+        for worker in workers:
+            dispatch(worker)
+
+        while not exhausted or next_result < next_item:
+            busy = [worker for worker in workers if worker.index is not None]
+            waiting = [worker.conn for worker in busy]
+            if feeder is not None and not exhausted and len(busy) < len(workers):
+                if not feeder.requested:
+                    feeder.request()
+                waiting.append(feeder.ready)
+            remaining = min((worker.deadline for worker in busy), default=float('inf')) - time.monotonic()
+            ready = wait(waiting, timeout=None if remaining == float('inf') else max(0.0, remaining))
+
+            if feeder is not None and feeder.ready in ready:
+                idle = next(worker for worker in workers if worker.index is None)
+                assign(idle, feeder.take())
+
+            for position, worker in enumerate(workers):
+                if worker.index is None:
+                    continue
+                if worker.conn in ready:
+                    try:
+                        index, status, value = worker.conn.recv()
+                    except EOFError:
+                        # El trabajador murió (p. ej. sin memoria): reemplazarlo
+                        index, status, value = worker.index, ERROR, 'Worker process died'
+                        worker.kill()
+                        worker = workers[position] = _Worker(context, func, initializer, initargs)
+                    done[index] = (status, value)
+                    dispatch(worker)
+                elif time.monotonic() >= worker.deadline:
+                    done[worker.index] = (TIMEOUT, None)
+                    worker.kill()
+                    worker = workers[position] = _Worker(context, func, initializer, initargs)
+                    dispatch(worker)
+
+            while next_result in done:
+                status, value = done.pop(next_result)
+                yield pending.pop(next_result), status, value
+                next_result += 1
+    finally:
+        if feeder is not None:
+            feeder.close()
+        for worker in workers:
+            worker.stop()